@@ -2,8 +2,12 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
 from app.core.config import Settings, get_settings
+from app.dependencies import TenantScope, get_ollama, get_store, get_tenant_registry, get_tenant_scope
 from app.metrics.history import build_metrics_history
 from app.metrics.summary import build_metrics_summary
+from app.rag.ollama_client import OllamaClient
+from app.rag.tenants import TenantRegistry
+from app.rag.vector_store import ChromaVectorStore
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
@@ -47,6 +51,113 @@ class MetricsHistoryResponse(BaseModel):
     eval_trend: list[EvalTrendPoint]
 
 
+class SchedulerClassStats(BaseModel):
+    weight: int
+    in_flight: int
+    waiting: int
+    granted: int
+    avg_wait_ms: float
+
+
+class SchedulerStats(BaseModel):
+    max_concurrency: int
+    interactive_reserved_slots: int
+    in_flight: int
+    classes: dict[str, SchedulerClassStats]
+
+
+class BackendStats(BaseModel):
+    url: str
+    in_flight: int
+    requests: int
+    failures: int
+    consecutive_failures: int
+    healthy: bool
+    ejected_for_seconds: float
+    breaker_state: str
+    breaker_open_count: int
+    embed_api: str | None = None
+    loaded_models: list[str]
+
+
+class BackendPoolStats(BaseModel):
+    name: str
+    backends: list[BackendStats]
+
+
+class HedgeModelStats(BaseModel):
+    samples: int
+    threshold_ms: float | None = None
+
+
+class HedgingStats(BaseModel):
+    enabled: bool
+    percentile: float
+    requests: int
+    hedged: int
+    hedge_wins: int
+    hedges_skipped: int
+    losers_cancelled: int
+    hedge_rate: float
+    models: dict[str, HedgeModelStats]
+
+
+class OllamaRuntimeResponse(BaseModel):
+    scheduler: SchedulerStats
+    pools: dict[str, BackendPoolStats]
+    hedging: HedgingStats
+
+
+class QueryLatencyStats(BaseModel):
+    queries: int
+    latency_p50_ms: float | None = None
+    latency_p95_ms: float | None = None
+
+
+class ShardStats(QueryLatencyStats):
+    shard: int
+    collection: str
+    count: int
+
+
+class DocstoreStats(BaseModel):
+    cached_chunks: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class HnswStats(BaseModel):
+    M: int | None = None
+    construction_ef: int | None = None
+    search_ef: int | None = None
+
+
+class VectorStoreRuntimeResponse(BaseModel):
+    tenant: str
+    shard_count: int
+    query: QueryLatencyStats
+    shards: list[ShardStats]
+    docstore: DocstoreStats
+    hnsw: HnswStats
+
+
+class TenantStats(QueryLatencyStats):
+    tenant: str
+    loaded: bool
+    loads: int
+    vector_count: int | None = None
+    estimated_mb: float | None = None
+
+
+class TenantsRuntimeResponse(BaseModel):
+    budget_mb: float
+    resident_mb: float
+    default_tenant_mb: float
+    evictions: int
+    tenants: list[TenantStats]
+
+
 @router.get("/summary", response_model=MetricsSummaryResponse)
 def metrics_summary(settings: Settings = Depends(get_settings)) -> MetricsSummaryResponse:
     summary = build_metrics_summary(settings.sqlite_path)
@@ -61,3 +172,21 @@ def metrics_history(
 ) -> MetricsHistoryResponse:
     history = build_metrics_history(settings.sqlite_path, hours=hours, bucket_minutes=bucket_minutes)
     return MetricsHistoryResponse(**history)
+
+
+@router.get("/ollama", response_model=OllamaRuntimeResponse)
+def metrics_ollama(ollama: OllamaClient = Depends(get_ollama)) -> OllamaRuntimeResponse:
+    return OllamaRuntimeResponse(**ollama.runtime_stats())
+
+
+@router.get("/vector-store", response_model=VectorStoreRuntimeResponse)
+def metrics_vector_store(scope: TenantScope = Depends(get_tenant_scope)) -> VectorStoreRuntimeResponse:
+    return VectorStoreRuntimeResponse(tenant=scope.name, **scope.store.runtime_stats())
+
+
+@router.get("/tenants", response_model=TenantsRuntimeResponse)
+def metrics_tenants(
+    store: ChromaVectorStore = Depends(get_store),
+    tenants: TenantRegistry = Depends(get_tenant_registry),
+) -> TenantsRuntimeResponse:
+    return TenantsRuntimeResponse(**tenants.stats(store))
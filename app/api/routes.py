@@ -1,12 +1,15 @@
 import re
-import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
 from fastapi import APIRouter, BackgroundTasks, Depends, File, Header, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel, Field
 
 from app.core.config import Settings, get_settings
 from app.db.sqlite import (
-    clear_ingested_sources,
-    create_ingestion_job,
     get_app_setting,
     get_index_state,
     get_ingestion_job,
@@ -15,19 +18,24 @@ from app.db.sqlite import (
     list_query_runs,
     log_retrieval_event,
     log_query_run,
-    mark_index_reset,
     recent_query_history,
-    record_ingested_source,
     set_app_setting,
     upsert_query_run_feedback,
-    update_ingestion_job,
 )
-from app.dependencies import get_ollama, get_query_service, get_store
-from app.rag.ingest_service import fetch_link_text, validate_ingest_url
-from app.rag.ingestion import ingest_document_texts, source_to_doc_id, text_from_bytes
+from app.dependencies import TenantScope, get_ollama, get_tenant_query_service, get_tenant_scope
+from app.rag.ingest_service import validate_ingest_url
+from app.rag.models import RetrievalFilters
 from app.rag.ollama_client import OllamaClient
-from app.rag.vector_store import ChromaVectorStore
+from app.rag.resilience import CircuitOpenError
+from app.rag.snapshot import SnapshotError, read_manifest
+from app.rag.vector_store import ChromaVectorStore, build_where
+from app.services.embed_migration import check_embedding_compatibility
 from app.services.query_service import QueryService
+from app.services.readiness import readiness_status
+from app.services.reindex import reindex_running
+from app.services.replica import index_version
+from app.services.snapshots import snapshot_path
+from app.services.workers import run_write_op, submit_job
 
 router = APIRouter()
 
@@ -43,9 +51,33 @@ def require_write_access(
         raise HTTPException(status_code=401, detail="Missing or invalid X-API-Key.")
 
 
+def reject_on_replica(settings: Settings = Depends(get_settings)) -> None:
+    # A replica's index is replaced wholesale by each shipped snapshot; local writes would be lost.
+    if settings.REPLICA_ROLE == "replica":
+        raise HTTPException(status_code=409, detail="This node is a read replica; send writes to the publisher.")
+
+
+class QueryFilters(BaseModel):
+    doc_ids: list[str] = Field(default_factory=list, max_length=500)
+    source_prefix: str | None = Field(default=None, description="Leading path/URL segments, e.g. beir/scifact.")
+    source_type: str | None = Field(default=None, description="upload, link or local.")
+    ingested_after: datetime | None = None
+    ingested_before: datetime | None = None
+
+    def to_retrieval_filters(self) -> RetrievalFilters:
+        return RetrievalFilters(
+            doc_ids=list(self.doc_ids),
+            source_prefix=self.source_prefix,
+            source_type=self.source_type,
+            ingested_after=self.ingested_after.timestamp() if self.ingested_after else None,
+            ingested_before=self.ingested_before.timestamp() if self.ingested_before else None,
+        )
+
+
 class QueryRequest(BaseModel):
     question: str = Field(min_length=3, description="User question.")
     top_k: int | None = Field(default=None, ge=1, le=15)
+    filters: QueryFilters | None = None
 
 
 class Citation(BaseModel):
@@ -65,6 +97,8 @@ class QueryResponse(BaseModel):
     correctness_probability: float
     chat_model: str
     embed_model: str
+    index_version: str | None = None
+    tenant: str | None = None
 
 
 class IngestLinkRequest(BaseModel):
@@ -86,7 +120,7 @@ class IngestJobStatus(BaseModel):
     attempt_count: int
     max_attempts: int
     latency_ms: float | None = None
-    summary: dict[str, int] | None = None
+    summary: dict[str, Any] | None = None
     error: str | None = None
 
 
@@ -107,6 +141,21 @@ class ResetIngestionResponse(BaseModel):
     message: str
 
 
+class RetiredCollection(BaseModel):
+    name: str
+    retired_at: float
+
+
+class IndexCollectionsResponse(BaseModel):
+    active: str
+    embed_model: str | None = None
+    embed_dim: int | None = None
+    previous: str | None = None
+    retired: list[RetiredCollection]
+    collections: list[str]
+    reindex_running: bool
+
+
 class IngestedSourceItem(BaseModel):
     id: int
     ingested_utc: str
@@ -116,12 +165,21 @@ class IngestedSourceItem(BaseModel):
 
 
 class IngestedSourcesResponse(BaseModel):
+    tenant: str
     total_sources: int
     last_reset_utc: str | None = None
     reset_count: int
     items: list[IngestedSourceItem]
 
 
+class DeleteSourceResponse(BaseModel):
+    doc_id: str
+    sources_removed: int
+    chunks_deleted: int
+    chunks_updated: int
+    vector_count: int
+
+
 class QueryHistoryItem(BaseModel):
     ts_utc: str
     question: str
@@ -185,6 +243,12 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/ready")
+def ready(settings: Settings = Depends(get_settings)) -> JSONResponse:
+    status = readiness_status(settings)
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
 @router.get("/models", response_model=ModelsResponse)
 def models(
     settings: Settings = Depends(get_settings),
@@ -221,8 +285,19 @@ def select_model(
         available = ollama.list_models()
     except Exception:
         available = []
+    if available and requested not in available:
+        # The cached list may predate a recent `ollama pull`.
+        try:
+            available = ollama.list_models(force_refresh=True)
+        except Exception:
+            pass
     if available and requested not in available:
         raise HTTPException(status_code=400, detail=f"Model not found in local Ollama tags: {requested}")
+    # Load the model before switching traffic so no query pays the cold-load latency.
+    try:
+        ollama.preload(requested)
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Failed to load model {requested}: {exc}") from exc
     set_app_setting(settings.sqlite_path, key="active_chat_model", value=requested)
     return ModelsResponse(
         chat_model=requested,
@@ -238,16 +313,23 @@ def select_model(
 def query(
     payload: QueryRequest,
     request: Request,
-    query_service: QueryService = Depends(get_query_service),
+    query_service: QueryService = Depends(get_tenant_query_service),
 ) -> QueryResponse:
     k = payload.top_k or query_service.settings.TOP_K
     active_chat_model = get_app_setting(query_service.settings.sqlite_path, key="active_chat_model") or query_service.settings.OLLAMA_CHAT_MODEL
+    filters = payload.filters.to_retrieval_filters() if payload.filters else None
+    try:
+        build_where(filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    served_version = index_version(query_service.settings)
     try:
         result = query_service.run_query(
             question=payload.question,
             top_k=payload.top_k,
             request_id=getattr(request.state, "request_id", None),
             chat_model=active_chat_model,
+            filters=filters,
         )
     except Exception as exc:
         log_retrieval_event(
@@ -262,8 +344,10 @@ def query(
             citations=[],
             retrieved_doc_ids=[],
             error=str(exc),
+            tenant=query_service.settings.TENANT,
         )
-        raise HTTPException(status_code=500, detail=f"Query failed: {exc}") from exc
+        status_code = 503 if isinstance(exc, CircuitOpenError) else 500
+        raise HTTPException(status_code=status_code, detail=f"Query failed: {exc}") from exc
     token_usage = result.get("token_usage", {})
     request.state.prompt_tokens = token_usage.get("prompt_tokens")
     request.state.completion_tokens = token_usage.get("completion_tokens")
@@ -279,19 +363,20 @@ def query(
         top_k=k,
         correctness_probability=float(result.get("correctness_probability", 0.0)),
         chat_model=str(result.get("chat_model", query_service.settings.OLLAMA_CHAT_MODEL)),
+        tenant=query_service.settings.TENANT,
     )
-    return QueryResponse(**result)
+    return QueryResponse(**result, index_version=served_version, tenant=query_service.settings.TENANT)
 
 
 @router.get("/query/history", response_model=QueryHistoryResponse)
-def query_history(limit: int = 20, settings: Settings = Depends(get_settings)) -> QueryHistoryResponse:
-    items = recent_query_history(settings.sqlite_path, limit=limit)
+def query_history(limit: int = 20, scope: TenantScope = Depends(get_tenant_scope)) -> QueryHistoryResponse:
+    items = recent_query_history(scope.settings.sqlite_path, limit=limit, tenant=scope.name)
     return QueryHistoryResponse(items=[QueryHistoryItem(**item) for item in items])
 
 
 @router.get("/query/runs", response_model=QueryRunsResponse)
-def query_runs(limit: int = 50, settings: Settings = Depends(get_settings)) -> QueryRunsResponse:
-    items = list_query_runs(settings.sqlite_path, limit=limit)
+def query_runs(limit: int = 50, scope: TenantScope = Depends(get_tenant_scope)) -> QueryRunsResponse:
+    items = list_query_runs(scope.settings.sqlite_path, limit=limit, tenant=scope.name)
     return QueryRunsResponse(items=[QueryRunItem(**item) for item in items])
 
 
@@ -300,113 +385,30 @@ def query_run_feedback(
     run_id: int,
     payload: QueryRunFeedbackRequest,
     _: None = Depends(require_write_access),
-    settings: Settings = Depends(get_settings),
+    scope: TenantScope = Depends(get_tenant_scope),
 ) -> QueryRunFeedbackResponse:
     try:
         row = upsert_query_run_feedback(
-            settings.sqlite_path,
+            scope.settings.sqlite_path,
             query_run_id=run_id,
             is_correct=payload.is_correct,
             note=(payload.note or "").strip() or None,
+            tenant=scope.name,
         )
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     return QueryRunFeedbackResponse(**row)
 
 
-def _run_upload_ingest_job(
-    *,
-    job_id: int,
-    filename: str,
-    raw: bytes,
-    settings: Settings,
-    store: ChromaVectorStore,
-    ollama: OllamaClient,
-) -> None:
-    started = time.perf_counter()
-    update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=1)
-    try:
-        text = text_from_bytes(filename, raw)
-        doc_id = source_to_doc_id(filename)
-        summary = ingest_document_texts(settings, store, ollama, docs=[(doc_id, filename, text)])
-        latency_ms = (time.perf_counter() - started) * 1000
-        update_ingestion_job(
-            settings.sqlite_path,
-            job_id=job_id,
-            status="success",
-            attempt_count=1,
-            latency_ms=latency_ms,
-            summary=summary,
-        )
-        record_ingested_source(settings.sqlite_path, source_type="upload", source=filename, doc_id=doc_id)
-    except Exception as exc:
-        latency_ms = (time.perf_counter() - started) * 1000
-        update_ingestion_job(
-            settings.sqlite_path,
-            job_id=job_id,
-            status="error",
-            attempt_count=1,
-            latency_ms=latency_ms,
-            error=str(exc),
-        )
-
-
-def _run_link_ingest_job(
-    *,
-    job_id: int,
-    url: str,
-    settings: Settings,
-    store: ChromaVectorStore,
-    ollama: OllamaClient,
-) -> None:
-    started = time.perf_counter()
-    max_attempts = max(1, settings.INGEST_LINK_MAX_RETRIES + 1)
-    attempt = 0
-    last_error: str | None = None
-    while attempt < max_attempts:
-        attempt += 1
-        update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=attempt)
-        try:
-            _, text = fetch_link_text(url, settings)
-            doc_id = source_to_doc_id(url)
-            summary = ingest_document_texts(settings, store, ollama, docs=[(doc_id, url, text)])
-            latency_ms = (time.perf_counter() - started) * 1000
-            update_ingestion_job(
-                settings.sqlite_path,
-                job_id=job_id,
-                status="success",
-                attempt_count=attempt,
-                latency_ms=latency_ms,
-                summary=summary,
-            )
-            record_ingested_source(settings.sqlite_path, source_type="link", source=url, doc_id=doc_id)
-            return
-        except Exception as exc:
-            last_error = str(exc)
-            if attempt >= max_attempts:
-                break
-            backoff = settings.INGEST_LINK_BACKOFF_SECONDS * (2 ** (attempt - 1))
-            time.sleep(backoff)
-    latency_ms = (time.perf_counter() - started) * 1000
-    update_ingestion_job(
-        settings.sqlite_path,
-        job_id=job_id,
-        status="error",
-        attempt_count=attempt,
-        latency_ms=latency_ms,
-        error=last_error or "Unknown link ingestion error",
-    )
-
-
-@router.post("/ingest/upload", response_model=IngestJobAccepted, status_code=202)
+@router.post("/ingest/upload", response_model=IngestJobAccepted, status_code=202, dependencies=[Depends(reject_on_replica)])
 async def ingest_upload(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     _: None = Depends(require_write_access),
-    settings: Settings = Depends(get_settings),
-    store: ChromaVectorStore = Depends(get_store),
+    scope: TenantScope = Depends(get_tenant_scope),
     ollama: OllamaClient = Depends(get_ollama),
 ) -> IngestJobAccepted:
+    settings, store = scope.settings, scope.store
     raw = await file.read()
     if not raw:
         raise HTTPException(status_code=400, detail="Empty upload.")
@@ -415,89 +417,292 @@ async def ingest_upload(
     filename = file.filename or "upload.txt"
     if not re.search(r"\.(pdf|md|txt)$", filename.lower()):
         raise HTTPException(status_code=400, detail="Unsupported upload extension. Use .pdf, .md, or .txt.")
-    job_id = create_ingestion_job(settings.sqlite_path, source_type="upload", source=filename, max_attempts=1)
-    background_tasks.add_task(
-        _run_upload_ingest_job,
-        job_id=job_id,
-        filename=filename,
-        raw=raw,
-        settings=settings,
-        store=store,
-        ollama=ollama,
+    job_id = submit_job(
+        background_tasks,
+        settings,
+        store,
+        ollama,
+        kind="upload",
+        source=filename,
+        payload={"filename": filename, "raw": raw},
     )
     return IngestJobAccepted(job_id=job_id, status="queued")
 
 
-@router.post("/ingest/link", response_model=IngestJobAccepted, status_code=202)
+@router.post("/ingest/link", response_model=IngestJobAccepted, status_code=202, dependencies=[Depends(reject_on_replica)])
 def ingest_link(
     background_tasks: BackgroundTasks,
     payload: IngestLinkRequest,
     _: None = Depends(require_write_access),
-    settings: Settings = Depends(get_settings),
-    store: ChromaVectorStore = Depends(get_store),
+    scope: TenantScope = Depends(get_tenant_scope),
     ollama: OllamaClient = Depends(get_ollama),
 ) -> IngestJobAccepted:
+    settings, store = scope.settings, scope.store
     try:
         validate_ingest_url(payload.url, settings)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"Rejected link: {exc}") from exc
     max_attempts = max(1, settings.INGEST_LINK_MAX_RETRIES + 1)
-    job_id = create_ingestion_job(settings.sqlite_path, source_type="link", source=payload.url, max_attempts=max_attempts)
-    background_tasks.add_task(
-        _run_link_ingest_job,
-        job_id=job_id,
-        url=payload.url,
-        settings=settings,
-        store=store,
-        ollama=ollama,
+    job_id = submit_job(
+        background_tasks,
+        settings,
+        store,
+        ollama,
+        kind="link",
+        source=payload.url,
+        payload={"url": payload.url},
+        max_attempts=max_attempts,
     )
     return IngestJobAccepted(job_id=job_id, status="queued")
 
 
 @router.get("/ingest/jobs/{job_id}", response_model=IngestJobStatus)
-def ingestion_job_status(job_id: int, settings: Settings = Depends(get_settings)) -> IngestJobStatus:
-    row = get_ingestion_job(settings.sqlite_path, job_id=job_id)
+def ingestion_job_status(job_id: int, scope: TenantScope = Depends(get_tenant_scope)) -> IngestJobStatus:
+    row = get_ingestion_job(scope.settings.sqlite_path, job_id=job_id, tenant=scope.name)
     if row is None:
         raise HTTPException(status_code=404, detail="Ingestion job not found.")
     return IngestJobStatus(**row)
 
 
 @router.get("/ingest/jobs", response_model=IngestJobListResponse)
-def ingestion_job_list(limit: int = 20, settings: Settings = Depends(get_settings)) -> IngestJobListResponse:
+def ingestion_job_list(limit: int = 20, scope: TenantScope = Depends(get_tenant_scope)) -> IngestJobListResponse:
     safe_limit = max(1, min(limit, 100))
-    jobs = list_ingestion_jobs(settings.sqlite_path, limit=safe_limit)
+    jobs = list_ingestion_jobs(scope.settings.sqlite_path, limit=safe_limit, tenant=scope.name)
     return IngestJobListResponse(jobs=[IngestJobStatus(**job) for job in jobs])
 
 
-@router.post("/ingest/reset", response_model=ResetIngestionResponse)
+@router.post("/ingest/reset", response_model=ResetIngestionResponse, dependencies=[Depends(reject_on_replica)])
 def ingestion_reset(
     payload: ResetIngestionRequest,
     _: None = Depends(require_write_access),
-    settings: Settings = Depends(get_settings),
-    store: ChromaVectorStore = Depends(get_store),
+    scope: TenantScope = Depends(get_tenant_scope),
 ) -> ResetIngestionResponse:
+    settings, store = scope.settings, scope.store
     if not payload.confirm:
         raise HTTPException(status_code=400, detail="Reset requires confirm=true.")
-    count = store.reset_collection()
-    sources_cleared = clear_ingested_sources(settings.sqlite_path)
-    state = mark_index_reset(settings.sqlite_path)
-    return ResetIngestionResponse(
-        status="ok",
-        vector_count=count,
-        sources_cleared=sources_cleared,
-        last_reset_utc=state["last_reset_utc"],
-        reset_count=int(state["reset_count"]),
-        message="Vector index reset completed.",
+    if reindex_running(scope.name):
+        raise HTTPException(status_code=409, detail="Cannot reset while a reindex is running.")
+    result = _write_op(settings, store, kind="reset", source=store.collection_name, payload={})
+    return ResetIngestionResponse(status="ok", message="Vector index reset completed.", **result)
+
+
+@router.post("/ingest/reindex", response_model=IngestJobAccepted, status_code=202, dependencies=[Depends(reject_on_replica)])
+def ingestion_reindex(
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+    ollama: OllamaClient = Depends(get_ollama),
+) -> IngestJobAccepted:
+    settings, store = scope.settings, scope.store
+    if reindex_running(scope.name):
+        raise HTTPException(status_code=409, detail="A reindex is already running.")
+    job_id = submit_job(
+        background_tasks, settings, store, ollama, kind="reindex", source=store.collection_name, payload={}
     )
+    return IngestJobAccepted(job_id=job_id, status="queued")
+
+
+@router.post("/ingest/migrate-embeddings", response_model=IngestJobAccepted, status_code=202, dependencies=[Depends(reject_on_replica)])
+def ingestion_migrate_embeddings(
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+    ollama: OllamaClient = Depends(get_ollama),
+) -> IngestJobAccepted:
+    settings, store = scope.settings, scope.store
+    if reindex_running(scope.name):
+        raise HTTPException(status_code=409, detail="A reindex is already running.")
+    report = check_embedding_compatibility(settings, store)
+    if report["status"] in {"ok", "empty"}:
+        raise HTTPException(status_code=409, detail=f"Index already uses {settings.OLLAMA_EMBED_MODEL}.")
+    job_id = submit_job(
+        background_tasks, settings, store, ollama, kind="embed_migration", source=store.collection_name, payload={}
+    )
+    return IngestJobAccepted(job_id=job_id, status="queued")
+
+
+def _write_op(settings: Settings, store: ChromaVectorStore, *, kind: str, source: str, payload: dict[str, Any]) -> dict[str, Any]:
+    try:
+        return run_write_op(settings, store, kind=kind, source=source, payload=payload)
+    except TimeoutError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except (RuntimeError, ValueError) as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+async def _stage_upload(file: UploadFile, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as out:
+        while block := await file.read(1024 * 1024):
+            out.write(block)
+
+
+@router.post("/ingest/snapshot/export", response_model=IngestJobAccepted, status_code=202)
+def ingestion_snapshot_export(
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+    ollama: OllamaClient = Depends(get_ollama),
+) -> IngestJobAccepted:
+    # Runs as a job so it is fenced against rebuilds and writes; fetch the archive from
+    # GET /ingest/snapshot/export/{job_id} once the job succeeds.
+    settings, store = scope.settings, scope.store
+    if reindex_running(scope.name):
+        raise HTTPException(status_code=409, detail="A reindex is already running.")
+    path = snapshot_path(settings, "snapshot")
+    job_id = submit_job(
+        background_tasks,
+        settings,
+        store,
+        ollama,
+        kind="snapshot_export",
+        source=path.name,
+        payload={"path": str(path)},
+    )
+    return IngestJobAccepted(job_id=job_id, status="queued")
+
+
+@router.get("/ingest/snapshot/export/{job_id}")
+def ingestion_snapshot_download(
+    job_id: int,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+) -> FileResponse:
+    job = get_ingestion_job(scope.settings.sqlite_path, job_id=job_id, tenant=scope.name)
+    if job is None or job["source_type"] != "snapshot_export":
+        raise HTTPException(status_code=404, detail="Snapshot export job not found.")
+    if job["status"] != "success":
+        raise HTTPException(status_code=409, detail=job["error"] or f"Snapshot export is {job['status']}.")
+    summary = job["summary"] or {}
+    path = scope.settings.snapshot_dir / str(summary.get("file", ""))
+    if not path.is_file():
+        raise HTTPException(status_code=410, detail="Snapshot archive is no longer available.")
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=path.name,
+        headers={"X-Snapshot-Checksum": str(summary["checksum"]), "X-Snapshot-Count": str(summary["count"])},
+    )
+
+
+@router.post("/ingest/snapshot/import", response_model=IngestJobAccepted, status_code=202, dependencies=[Depends(reject_on_replica)])
+async def ingestion_snapshot_import(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    replace: bool = True,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+    ollama: OllamaClient = Depends(get_ollama),
+) -> IngestJobAccepted:
+    settings, store = scope.settings, scope.store
+    path = snapshot_path(settings, "upload")
+    await _stage_upload(file, path)
+    try:
+        read_manifest(path)
+    except SnapshotError as exc:
+        path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    job_id = submit_job(
+        background_tasks,
+        settings,
+        store,
+        ollama,
+        kind="snapshot_import",
+        source=file.filename or path.name,
+        payload={"path": str(path), "replace": replace},
+    )
+    return IngestJobAccepted(job_id=job_id, status="queued")
+
+
+@router.post("/ingest/bulk", response_model=IngestJobAccepted, status_code=202, dependencies=[Depends(reject_on_replica)])
+async def ingest_bulk_embeddings(
+    background_tasks: BackgroundTasks,
+    records: UploadFile = File(...),
+    vectors: UploadFile | None = File(None),
+    embed_model: str | None = None,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+    ollama: OllamaClient = Depends(get_ollama),
+) -> IngestJobAccepted:
+    settings, store = scope.settings, scope.store
+    if reindex_running(scope.name):
+        raise HTTPException(status_code=409, detail="A reindex is already running.")
+    stamp = uuid.uuid4().hex
+    records_path = settings.bulk_import_dir / f"{stamp}.jsonl"
+    await _stage_upload(records, records_path)
+    vectors_path: Path | None = None
+    if vectors is not None:
+        vectors_path = settings.bulk_import_dir / f"{stamp}.npy"
+        await _stage_upload(vectors, vectors_path)
+    job_id = submit_job(
+        background_tasks,
+        settings,
+        store,
+        ollama,
+        kind="bulk_import",
+        source=records.filename or stamp,
+        payload={
+            "records_path": str(records_path),
+            "vectors_path": str(vectors_path) if vectors_path else None,
+            "embed_model": embed_model,
+        },
+    )
+    return IngestJobAccepted(job_id=job_id, status="queued")
+
+
+@router.get("/ingest/collections", response_model=IndexCollectionsResponse)
+def ingestion_collections(scope: TenantScope = Depends(get_tenant_scope)) -> IndexCollectionsResponse:
+    return IndexCollectionsResponse(**scope.store.collection_state(), reindex_running=reindex_running(scope.name))
+
+
+@router.post("/ingest/reindex/rollback", response_model=IndexCollectionsResponse, dependencies=[Depends(reject_on_replica)])
+def ingestion_reindex_rollback(
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+) -> IndexCollectionsResponse:
+    settings, store = scope.settings, scope.store
+    if reindex_running(scope.name):
+        raise HTTPException(status_code=409, detail="Cannot roll back while a reindex is running.")
+    state = _write_op(settings, store, kind="rollback", source=store.collection_name, payload={})
+    return IndexCollectionsResponse(**state, reindex_running=False)
 
 
 @router.get("/ingest/sources", response_model=IngestedSourcesResponse)
-def ingestion_sources(limit: int = 100, settings: Settings = Depends(get_settings)) -> IngestedSourcesResponse:
-    items = list_ingested_sources(settings.sqlite_path, limit=limit)
-    state = get_index_state(settings.sqlite_path)
+def ingestion_sources(limit: int = 100, scope: TenantScope = Depends(get_tenant_scope)) -> IngestedSourcesResponse:
+    settings = scope.settings
+    items = list_ingested_sources(settings.sqlite_path, limit=limit, tenant=scope.name)
+    state = get_index_state(settings.sqlite_path, tenant=scope.name)
     return IngestedSourcesResponse(
+        tenant=scope.name,
         total_sources=len(items),
         last_reset_utc=state["last_reset_utc"],
         reset_count=int(state["reset_count"]),
         items=[IngestedSourceItem(**item) for item in items],
     )
+
+
+@router.delete("/ingest/sources/{doc_id}", response_model=DeleteSourceResponse, dependencies=[Depends(reject_on_replica)])
+def ingestion_delete_source(
+    doc_id: str,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+) -> DeleteSourceResponse:
+    settings, store = scope.settings, scope.store
+    result = _write_op(settings, store, kind="delete_source", source=doc_id, payload={"doc_id": doc_id})
+    if not result["sources_removed"] and not result["chunks_deleted"] and not result["chunks_updated"]:
+        raise HTTPException(status_code=404, detail=f"Unknown document: {doc_id}")
+    return DeleteSourceResponse(**result)
+
+
+@router.post("/ingest/gc", response_model=IngestJobAccepted, status_code=202, dependencies=[Depends(reject_on_replica)])
+def ingestion_gc(
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_write_access),
+    scope: TenantScope = Depends(get_tenant_scope),
+    ollama: OllamaClient = Depends(get_ollama),
+) -> IngestJobAccepted:
+    settings, store = scope.settings, scope.store
+    if reindex_running(scope.name):
+        raise HTTPException(status_code=409, detail="A reindex is already running.")
+    job_id = submit_job(background_tasks, settings, store, ollama, kind="orphan_gc", source=store.collection_name, payload={})
+    return IngestJobAccepted(job_id=job_id, status="queued")
@@ -12,34 +12,129 @@ class Settings(BaseSettings):
     HOST: str = "127.0.0.1"
     PORT: int = 8000
     CORS_ORIGINS: str = "http://127.0.0.1:5173,http://localhost:5173"
+    # single | multi (uvicorn --workers N: one elected writer, read-only query workers)
+    WORKER_MODE: str = "single"
+    WRITER_QUEUE_DIR: str = "data/queue"
+    WRITER_QUEUE_POLL_SECONDS: float = 0.5
+    WRITER_JOB_WAIT_SECONDS: float = 30.0
+    WRITER_JOB_LEASE_SECONDS: float = 900.0
+    INDEX_RELOAD_MIN_INTERVAL_SECONDS: float = 1.0
+    # none | publisher (ships index snapshots) | replica (serves the newest shipped snapshot)
+    REPLICA_ROLE: str = "none"
+    REPLICA_SHARED_DIR: str = "data/replica"
+    REPLICA_PUBLISH_INTERVAL_SECONDS: float = 300.0
+    REPLICA_POLL_SECONDS: float = 30.0
+    REPLICA_KEEP_VERSIONS: int = 3
+    REPLICA_GC_GRACE_SECONDS: float = 60.0
 
     OLLAMA_BASE_URL: str = "http://127.0.0.1:11434"
+    OLLAMA_BASE_URLS: str = ""
+    OLLAMA_EMBED_BASE_URLS: str = ""
+    OLLAMA_BACKEND_FAILURE_THRESHOLD: int = 3
+    OLLAMA_BACKEND_EJECT_SECONDS: float = 30.0
+    OLLAMA_AFFINITY_TTL_SECONDS: float = 300.0
+    OLLAMA_HEDGE_ENABLED: bool = False
+    OLLAMA_HEDGE_PERCENTILE: float = 0.95
+    OLLAMA_HEDGE_MIN_SAMPLES: int = 20
+    OLLAMA_HEDGE_WINDOW: int = 200
+    OLLAMA_LEGACY_EMBED_CONCURRENCY: int = 4
+    OLLAMA_MODEL_LIST_TTL_SECONDS: float = 30.0
     OLLAMA_CHAT_MODEL: str = "llama3.2:3b"
     OLLAMA_EMBED_MODEL: str = "nomic-embed-text"
     OLLAMA_TIMEOUT_SECONDS: int = 120
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_WARMUP_ON_STARTUP: bool = True
+    READINESS_CHECK_INTERVAL_SECONDS: float = 10.0
+    READINESS_WARMUP_QUERIES: int = 8
+    READINESS_WARMUP_MAX_ROUNDS: int = 5
+    READINESS_WARMUP_TOLERANCE: float = 1.5
+    OLLAMA_MAX_CONCURRENCY: int = 2
+    OLLAMA_INTERACTIVE_RESERVED_SLOTS: int = 1
+    OLLAMA_PRIORITY_WEIGHTS: str = "interactive:8,eval:3,bulk:1"
 
     CHROMA_DIR: str = "data/chroma"
     CHROMA_COLLECTION: str = "portfolio_docs"
+    VECTOR_STORE_SHARDS: int = 1
+    # HNSW graph degree and build beam width only apply to newly created collections; the query
+    # beam width (HNSW_SEARCH_EF) is also applied to the active collection when the store opens.
+    HNSW_M: int = 16
+    HNSW_CONSTRUCTION_EF: int = 100
+    HNSW_SEARCH_EF: int = 100
+    # local (embedded Chroma under CHROMA_DIR) | http (Chroma server at CHROMA_HTTP_URL)
+    VECTOR_STORE_BACKEND: str = "local"
+    CHROMA_HTTP_URL: str = "http://127.0.0.1:8001"
+    CHROMA_HTTP_HEADERS: str = ""
+    CHROMA_HTTP_UPSERT_BATCH_SIZE: int = 500
+    # Tenant of requests without an X-Tenant header; its index is the one at CHROMA_DIR.
+    TENANT: str = "default"
+    TENANT_NAMES: str = ""
+    TENANT_MEMORY_BUDGET_MB: float = 1024.0
+    TENANT_EVICT_IDLE_SECONDS: float = 30.0
+    DOCSTORE_CACHE_SIZE: int = 2048
+    DOCSTORE_MMAP_BYTES: int = 268435456
+    REINDEX_MAX_CHUNKS_PER_SECOND: float = 25.0
+    INGEST_GC_MIN_AGE_SECONDS: float = 300.0
+    REINDEX_GC_GRACE_SECONDS: float = 3600.0
+    EMBED_MODEL_MISMATCH_POLICY: str = "warn"
     SQLITE_PATH: str = "data/app.db"
     DOCS_DIR: str = "data/docs"
     BENCHMARK_PATH: str = "data/benchmarks/golden_eval.jsonl"
     REPORTS_DIR: str = "data/reports"
+    SNAPSHOT_DIR: str = "data/snapshots"
+    SNAPSHOT_SHARD_SIZE: int = 5000
+    BULK_IMPORT_DIR: str = "data/bulk"
+    BULK_IMPORT_BATCH_SIZE: int = 5000
 
     CHUNK_SIZE: int = 900
     CHUNK_OVERLAP: int = 150
+    EMBED_BATCH_TARGET_TOKENS: int = 2048
+    EMBED_BATCH_MAX_ITEMS: int = 64
+    EMBED_MAX_IN_FLIGHT: int = 4
+    EMBED_LATENCY_TARGET_MS: float = 2000.0
+    EMBED_MAX_RETRIES: int = 5
+    EMBED_BACKOFF_SECONDS: float = 1.0
     TOP_K: int = 5
+    RETRIEVAL_MMR_ENABLED: bool = False
+    RETRIEVAL_MMR_LAMBDA: float = 0.7
+    RETRIEVAL_MMR_FETCH_K: int = 20
+    RETRIEVAL_MAX_CHUNKS_PER_DOC: int = 0
+    RETRIEVAL_TWO_STAGE_ENABLED: bool = False
+    RETRIEVAL_TWO_STAGE_DOCS: int = 20
     INGEST_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
     INGEST_ALLOWED_HOSTS: str = ""
     INGEST_BLOCKED_HOSTS: str = "localhost,127.0.0.1,0.0.0.0"
     INGEST_ALLOW_PRIVATE_IPS: bool = False
     INGEST_LINK_MAX_RETRIES: int = 2
     INGEST_LINK_BACKOFF_SECONDS: float = 1.0
+    INGEST_NEAR_DUP_ENABLED: bool = False
+    INGEST_NEAR_DUP_THRESHOLD: float = 0.9
+    INGEST_MINHASH_PERMUTATIONS: int = 64
+    INGEST_MINHASH_SHINGLE_SIZE: int = 5
+    INGEST_LSH_BANDS: int = 16
     WRITE_API_KEY: str = ""
 
     @property
     def cors_origins(self) -> list[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
+    @property
+    def ollama_base_urls(self) -> list[str]:
+        urls = [url.strip() for url in self.OLLAMA_BASE_URLS.split(",") if url.strip()]
+        return urls or [self.OLLAMA_BASE_URL]
+
+    @property
+    def ollama_embed_base_urls(self) -> list[str]:
+        return [url.strip() for url in self.OLLAMA_EMBED_BASE_URLS.split(",") if url.strip()]
+
+    @property
+    def chroma_http_headers(self) -> dict[str, str]:
+        pairs = (item.split(":", 1) for item in self.CHROMA_HTTP_HEADERS.split(",") if ":" in item)
+        return {name.strip(): value.strip() for name, value in pairs if name.strip()}
+
+    @property
+    def tenant_names(self) -> list[str]:
+        return [name.strip() for name in self.TENANT_NAMES.split(",") if name.strip()]
+
     @property
     def sqlite_path(self) -> Path:
         return Path(self.SQLITE_PATH)
@@ -48,6 +143,22 @@ class Settings(BaseSettings):
     def chroma_dir(self) -> Path:
         return Path(self.CHROMA_DIR)
 
+    @property
+    def snapshot_dir(self) -> Path:
+        return Path(self.SNAPSHOT_DIR)
+
+    @property
+    def bulk_import_dir(self) -> Path:
+        return Path(self.BULK_IMPORT_DIR)
+
+    @property
+    def writer_queue_dir(self) -> Path:
+        return Path(self.WRITER_QUEUE_DIR)
+
+    @property
+    def replica_shared_dir(self) -> Path:
+        return Path(self.REPLICA_SHARED_DIR)
+
     @property
     def docs_dir(self) -> Path:
         return Path(self.DOCS_DIR)
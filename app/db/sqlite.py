@@ -1,19 +1,84 @@
 import json
 import sqlite3
+import threading
 from pathlib import Path
 from statistics import median
 from typing import Any
 
 
+# Index state, keyed by tenant: (table, schema, columns copied on upgrade).
+_TENANT_TABLES = [
+    (
+        "ingested_sources",
+        """
+        CREATE TABLE ingested_sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingested_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            tenant TEXT NOT NULL DEFAULT 'default',
+            source_type TEXT NOT NULL,
+            source TEXT NOT NULL,
+            doc_id TEXT NOT NULL,
+            UNIQUE(tenant, source, doc_id)
+        )
+        """,
+        "id, ingested_utc, source_type, source, doc_id",
+    ),
+    (
+        "document_signatures",
+        """
+        CREATE TABLE document_signatures (
+            tenant TEXT NOT NULL DEFAULT 'default',
+            doc_id TEXT NOT NULL,
+            signature_json TEXT NOT NULL,
+            updated_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            PRIMARY KEY (tenant, doc_id)
+        )
+        """,
+        "doc_id, signature_json, updated_utc",
+    ),
+    (
+        "document_lsh_bands",
+        """
+        CREATE TABLE document_lsh_bands (
+            tenant TEXT NOT NULL DEFAULT 'default',
+            band_key TEXT NOT NULL,
+            doc_id TEXT NOT NULL,
+            PRIMARY KEY (tenant, band_key, doc_id)
+        )
+        """,
+        "band_key, doc_id",
+    ),
+    (
+        "index_state",
+        """
+        CREATE TABLE index_state (
+            tenant TEXT NOT NULL DEFAULT 'default' PRIMARY KEY,
+            last_reset_utc TEXT,
+            reset_count INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "last_reset_utc, reset_count",
+    ),
+]
+
+_BUMP_CACHE_VERSION = (
+    "INSERT INTO cache_versions (name, version) VALUES ({name}, 1) "
+    "ON CONFLICT(name) DO UPDATE SET version = version + 1;"
+)
+
+
 def _get_conn(db_path: Path) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    # Generous busy timeout: in multi-worker mode several processes write logs and job state.
+    conn = sqlite3.connect(db_path, timeout=30)
     conn.row_factory = sqlite3.Row
     return conn
 
 
 def init_db(db_path: Path) -> None:
     with _get_conn(db_path) as conn:
+        # WAL lets query workers read while the writer process commits.
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.executescript(
             """
             CREATE TABLE IF NOT EXISTS request_logs (
@@ -35,6 +100,7 @@ def init_db(db_path: Path) -> None:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 ts_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
                 request_id TEXT,
+                tenant TEXT NOT NULL DEFAULT 'default',
                 source TEXT NOT NULL,
                 query_text TEXT NOT NULL,
                 top_k INTEGER NOT NULL,
@@ -65,6 +131,7 @@ def init_db(db_path: Path) -> None:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 ts_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
                 updated_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                tenant TEXT NOT NULL DEFAULT 'default',
                 source_type TEXT NOT NULL,
                 source TEXT NOT NULL,
                 status TEXT NOT NULL,
@@ -75,19 +142,11 @@ def init_db(db_path: Path) -> None:
                 error TEXT
             );
 
-            CREATE TABLE IF NOT EXISTS ingested_sources (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ingested_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
-                source_type TEXT NOT NULL,
-                source TEXT NOT NULL,
-                doc_id TEXT NOT NULL,
-                UNIQUE(source, doc_id)
-            );
-
-            CREATE TABLE IF NOT EXISTS index_state (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                last_reset_utc TEXT,
-                reset_count INTEGER NOT NULL DEFAULT 0
+            CREATE TABLE IF NOT EXISTS writer_queue (
+                job_id INTEGER PRIMARY KEY,
+                payload_json TEXT NOT NULL,
+                claimed_by TEXT,
+                lease_expires_utc TEXT
             );
 
             CREATE TABLE IF NOT EXISTS app_settings (
@@ -96,10 +155,18 @@ def init_db(db_path: Path) -> None:
                 updated_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
             );
 
+            -- Bumped by triggers on cached tables, so in-process caches can revalidate with one
+            -- primary-key read instead of reloading the table.
+            CREATE TABLE IF NOT EXISTS cache_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+
             CREATE TABLE IF NOT EXISTS query_runs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 ts_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
                 request_id TEXT,
+                tenant TEXT NOT NULL DEFAULT 'default',
                 question TEXT NOT NULL,
                 answer TEXT NOT NULL,
                 citations_json TEXT NOT NULL,
@@ -110,6 +177,15 @@ def init_db(db_path: Path) -> None:
                 chat_model TEXT
             );
 
+            CREATE TABLE IF NOT EXISTS document_centroids (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                updated_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                PRIMARY KEY (collection, doc_id)
+            );
+
             CREATE TABLE IF NOT EXISTS query_run_feedback (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 ts_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
@@ -120,12 +196,36 @@ def init_db(db_path: Path) -> None:
             );
             """
         )
-        conn.execute(
-            """
-            INSERT OR IGNORE INTO index_state (id, last_reset_utc, reset_count)
-            VALUES (1, NULL, 0)
-            """
-        )
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS app_settings_version_{event.lower()}
+                AFTER {event} ON app_settings
+                BEGIN
+                    {_BUMP_CACHE_VERSION.format(name="'app_settings'")}
+                END
+                """
+            )
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS document_centroids_version_{event.lower()}
+                AFTER {event} ON document_centroids
+                BEGIN
+                    {_BUMP_CACHE_VERSION.format(name=f"'centroids:' || {row}.collection")}
+                END
+                """
+            )
+        for table, schema, columns in _TENANT_TABLES:
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+            if not existing:
+                conn.execute(schema)
+            elif "tenant" not in existing:
+                # The tenant joins each table's unique key, which SQLite can only change by
+                # rebuilding the table; rows from before tenants belong to the default tenant.
+                conn.execute(f"ALTER TABLE {table} RENAME TO {table}_pre_tenant")
+                conn.execute(schema)
+                conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_pre_tenant")
+                conn.execute(f"DROP TABLE {table}_pre_tenant")
         ingestion_cols = {row["name"] for row in conn.execute("PRAGMA table_info(ingestion_jobs)").fetchall()}
         if "attempt_count" not in ingestion_cols:
             conn.execute("ALTER TABLE ingestion_jobs ADD COLUMN attempt_count INTEGER NOT NULL DEFAULT 0")
@@ -133,6 +233,14 @@ def init_db(db_path: Path) -> None:
             conn.execute("ALTER TABLE ingestion_jobs ADD COLUMN max_attempts INTEGER NOT NULL DEFAULT 1")
         if "latency_ms" not in ingestion_cols:
             conn.execute("ALTER TABLE ingestion_jobs ADD COLUMN latency_ms REAL")
+        if "tenant" not in ingestion_cols:
+            conn.execute("ALTER TABLE ingestion_jobs ADD COLUMN tenant TEXT NOT NULL DEFAULT 'default'")
+
+        queue_cols = {row["name"] for row in conn.execute("PRAGMA table_info(writer_queue)").fetchall()}
+        if "claimed_by" not in queue_cols:
+            conn.execute("ALTER TABLE writer_queue ADD COLUMN claimed_by TEXT")
+        if "lease_expires_utc" not in queue_cols:
+            conn.execute("ALTER TABLE writer_queue ADD COLUMN lease_expires_utc TEXT")
 
         request_cols = {row["name"] for row in conn.execute("PRAGMA table_info(request_logs)").fetchall()}
         if "request_id" not in request_cols:
@@ -155,6 +263,8 @@ def init_db(db_path: Path) -> None:
         retrieval_cols = {row["name"] for row in conn.execute("PRAGMA table_info(retrieval_events)").fetchall()}
         if "error" not in retrieval_cols:
             conn.execute("ALTER TABLE retrieval_events ADD COLUMN error TEXT")
+        if "tenant" not in retrieval_cols:
+            conn.execute("ALTER TABLE retrieval_events ADD COLUMN tenant TEXT NOT NULL DEFAULT 'default'")
 
         query_run_cols = {row["name"] for row in conn.execute("PRAGMA table_info(query_runs)").fetchall()}
         if "top_k" not in query_run_cols:
@@ -163,6 +273,8 @@ def init_db(db_path: Path) -> None:
             conn.execute("ALTER TABLE query_runs ADD COLUMN correctness_probability REAL")
         if "chat_model" not in query_run_cols:
             conn.execute("ALTER TABLE query_runs ADD COLUMN chat_model TEXT")
+        if "tenant" not in query_run_cols:
+            conn.execute("ALTER TABLE query_runs ADD COLUMN tenant TEXT NOT NULL DEFAULT 'default'")
 
 
 def log_request(
@@ -221,17 +333,19 @@ def log_retrieval_event(
     citations: list[dict[str, Any]],
     retrieved_doc_ids: list[str],
     error: str | None = None,
+    tenant: str = "default",
 ) -> None:
     with _get_conn(db_path) as conn:
         conn.execute(
             """
             INSERT INTO retrieval_events (
-                request_id, source, query_text, top_k, hit, recall_at_k, recall_at_5,
+                request_id, tenant, source, query_text, top_k, hit, recall_at_k, recall_at_5,
                 citations_json, retrieved_doc_ids_json, error
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 request_id,
+                tenant,
                 source,
                 query_text,
                 top_k,
@@ -353,14 +467,16 @@ def latest_eval_metrics(db_path: Path) -> dict[str, Any]:
     return metrics
 
 
-def create_ingestion_job(db_path: Path, *, source_type: str, source: str, max_attempts: int = 1) -> int:
+def create_ingestion_job(
+    db_path: Path, *, source_type: str, source: str, max_attempts: int = 1, tenant: str = "default"
+) -> int:
     with _get_conn(db_path) as conn:
         cursor = conn.execute(
             """
-            INSERT INTO ingestion_jobs (source_type, source, status, max_attempts)
-            VALUES (?, ?, 'queued', ?)
+            INSERT INTO ingestion_jobs (tenant, source_type, source, status, max_attempts)
+            VALUES (?, ?, ?, 'queued', ?)
             """,
-            (source_type, source, max(1, max_attempts)),
+            (tenant, source_type, source, max(1, max_attempts)),
         )
         return int(cursor.lastrowid)
 
@@ -391,9 +507,91 @@ def update_ingestion_job(
         )
 
 
-def get_ingestion_job(db_path: Path, *, job_id: int) -> dict[str, Any] | None:
+def enqueue_writer_job(
+    db_path: Path,
+    *,
+    source_type: str,
+    source: str,
+    payload: dict[str, Any],
+    max_attempts: int = 1,
+    tenant: str = "default",
+) -> int:
     with _get_conn(db_path) as conn:
-        row = conn.execute("SELECT * FROM ingestion_jobs WHERE id = ?", (job_id,)).fetchone()
+        cursor = conn.execute(
+            """
+            INSERT INTO ingestion_jobs (tenant, source_type, source, status, max_attempts)
+            VALUES (?, ?, ?, 'queued', ?)
+            """,
+            (tenant, source_type, source, max(1, max_attempts)),
+        )
+        job_id = int(cursor.lastrowid)
+        conn.execute("INSERT INTO writer_queue (job_id, payload_json) VALUES (?, ?)", (job_id, json.dumps(payload)))
+        return job_id
+
+
+def claim_writer_job(db_path: Path, *, owner: str, lease_seconds: float) -> tuple[int, str, dict[str, Any]] | None:
+    # Oldest unclaimed (or lease-expired) job first; marking it claimed under an immediate
+    # transaction makes the claim atomic even if two processes poll at once. The row stays until
+    # finish_writer_job, so a job whose writer dies mid-run is run again rather than lost.
+    with _get_conn(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            """
+            SELECT q.job_id, q.payload_json, j.source_type
+            FROM writer_queue q JOIN ingestion_jobs j ON j.id = q.job_id
+            WHERE q.claimed_by IS NULL OR q.lease_expires_utc < strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            ORDER BY q.job_id
+            LIMIT 1
+            """
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            """
+            UPDATE writer_queue
+            SET claimed_by = ?, lease_expires_utc = strftime('%Y-%m-%dT%H:%M:%fZ', 'now', ?)
+            WHERE job_id = ?
+            """,
+            (owner, f"+{float(lease_seconds)} seconds", row["job_id"]),
+        )
+    return int(row["job_id"]), str(row["source_type"]), dict(json.loads(row["payload_json"]))
+
+
+def finish_writer_job(db_path: Path, *, job_id: int) -> None:
+    with _get_conn(db_path) as conn:
+        conn.execute("DELETE FROM writer_queue WHERE job_id = ?", (job_id,))
+
+
+def requeue_writer_jobs(db_path: Path, *, owner: str) -> list[int]:
+    # Called by a newly elected writer: claims held by another owner belong to a writer that is
+    # gone (the writer lock is exclusive), and expired leases are stale either way.
+    with _get_conn(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            """
+            SELECT job_id FROM writer_queue
+            WHERE claimed_by IS NOT NULL
+              AND (claimed_by != ? OR lease_expires_utc < strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            """,
+            (owner,),
+        ).fetchall()
+        job_ids = [int(row["job_id"]) for row in rows]
+        for job_id in job_ids:
+            conn.execute("UPDATE writer_queue SET claimed_by = NULL, lease_expires_utc = NULL WHERE job_id = ?", (job_id,))
+            conn.execute(
+                """
+                UPDATE ingestion_jobs
+                SET status = 'queued', updated_utc = (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+                WHERE id = ? AND status = 'running'
+                """,
+                (job_id,),
+            )
+    return job_ids
+
+
+def get_ingestion_job(db_path: Path, *, job_id: int, tenant: str = "default") -> dict[str, Any] | None:
+    with _get_conn(db_path) as conn:
+        row = conn.execute("SELECT * FROM ingestion_jobs WHERE id = ? AND tenant = ?", (job_id, tenant)).fetchone()
     if row is None:
         return None
     summary = json.loads(str(row["summary_json"])) if row["summary_json"] else None
@@ -412,9 +610,11 @@ def get_ingestion_job(db_path: Path, *, job_id: int) -> dict[str, Any] | None:
     }
 
 
-def list_ingestion_jobs(db_path: Path, *, limit: int = 20) -> list[dict[str, Any]]:
+def list_ingestion_jobs(db_path: Path, *, limit: int = 20, tenant: str = "default") -> list[dict[str, Any]]:
     with _get_conn(db_path) as conn:
-        rows = conn.execute("SELECT * FROM ingestion_jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        rows = conn.execute(
+            "SELECT * FROM ingestion_jobs WHERE tenant = ? ORDER BY id DESC LIMIT ?", (tenant, limit)
+        ).fetchall()
     jobs: list[dict[str, Any]] = []
     for row in rows:
         summary = json.loads(str(row["summary_json"])) if row["summary_json"] else None
@@ -556,18 +756,18 @@ def eval_metrics_history(db_path: Path, *, limit: int = 30) -> list[dict[str, An
     return points
 
 
-def recent_query_history(db_path: Path, *, limit: int = 20) -> list[dict[str, Any]]:
+def recent_query_history(db_path: Path, *, limit: int = 20, tenant: str = "default") -> list[dict[str, Any]]:
     safe_limit = max(1, min(limit, 200))
     with _get_conn(db_path) as conn:
         rows = conn.execute(
             """
             SELECT ts_utc, query_text, top_k, hit, error
             FROM retrieval_events
-            WHERE source = 'live_query'
+            WHERE source = 'live_query' AND tenant = ?
             ORDER BY id DESC
             LIMIT ?
             """,
-            (safe_limit,),
+            (tenant, safe_limit),
         ).fetchall()
     return [
         {
@@ -581,28 +781,44 @@ def recent_query_history(db_path: Path, *, limit: int = 20) -> list[dict[str, An
     ]
 
 
-def record_ingested_source(db_path: Path, *, source_type: str, source: str, doc_id: str) -> None:
+def record_ingested_source(
+    db_path: Path, *, source_type: str, source: str, doc_id: str, tenant: str = "default"
+) -> None:
     with _get_conn(db_path) as conn:
         conn.execute(
             """
-            INSERT OR IGNORE INTO ingested_sources (source_type, source, doc_id)
-            VALUES (?, ?, ?)
+            INSERT OR IGNORE INTO ingested_sources (tenant, source_type, source, doc_id)
+            VALUES (?, ?, ?, ?)
             """,
-            (source_type, source, doc_id),
+            (tenant, source_type, source, doc_id),
         )
 
 
-def list_ingested_sources(db_path: Path, *, limit: int = 200) -> list[dict[str, Any]]:
+def record_ingested_sources(
+    db_path: Path, *, source_type: str, sources: dict[str, str], tenant: str = "default"
+) -> None:
+    with _get_conn(db_path) as conn:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO ingested_sources (tenant, source_type, source, doc_id)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(tenant, source_type, source, doc_id) for doc_id, source in sources.items()],
+        )
+
+
+def list_ingested_sources(db_path: Path, *, limit: int = 200, tenant: str = "default") -> list[dict[str, Any]]:
     safe_limit = max(1, min(limit, 1000))
     with _get_conn(db_path) as conn:
         rows = conn.execute(
             """
             SELECT id, ingested_utc, source_type, source, doc_id
             FROM ingested_sources
+            WHERE tenant = ?
             ORDER BY id DESC
             LIMIT ?
             """,
-            (safe_limit,),
+            (tenant, safe_limit),
         ).fetchall()
     return [
         {
@@ -616,53 +832,227 @@ def list_ingested_sources(db_path: Path, *, limit: int = 200) -> list[dict[str,
     ]
 
 
-def clear_ingested_sources(db_path: Path) -> int:
+def ingested_source_map(db_path: Path, *, tenant: str = "default") -> dict[str, tuple[str, str]]:
     with _get_conn(db_path) as conn:
-        count_row = conn.execute("SELECT COUNT(*) AS c FROM ingested_sources").fetchone()
+        rows = conn.execute(
+            "SELECT doc_id, source_type, source FROM ingested_sources WHERE tenant = ? ORDER BY id", (tenant,)
+        ).fetchall()
+    return {str(row["doc_id"]): (str(row["source_type"]), str(row["source"])) for row in rows}
+
+
+def list_tenants(db_path: Path) -> list[str]:
+    with _get_conn(db_path) as conn:
+        rows = conn.execute("SELECT DISTINCT tenant FROM ingested_sources ORDER BY tenant").fetchall()
+    return [str(row["tenant"]) for row in rows]
+
+
+def clear_ingested_sources(db_path: Path, *, tenant: str = "default") -> int:
+    with _get_conn(db_path) as conn:
+        count_row = conn.execute("SELECT COUNT(*) AS c FROM ingested_sources WHERE tenant = ?", (tenant,)).fetchone()
         cleared = int(count_row["c"]) if count_row is not None else 0
-        conn.execute("DELETE FROM ingested_sources")
+        conn.execute("DELETE FROM ingested_sources WHERE tenant = ?", (tenant,))
+        conn.execute("DELETE FROM document_signatures WHERE tenant = ?", (tenant,))
+        conn.execute("DELETE FROM document_lsh_bands WHERE tenant = ?", (tenant,))
     return cleared
 
 
-def mark_index_reset(db_path: Path) -> dict[str, Any]:
+def delete_ingested_source(db_path: Path, *, doc_id: str, tenant: str = "default") -> int:
+    with _get_conn(db_path) as conn:
+        removed = conn.execute(
+            "DELETE FROM ingested_sources WHERE tenant = ? AND doc_id = ?", (tenant, doc_id)
+        ).rowcount
+        conn.execute("DELETE FROM document_signatures WHERE tenant = ? AND doc_id = ?", (tenant, doc_id))
+        conn.execute("DELETE FROM document_lsh_bands WHERE tenant = ? AND doc_id = ?", (tenant, doc_id))
+    return int(removed)
+
+
+def record_document_signature(
+    db_path: Path, *, doc_id: str, signature: list[int], band_keys: list[str], tenant: str = "default"
+) -> None:
     with _get_conn(db_path) as conn:
         conn.execute(
             """
-            UPDATE index_state
-            SET last_reset_utc = (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
-                reset_count = reset_count + 1
-            WHERE id = 1
+            INSERT INTO document_signatures (tenant, doc_id, signature_json)
+            VALUES (?, ?, ?)
+            ON CONFLICT(tenant, doc_id) DO UPDATE SET
+                signature_json = excluded.signature_json,
+                updated_utc = (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            """,
+            (tenant, doc_id, json.dumps(signature)),
+        )
+        conn.execute("DELETE FROM document_lsh_bands WHERE tenant = ? AND doc_id = ?", (tenant, doc_id))
+        conn.executemany(
+            "INSERT OR IGNORE INTO document_lsh_bands (tenant, band_key, doc_id) VALUES (?, ?, ?)",
+            [(tenant, key, doc_id) for key in band_keys],
+        )
+
+
+def find_lsh_candidates(db_path: Path, *, band_keys: list[str], tenant: str = "default") -> dict[str, list[int]]:
+    if not band_keys:
+        return {}
+    placeholders = ",".join("?" for _ in band_keys)
+    with _get_conn(db_path) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT DISTINCT s.doc_id, s.signature_json
+            FROM document_lsh_bands b
+            JOIN document_signatures s ON s.tenant = b.tenant AND s.doc_id = b.doc_id
+            WHERE b.tenant = ? AND b.band_key IN ({placeholders})
+            """,
+            [tenant, *band_keys],
+        ).fetchall()
+    return {str(row["doc_id"]): json.loads(str(row["signature_json"])) for row in rows}
+
+
+def replace_document_centroids(
+    db_path: Path, *, collection: str, rows: list[tuple[str, bytes, int]], clear: bool = False
+) -> None:
+    with _get_conn(db_path) as conn:
+        if clear:
+            conn.execute("DELETE FROM document_centroids WHERE collection = ?", (collection,))
+        conn.executemany(
+            """
+            INSERT INTO document_centroids (collection, doc_id, vector, chunk_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(collection, doc_id) DO UPDATE SET
+                vector = excluded.vector,
+                chunk_count = excluded.chunk_count,
+                updated_utc = (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            """,
+            [(collection, doc_id, vector, chunk_count) for doc_id, vector, chunk_count in rows],
+        )
+
+
+def delete_document_centroids(db_path: Path, *, collection: str, doc_ids: list[str]) -> None:
+    with _get_conn(db_path) as conn:
+        conn.executemany(
+            "DELETE FROM document_centroids WHERE collection = ? AND doc_id = ?",
+            [(collection, doc_id) for doc_id in doc_ids],
+        )
+
+
+def document_centroid_version(db_path: Path, *, collection: str) -> tuple[int, str | None]:
+    with _get_conn(db_path) as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) AS c, MAX(updated_utc) AS latest FROM document_centroids WHERE collection = ?",
+            (collection,),
+        ).fetchone()
+    return int(row["c"]), row["latest"]
+
+
+def load_document_centroids(db_path: Path, *, collection: str) -> list[tuple[str, bytes]]:
+    with _get_conn(db_path) as conn:
+        rows = conn.execute(
+            "SELECT doc_id, vector FROM document_centroids WHERE collection = ? ORDER BY doc_id", (collection,)
+        ).fetchall()
+    return [(str(row["doc_id"]), bytes(row["vector"])) for row in rows]
+
+
+def mark_index_reset(db_path: Path, *, tenant: str = "default") -> dict[str, Any]:
+    with _get_conn(db_path) as conn:
+        conn.execute(
             """
+            INSERT INTO index_state (tenant, last_reset_utc, reset_count)
+            VALUES (?, (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')), 1)
+            ON CONFLICT(tenant) DO UPDATE SET
+                last_reset_utc = excluded.last_reset_utc,
+                reset_count = reset_count + 1
+            """,
+            (tenant,),
         )
-        row = conn.execute("SELECT last_reset_utc, reset_count FROM index_state WHERE id = 1").fetchone()
+        row = conn.execute("SELECT last_reset_utc, reset_count FROM index_state WHERE tenant = ?", (tenant,)).fetchone()
     return {
         "last_reset_utc": str(row["last_reset_utc"]) if row and row["last_reset_utc"] else None,
         "reset_count": int(row["reset_count"]) if row else 0,
     }
 
 
-def get_index_state(db_path: Path) -> dict[str, Any]:
+def get_index_state(db_path: Path, *, tenant: str = "default") -> dict[str, Any]:
     with _get_conn(db_path) as conn:
-        row = conn.execute("SELECT last_reset_utc, reset_count FROM index_state WHERE id = 1").fetchone()
+        row = conn.execute("SELECT last_reset_utc, reset_count FROM index_state WHERE tenant = ?", (tenant,)).fetchone()
     return {
         "last_reset_utc": str(row["last_reset_utc"]) if row and row["last_reset_utc"] else None,
         "reset_count": int(row["reset_count"]) if row else 0,
     }
 
 
+class _CacheVersions:
+    # One long-lived connection per database for reading cache_versions rows. PRAGMA
+    # data_version would be cheaper still, but it changes on every commit by another connection,
+    # request and query logs included, so it invalidates caches on almost every request.
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn: sqlite3.Connection | None = None
+
+    def _read(self, name: str) -> Any:
+        if self.conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self.conn.execute("SELECT version FROM cache_versions WHERE name = ?", (name,)).fetchone()
+
+    def get(self, name: str) -> int:
+        with self.lock:
+            try:
+                row = self._read(name)
+            except sqlite3.OperationalError as exc:
+                if "no such table" not in str(exc).lower():
+                    raise
+                init_db(self.db_path)
+                row = self._read(name)
+        return int(row[0]) if row else 0
+
+
+class _AppSettingsCache:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.version: int | None = None
+        self.values: dict[str, str | None] | None = None
+
+    def _load(self) -> dict[str, str | None]:
+        with _get_conn(self.db_path) as conn:
+            rows = conn.execute("SELECT key, value FROM app_settings").fetchall()
+        return {str(row["key"]): None if row["value"] is None else str(row["value"]) for row in rows}
+
+    def get(self, key: str) -> str | None:
+        version = cache_version(self.db_path, "app_settings")
+        with self.lock:
+            if self.values is None or version != self.version:
+                self.values = self._load()
+                self.version = version
+            return self.values.get(key)
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.values = None
+
+
+_version_readers: dict[str, _CacheVersions] = {}
+_settings_caches: dict[str, _AppSettingsCache] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_version(db_path: Path, name: str) -> int:
+    cache_key = str(Path(db_path).resolve())
+    with _caches_lock:
+        reader = _version_readers.get(cache_key)
+        if reader is None:
+            reader = _version_readers[cache_key] = _CacheVersions(Path(db_path))
+    return reader.get(name)
+
+
+def _app_settings_cache(db_path: Path) -> _AppSettingsCache:
+    cache_key = str(Path(db_path).resolve())
+    with _caches_lock:
+        cache = _settings_caches.get(cache_key)
+        if cache is None:
+            cache = _settings_caches[cache_key] = _AppSettingsCache(Path(db_path))
+        return cache
+
+
 def get_app_setting(db_path: Path, *, key: str) -> str | None:
-    try:
-        with _get_conn(db_path) as conn:
-            row = conn.execute("SELECT value FROM app_settings WHERE key = ?", (key,)).fetchone()
-    except sqlite3.OperationalError as exc:
-        if "no such table" not in str(exc).lower():
-            raise
-        init_db(db_path)
-        with _get_conn(db_path) as conn:
-            row = conn.execute("SELECT value FROM app_settings WHERE key = ?", (key,)).fetchone()
-    if row is None or row["value"] is None:
-        return None
-    return str(row["value"])
+    return _app_settings_cache(db_path).get(key)
 
 
 def set_app_setting(db_path: Path, *, key: str, value: str) -> None:
@@ -682,6 +1072,7 @@ def set_app_setting(db_path: Path, *, key: str, value: str) -> None:
         init_db(db_path)
         with _get_conn(db_path) as conn:
             conn.execute(sql, (key, value))
+    _app_settings_cache(db_path).invalidate()
 
 
 def log_query_run(
@@ -696,17 +1087,19 @@ def log_query_run(
     top_k: int | None = None,
     correctness_probability: float | None = None,
     chat_model: str | None = None,
+    tenant: str = "default",
 ) -> None:
     with _get_conn(db_path) as conn:
         conn.execute(
             """
             INSERT INTO query_runs (
-                request_id, question, answer, citations_json, retrieved_doc_ids_json, latency_ms, top_k,
+                request_id, tenant, question, answer, citations_json, retrieved_doc_ids_json, latency_ms, top_k,
                 correctness_probability, chat_model
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 request_id,
+                tenant,
                 question,
                 answer,
                 json.dumps(citations),
@@ -719,7 +1112,7 @@ def log_query_run(
         )
 
 
-def list_query_runs(db_path: Path, *, limit: int = 50) -> list[dict[str, Any]]:
+def list_query_runs(db_path: Path, *, limit: int = 50, tenant: str = "default") -> list[dict[str, Any]]:
     safe_limit = max(1, min(limit, 500))
     with _get_conn(db_path) as conn:
         rows = conn.execute(
@@ -741,10 +1134,11 @@ def list_query_runs(db_path: Path, *, limit: int = 50) -> list[dict[str, Any]]:
                 qf.ts_utc AS feedback_ts_utc
             FROM query_runs qr
             LEFT JOIN query_run_feedback qf ON qf.query_run_id = qr.id
+            WHERE qr.tenant = ?
             ORDER BY qr.id DESC
             LIMIT ?
             """,
-            (safe_limit,),
+            (tenant, safe_limit),
         ).fetchall()
     result: list[dict[str, Any]] = []
     for row in rows:
@@ -790,9 +1184,12 @@ def upsert_query_run_feedback(
     query_run_id: int,
     is_correct: bool,
     note: str | None = None,
+    tenant: str = "default",
 ) -> dict[str, Any]:
     with _get_conn(db_path) as conn:
-        exists = conn.execute("SELECT 1 FROM query_runs WHERE id = ?", (query_run_id,)).fetchone()
+        exists = conn.execute(
+            "SELECT 1 FROM query_runs WHERE id = ? AND tenant = ?", (query_run_id, tenant)
+        ).fetchone()
         if exists is None:
             raise ValueError("Query run not found.")
         conn.execute(
@@ -1,16 +1,25 @@
+from dataclasses import dataclass
 from functools import lru_cache
+from typing import Iterator
+
+from fastapi import Depends, Header, HTTPException
 
 from app.core.config import Settings, get_settings
 from app.rag.ollama_client import OllamaClient
 from app.rag.pipeline import RAGPipeline
+from app.rag.sharded_store import open_vector_store
+from app.rag.tenants import TenantError, TenantRegistry, validate_tenant
 from app.rag.vector_store import ChromaVectorStore
 from app.services.query_service import QueryService
+from app.services.workers import worker_role
 
 
 @lru_cache
 def get_store() -> ChromaVectorStore:
     settings = get_settings()
-    return ChromaVectorStore(settings)
+    # Query workers in multi-worker mode never write; they reload when the writer bumps the
+    # index generation.
+    return open_vector_store(settings, read_only=worker_role() == "reader")
 
 
 @lru_cache
@@ -29,3 +38,53 @@ def get_pipeline() -> RAGPipeline:
 def get_query_service() -> QueryService:
     settings: Settings = get_settings()
     return QueryService(settings=settings, pipeline=get_pipeline())
+
+
+@lru_cache
+def get_tenant_registry() -> TenantRegistry:
+    return TenantRegistry(get_settings(), read_only=worker_role() == "reader")
+
+
+@dataclass
+class TenantScope:
+    name: str
+    settings: Settings
+    store: ChromaVectorStore
+    default: bool
+
+
+def get_tenant_scope(
+    x_tenant: str | None = Header(default=None, alias="X-Tenant"),
+    x_api_key: str | None = Header(default=None, alias="X-API-Key"),
+    settings: Settings = Depends(get_settings),
+    store: ChromaVectorStore = Depends(get_store),
+    tenants: TenantRegistry = Depends(get_tenant_registry),
+) -> Iterator[TenantScope]:
+    # Requests without X-Tenant (or naming the default tenant) use the process-wide store. A
+    # tenant store is leased for the request so the registry cannot evict it mid-request.
+    try:
+        name = validate_tenant(settings, x_tenant) if x_tenant else settings.TENANT
+    except TenantError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if name == settings.TENANT:
+        yield TenantScope(name=name, settings=settings, store=store, default=True)
+        return
+    if not settings.tenant_names and not tenants.known(name):
+        # Without an allow-list any name is valid, so only a holder of the write key may create
+        # a new tenant index; otherwise arbitrary headers would each open one on disk.
+        configured_key = settings.WRITE_API_KEY.strip()
+        if not configured_key or (x_api_key or "").strip() != configured_key:
+            raise HTTPException(status_code=404, detail=f"Unknown tenant: {name}")
+    with tenants.lease(name) as tenant_store:
+        yield TenantScope(name=name, settings=tenant_store.settings, store=tenant_store, default=False)
+
+
+def get_tenant_query_service(
+    scope: TenantScope = Depends(get_tenant_scope),
+    query_service: QueryService = Depends(get_query_service),
+    ollama: OllamaClient = Depends(get_ollama),
+) -> QueryService:
+    if scope.default:
+        return query_service
+    pipeline = RAGPipeline(settings=scope.settings, store=scope.store, ollama=ollama)
+    return QueryService(settings=scope.settings, pipeline=pipeline)
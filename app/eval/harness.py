@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from app.core.config import Settings
 from app.db.sqlite import log_eval_run, log_retrieval_event
 from app.rag.pipeline import RAGPipeline
+from app.rag.scheduler import PRIORITY_EVAL, priority_scope
 
 
 @dataclass
@@ -61,7 +62,8 @@ def run_eval(settings: Settings, pipeline: RAGPipeline) -> dict[str, object]:
     detailed: list[dict[str, object]] = []
 
     for case in cases:
-        result = pipeline.answer(case.question, top_k=settings.TOP_K)
+        with priority_scope(PRIORITY_EVAL):
+            result = pipeline.answer(case.question, top_k=settings.TOP_K)
         processed += 1
         retrieved_ids = set(result["retrieved_doc_ids"])
         expected_ids = set(case.expected_doc_ids)
@@ -1,3 +1,4 @@
+import threading
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -7,8 +8,15 @@ from app.api.metrics import router as metrics_router
 from app.api.routes import router
 from app.core.config import get_settings
 from app.core.logging import configure_logging
-from app.db.sqlite import init_db
+from app.db.sqlite import create_ingestion_job, init_db
+from app.dependencies import get_ollama, get_store, get_tenant_registry
 from app.middleware.request_logging import RequestLoggingMiddleware
+from app.services.embed_migration import enforce_embedding_policy, run_embed_migration
+from app.services.readiness import run_readiness_monitor
+from app.services.reindex import reindex_running
+from app.services.replica import run_replica_loop
+from app.services.warmup import run_startup_warmup
+from app.services.workers import elect_writer, run_writer_loop
 
 configure_logging()
 settings = get_settings()
@@ -16,7 +24,52 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db(settings.sqlite_path)
+    # Must run before get_store(): readers open the index read-only.
+    role = elect_writer(settings)
+    store = get_store()
+    report = enforce_embedding_policy(settings, store)
+    migrate = report["status"] == "mismatch" and settings.EMBED_MODEL_MISMATCH_POLICY == "migrate"
+    if migrate and role != "reader" and not reindex_running(settings.TENANT):
+        job_id = create_ingestion_job(settings.sqlite_path, source_type="embed_migration", source=store.collection_name)
+        threading.Thread(
+            target=run_embed_migration,
+            args=(settings, store, get_ollama()),
+            kwargs={"job_id": job_id},
+            name="embed-migration",
+            daemon=True,
+        ).start()
+    if settings.OLLAMA_WARMUP_ON_STARTUP:
+        # Loading models can take many seconds on CPU; do it off the event loop.
+        threading.Thread(
+            target=run_startup_warmup,
+            args=(settings, get_ollama()),
+            name="ollama-warmup",
+            daemon=True,
+        ).start()
+    # Warms the index and then keeps /ready's dependency checks fresh.
+    stop_background = threading.Event()
+    threading.Thread(
+        target=run_readiness_monitor,
+        args=(settings, store, get_ollama(), stop_background),
+        name="readiness-monitor",
+        daemon=True,
+    ).start()
+    if role == "writer":
+        threading.Thread(
+            target=run_writer_loop,
+            args=(settings, store, get_ollama(), stop_background, get_tenant_registry()),
+            name="writer-queue",
+            daemon=True,
+        ).start()
+    if settings.REPLICA_ROLE in {"publisher", "replica"} and role != "reader":
+        threading.Thread(
+            target=run_replica_loop,
+            args=(settings, store, stop_background),
+            name=f"replica-{settings.REPLICA_ROLE}",
+            daemon=True,
+        ).start()
     yield
+    stop_background.set()
 
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
@@ -27,6 +80,6 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=False,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
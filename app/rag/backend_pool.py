@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from app.rag.resilience import BREAKER_CLOSED, CircuitBreaker, CircuitOpenError
+
+EMBED_API_CURRENT = "embed"
+EMBED_API_LEGACY = "embeddings"
+
+
+@dataclass
+class OllamaBackend:
+    url: str
+    breaker: CircuitBreaker
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    embed_api: str | None = None
+    model_last_used: dict[str, float] = field(default_factory=dict)
+
+    def has_model(self, model: str, now: float, ttl_seconds: float) -> bool:
+        last_used = self.model_last_used.get(model)
+        return last_used is not None and (now - last_used) <= ttl_seconds
+
+
+class BackendPool:
+    def __init__(
+        self,
+        name: str,
+        urls: list[str],
+        *,
+        failure_threshold: int = 3,
+        eject_seconds: float = 30.0,
+        affinity_ttl_seconds: float = 300.0,
+    ) -> None:
+        if not urls:
+            raise ValueError(f"Backend pool '{name}' needs at least one URL.")
+        self.name = name
+        self.backends = [
+            OllamaBackend(
+                url=url.rstrip("/"),
+                breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=eject_seconds),
+            )
+            for url in urls
+        ]
+        self.affinity_ttl_seconds = max(0.0, affinity_ttl_seconds)
+        self._lock = threading.Lock()
+        self._rr = 0
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def _choose(self, model: str | None, exclude: set[str]) -> OllamaBackend:
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.url not in exclude] or list(self.backends)
+        healthy = [b for b in candidates if b.breaker.available(now)]
+        if not healthy:
+            retry_in = min(b.breaker.retry_in_seconds(now) for b in candidates)
+            raise CircuitOpenError(
+                f"All Ollama backends in pool '{self.name}' are failing; retry in {retry_in:.1f}s."
+            )
+        if model:
+            warm = [b for b in healthy if b.has_model(model, now, self.affinity_ttl_seconds)]
+            if warm:
+                healthy = warm
+        least = min(b.in_flight for b in healthy)
+        tied = [b for b in healthy if b.in_flight == least]
+        self._rr += 1
+        backend = tied[self._rr % len(tied)]
+        backend.breaker.on_dispatch(now)
+        return backend
+
+    @contextmanager
+    def lease(self, model: str | None = None, *, exclude: set[str] | None = None) -> Iterator[OllamaBackend]:
+        with self._lock:
+            backend = self._choose(model, exclude or set())
+            backend.in_flight += 1
+            backend.requests += 1
+        try:
+            yield backend
+        finally:
+            with self._lock:
+                backend.in_flight -= 1
+
+    def record_success(self, backend: OllamaBackend, model: str | None = None) -> None:
+        with self._lock:
+            backend.breaker.record_success()
+            if model:
+                backend.model_last_used[model] = time.monotonic()
+
+    def record_failure(self, backend: OllamaBackend) -> None:
+        with self._lock:
+            backend.failures += 1
+            backend.breaker.record_failure(time.monotonic())
+            if backend.breaker.state != BREAKER_CLOSED:
+                backend.model_last_used.clear()
+
+    def record_cancelled(self, backend: OllamaBackend) -> None:
+        with self._lock:
+            backend.breaker.release_probe()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "name": self.name,
+                "backends": [
+                    {
+                        "url": b.url,
+                        "in_flight": b.in_flight,
+                        "requests": b.requests,
+                        "failures": b.failures,
+                        "consecutive_failures": b.breaker.consecutive_failures,
+                        "healthy": b.breaker.available(now),
+                        "ejected_for_seconds": b.breaker.retry_in_seconds(now),
+                        "breaker_state": b.breaker.state,
+                        "breaker_open_count": b.breaker.open_count,
+                        "embed_api": b.embed_api,
+                        "loaded_models": sorted(
+                            m for m in b.model_last_used if b.has_model(m, now, self.affinity_ttl_seconds)
+                        ),
+                    }
+                    for b in self.backends
+                ],
+            }
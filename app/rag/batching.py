@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable
+
+import httpx
+
+from app.core.config import Settings
+from app.rag.models import Chunk
+from app.rag.ollama_client import OllamaClient
+from app.rag.resilience import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for English text and BPE embedders.
+    return max(1, len(text) // 4)
+
+
+class AdaptiveBatchController:
+    # Additive increase / multiplicative decrease on both the in-flight window and the
+    # per-batch token budget: grow while embed latency stays under target, halve the window on
+    # slow batches and both on timeouts and transient errors. State carries across calls, so a
+    # job that embeds page by page should pass the same controller for every page.
+    def __init__(
+        self,
+        *,
+        target_tokens: int = 2048,
+        min_tokens: int = 128,
+        max_items: int = 64,
+        max_in_flight: int = 4,
+        latency_target_ms: float = 2000.0,
+    ) -> None:
+        self.max_tokens = max(1, target_tokens)
+        self.min_tokens = max(1, min(min_tokens, self.max_tokens))
+        self.token_budget = self.max_tokens
+        self.max_items = max(1, max_items)
+        self.max_in_flight = max(1, max_in_flight)
+        self.in_flight_limit = 1
+        self.latency_target_ms = max(1.0, latency_target_ms)
+
+    def next_batch(self, pending: deque[Chunk]) -> list[Chunk]:
+        batch: list[Chunk] = []
+        tokens = 0
+        while pending and len(batch) < self.max_items:
+            cost = estimate_tokens(pending[0].text)
+            if batch and tokens + cost > self.token_budget:
+                break
+            batch.append(pending.popleft())
+            tokens += cost
+        return batch
+
+    def on_success(self, latency_ms: float) -> None:
+        if latency_ms <= self.latency_target_ms:
+            self.in_flight_limit = min(self.max_in_flight, self.in_flight_limit + 1)
+            self.token_budget = min(self.max_tokens, self.token_budget + self.min_tokens)
+        else:
+            self.in_flight_limit = max(1, self.in_flight_limit // 2)
+
+    def on_failure(self) -> None:
+        self.in_flight_limit = max(1, self.in_flight_limit // 2)
+        self.token_budget = max(self.min_tokens, self.token_budget // 2)
+
+
+def is_transient_embed_error(exc: BaseException) -> bool:
+    # Timeouts, connection errors, every backend ejected, and 429/5xx answers are worth a
+    # smaller retry; anything else (bad request, unknown model) fails the job.
+    if isinstance(exc, (httpx.TransportError, CircuitOpenError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def controller_from_settings(settings: Settings) -> AdaptiveBatchController:
+    return AdaptiveBatchController(
+        target_tokens=settings.EMBED_BATCH_TARGET_TOKENS,
+        max_items=settings.EMBED_BATCH_MAX_ITEMS,
+        max_in_flight=settings.EMBED_MAX_IN_FLIGHT,
+        latency_target_ms=settings.EMBED_LATENCY_TARGET_MS,
+    )
+
+
+def embed_chunks_adaptively(
+    ollama: OllamaClient,
+    chunks: list[Chunk],
+    controller: AdaptiveBatchController,
+    on_batch: Callable[[list[Chunk], list[list[float]]], None],
+    *,
+    max_retries: int = 5,
+    backoff_seconds: float = 1.0,
+    max_chunks_per_second: float = 0.0,
+    model: str | None = None,
+    executor: ThreadPoolExecutor | None = None,
+) -> dict[str, Any]:
+    # Pass `executor` (with at least controller.max_in_flight workers) to reuse one across calls.
+    embed = ollama.embed if model is None else partial(ollama.embed, model=model)
+    pending: deque[Chunk] = deque(chunks)
+    futures: dict[Future[list[list[float]]], tuple[list[Chunk], float]] = {}
+    retries: dict[str, int] = {}
+    batch_sizes: list[int] = []
+    timeouts = 0
+    errors = 0
+    peak_in_flight = 0
+    started = time.perf_counter()
+    owned = executor is None
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=controller.max_in_flight, thread_name_prefix="embed-batch")
+    try:
+        while pending or futures:
+            while pending and len(futures) < controller.in_flight_limit:
+                batch = controller.next_batch(pending)
+                # Workers inherit the caller's priority scope.
+                ctx = contextvars.copy_context()
+                future = executor.submit(ctx.run, embed, [chunk.text for chunk in batch])
+                futures[future] = (batch, time.perf_counter())
+            peak_in_flight = max(peak_in_flight, len(futures))
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, submitted = futures.pop(future)
+                try:
+                    vectors = future.result()
+                except Exception as exc:
+                    if not is_transient_embed_error(exc):
+                        raise
+                    if isinstance(exc, httpx.TimeoutException):
+                        timeouts += 1
+                    else:
+                        errors += 1
+                    key = batch[0].chunk_id
+                    retries[key] = retries.get(key, 0) + 1
+                    if retries[key] > max_retries:
+                        raise
+                    controller.on_failure()
+                    logger.warning(
+                        "Embed batch failed, backing off",
+                        extra={
+                            "batch_size": len(batch),
+                            "token_budget": controller.token_budget,
+                            "error": type(exc).__name__,
+                        },
+                    )
+                    pending.extendleft(reversed(batch))
+                    time.sleep(backoff_seconds * retries[key])
+                    continue
+                controller.on_success((time.perf_counter() - submitted) * 1000)
+                batch_sizes.append(len(batch))
+                on_batch(batch, vectors)
+                if max_chunks_per_second > 0:
+                    ahead = sum(batch_sizes) / max_chunks_per_second - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+    finally:
+        if owned:
+            executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            for future in futures:
+                future.cancel()
+    elapsed = time.perf_counter() - started
+    embedded = sum(batch_sizes)
+    return {
+        "embed_batches": len(batch_sizes),
+        "batch_size_min": min(batch_sizes) if batch_sizes else 0,
+        "batch_size_max": max(batch_sizes) if batch_sizes else 0,
+        "batch_size_avg": round(embedded / len(batch_sizes), 2) if batch_sizes else 0.0,
+        "batch_sizes": batch_sizes[:200],
+        "embed_timeouts": timeouts,
+        "embed_errors": errors,
+        "peak_in_flight": peak_in_flight,
+        "final_token_budget": controller.token_budget,
+        "chunks_per_sec": round(embedded / elapsed, 2) if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from app.core.config import Settings
+from app.db.sqlite import ingested_source_map
+from app.rag.dedup import content_hash, ref_key
+from app.rag.ingestion import dedupe_chunks
+from app.rag.models import Chunk, RetrievalFilters
+from app.rag.vector_store import ChromaVectorStore, build_where, doc_refs, source_prefix_metadata
+
+BULK_SOURCE_TYPE = "bulk"
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+def _iter_json_lines(path: Path) -> Iterator[tuple[int, dict[str, Any]]]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise BulkImportError(f"{path.name}:{line_no}: invalid JSON ({exc.msg})") from exc
+            if not isinstance(record, dict):
+                raise BulkImportError(f"{path.name}:{line_no}: expected a JSON object")
+            yield line_no, record
+
+
+def iter_ndjson_records(path: Path) -> Iterator[tuple[int, dict[str, Any]]]:
+    # One object per line: {"doc_id", "text", "vector", optional "source", "chunk_index", "chunk_id"}.
+    for line_no, record in _iter_json_lines(path):
+        if "vector" not in record:
+            raise BulkImportError(f"{path.name}:{line_no}: missing 'vector'")
+        yield line_no, record
+
+
+def iter_npy_records(vectors_path: Path, records_path: Path) -> Iterator[tuple[int, dict[str, Any]]]:
+    # Row i of the (n, dim) array belongs to the i-th JSONL record. The array is memory-mapped
+    # so only the current batch is paged in.
+    try:
+        vectors = np.load(vectors_path, mmap_mode="r", allow_pickle=False)
+    except ValueError as exc:
+        raise BulkImportError(f"{vectors_path.name}: not a .npy array ({exc})") from exc
+    if vectors.ndim != 2:
+        raise BulkImportError(f"{vectors_path.name}: expected a 2-D array, got shape {vectors.shape}")
+    row = 0
+    for line_no, record in _iter_json_lines(records_path):
+        if row >= vectors.shape[0]:
+            raise BulkImportError(f"{records_path.name} has more records than {vectors_path.name} has rows")
+        record["vector"] = vectors[row]
+        row += 1
+        yield line_no, record
+    if row != vectors.shape[0]:
+        raise BulkImportError(f"{vectors_path.name} has {vectors.shape[0]} rows but {records_path.name} has {row} records")
+
+
+def _release_documents(settings: Settings, store: ChromaVectorStore, doc_ids: set[str]) -> dict[str, int]:
+    # Importing a document replaces it: its old refs go through the delete path, which removes
+    # chunks nobody else references and hands shared ones to another referrer, so the new
+    # records never overwrite a chunk another document points at.
+    removals: dict[str, set[str]] = {}
+    ordered = sorted(doc_ids)
+    for i in range(0, len(ordered), 100):
+        batch = set(ordered[i : i + 100])
+        for page in store.iter_chunks(where=build_where(RetrievalFilters(doc_ids=sorted(batch)))):
+            for chunk in page:
+                gone = batch & doc_refs(chunk.metadata).keys()
+                if gone:
+                    removals.setdefault(chunk.chunk_id, set()).update(gone)
+    if not removals:
+        return {"chunks_deleted": 0, "chunks_updated": 0}
+    return store.remove_doc_refs(removals, sources=ingested_source_map(settings.sqlite_path, tenant=settings.TENANT))
+
+
+def bulk_upsert(
+    settings: Settings,
+    store: ChromaVectorStore,
+    records: Iterable[tuple[int, dict[str, Any]]],
+    *,
+    embed_model: str | None = None,
+    source_type: str = BULK_SOURCE_TYPE,
+) -> tuple[dict[str, Any], dict[str, str]]:
+    # Writes pre-computed vectors straight to Chroma without model calls. Each document's
+    # previous chunks are released the first time it appears, then records go through the same
+    # content-hash dedup as ingestion: text already stored gets a ref instead of a new vector.
+    collection_meta = store.collection_metadata()
+    populated = store.count() > 0
+    recorded_model = collection_meta.get("embed_model") if populated else None
+    model = embed_model or recorded_model or settings.OLLAMA_EMBED_MODEL
+    if recorded_model and model != recorded_model:
+        raise BulkImportError(f"Vectors from {model} cannot be mixed into a collection embedded with {recorded_model}.")
+    dim = int(collection_meta["embed_dim"]) if populated and collection_meta.get("embed_dim") else None
+    batch_size = max(1, settings.BULK_IMPORT_BATCH_SIZE)
+    ingested_at = time.time()
+    next_index: dict[str, int] = {}
+    sources: dict[str, str] = {}
+    chunks: list[Chunk] = []
+    vectors: list[np.ndarray] = []
+    new_docs: set[str] = set()
+    counts = {"chunks": 0, "chunks_written": 0, "chunks_deduplicated": 0, "chunks_deleted": 0, "chunks_updated": 0}
+    started = time.perf_counter()
+
+    def flush() -> None:
+        if not chunks:
+            return
+        if counts["chunks"] == 0 and not recorded_model:
+            store.record_embedding_signature(model, int(dim or 0))
+        if new_docs:
+            released = _release_documents(settings, store, new_docs)
+            counts["chunks_deleted"] += released["chunks_deleted"]
+            counts["chunks_updated"] += released["chunks_updated"]
+            new_docs.clear()
+        by_hash: dict[str, np.ndarray] = {}
+        for chunk, vector in zip(chunks, vectors):
+            by_hash.setdefault(chunk.metadata["content_hash"], vector)
+        to_write, store_refs, _ = dedupe_chunks(store, chunks, keep_unchanged=False)
+        if to_write:
+            store.upsert_raw(
+                [chunk.chunk_id for chunk in to_write],
+                [chunk.text for chunk in to_write],
+                [chunk.metadata for chunk in to_write],
+                np.stack([by_hash[chunk.metadata["content_hash"]] for chunk in to_write]),
+            )
+        store.add_doc_refs(store_refs)
+        counts["chunks"] += len(chunks)
+        counts["chunks_written"] += len(to_write)
+        counts["chunks_deduplicated"] += len(chunks) - len(to_write)
+        chunks.clear()
+        vectors.clear()
+
+    for line_no, record in records:
+        doc_id = str(record.get("doc_id") or "").strip()
+        text = record.get("text")
+        if not doc_id or not isinstance(text, str) or not text:
+            raise BulkImportError(f"line {line_no}: 'doc_id' and 'text' are required")
+        vector = np.asarray(record["vector"], dtype=np.float32)
+        if vector.ndim != 1 or not np.isfinite(vector).all():
+            raise BulkImportError(f"line {line_no}: 'vector' must be a flat list of finite numbers")
+        if dim is None:
+            dim = int(vector.shape[0])
+        elif vector.shape[0] != dim:
+            raise BulkImportError(f"line {line_no}: vector has dimension {vector.shape[0]}, expected {dim}")
+        index = int(record.get("chunk_index", next_index.get(doc_id, 0)))
+        next_index[doc_id] = index + 1
+        source = str(record.get("source") or sources.get(doc_id) or doc_id)
+        if doc_id not in sources:
+            new_docs.add(doc_id)
+        sources.setdefault(doc_id, source)
+        chunks.append(
+            Chunk(
+                chunk_id=str(record.get("chunk_id") or f"{doc_id}::chunk::{index}"),
+                text=text,
+                metadata={
+                    "doc_id": doc_id,
+                    "source": source,
+                    "chunk_index": index,
+                    "content_hash": content_hash(text),
+                    ref_key(doc_id): index,
+                    "ref_count": 1,
+                    "source_type": source_type,
+                    "ingested_at": ingested_at,
+                    **source_prefix_metadata(source),
+                },
+            )
+        )
+        vectors.append(vector)
+        if len(chunks) >= batch_size:
+            flush()
+    flush()
+    elapsed = time.perf_counter() - started
+    summary = {
+        "chunks": counts["chunks"],
+        "chunks_written": counts["chunks_written"],
+        "chunks_deduplicated": counts["chunks_deduplicated"],
+        "stale_chunks_deleted": counts["chunks_deleted"],
+        "stale_chunks_released": counts["chunks_updated"],
+        "docs": len(sources),
+        "vector_count": store.count(),
+        "embed_model": model,
+        "embed_dim": dim,
+        "chunks_per_sec": round(counts["chunks"] / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    return summary, sources
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import dataclasses
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+from app.core.config import Settings
+from app.db.sqlite import cache_version, delete_document_centroids, load_document_centroids, replace_document_centroids
+from app.rag.models import RetrievalFilters
+from app.rag.vector_store import ChromaVectorStore, build_where, doc_refs
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _accumulate(pages: Iterable[list[Any]], wanted: set[str] | None) -> dict[str, tuple[np.ndarray, int]]:
+    # Mean of unit-normalized chunk vectors per document; a deduplicated chunk counts towards
+    # every document that references it.
+    sums: dict[str, np.ndarray] = {}
+    counts: dict[str, int] = {}
+    for page in pages:
+        for chunk in page:
+            if chunk.embedding is None:
+                continue
+            vector = _normalize(np.asarray(chunk.embedding, dtype=np.float32))
+            for doc_id in doc_refs(chunk.metadata):
+                if wanted is not None and doc_id not in wanted:
+                    continue
+                if doc_id in sums:
+                    sums[doc_id] += vector
+                else:
+                    sums[doc_id] = vector.copy()
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+    return {doc_id: (_normalize(total), counts[doc_id]) for doc_id, total in sums.items()}
+
+
+def refresh_doc_centroids(settings: Settings, store: ChromaVectorStore, doc_ids: Sequence[str] | None = None) -> int:
+    # doc_ids=None rebuilds the collection's whole centroid table.
+    collection = store.collection_name
+    if doc_ids is None:
+        centroids = _accumulate(store.iter_chunks(batch_size=2000, include_embeddings=True), None)
+    else:
+        wanted = list(dict.fromkeys(doc_ids))
+        centroids = {}
+        for i in range(0, len(wanted), 100):
+            batch = wanted[i : i + 100]
+            where = build_where(RetrievalFilters(doc_ids=batch))
+            centroids.update(_accumulate(store.iter_chunks(where=where, include_embeddings=True), set(batch)))
+        missing = [doc_id for doc_id in wanted if doc_id not in centroids]
+        if missing:
+            delete_document_centroids(settings.sqlite_path, collection=collection, doc_ids=missing)
+    rows = [(doc_id, vector.astype(np.float32).tobytes(), count) for doc_id, (vector, count) in centroids.items()]
+    replace_document_centroids(settings.sqlite_path, collection=collection, rows=rows, clear=doc_ids is None)
+    return len(rows)
+
+
+class CentroidIndex:
+    # In-memory (docs x dim) matrix per collection. Writes to a collection's centroid rows bump
+    # its cache_versions row, so a query only reads that row before reusing the matrix.
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._loaded: dict[str, tuple[int, list[str], np.ndarray]] = {}
+
+    def _matrix(self, collection: str) -> tuple[list[str], np.ndarray]:
+        version = cache_version(self.db_path, f"centroids:{collection}")
+        with self._lock:
+            cached = self._loaded.get(collection)
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2]
+        rows = load_document_centroids(self.db_path, collection=collection)
+        doc_ids = [doc_id for doc_id, _ in rows]
+        matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows]) if rows else np.zeros((0, 0))
+        with self._lock:
+            self._loaded[collection] = (version, doc_ids, matrix)
+        return doc_ids, matrix
+
+    def top_documents(self, collection: str, query_vector: Sequence[float], m: int) -> list[str]:
+        doc_ids, matrix = self._matrix(collection)
+        if not doc_ids or m <= 0:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        if matrix.shape[1] != query.shape[0]:
+            return []
+        scores = matrix @ query
+        if len(doc_ids) > m:
+            top = np.argpartition(-scores, m - 1)[:m]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        return [doc_ids[i] for i in top]
+
+
+_indexes: dict[str, CentroidIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def centroid_index(db_path: Path) -> CentroidIndex:
+    key = str(Path(db_path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = CentroidIndex(Path(db_path))
+        return index
+
+
+def narrow_to_documents(
+    settings: Settings,
+    store: ChromaVectorStore,
+    query_vector: Sequence[float],
+    filters: RetrievalFilters | None,
+) -> RetrievalFilters | None:
+    # Coarse stage: restrict the chunk search to the top RETRIEVAL_TWO_STAGE_DOCS documents by
+    # centroid similarity. Explicit doc_id filters win, and an empty index means direct search.
+    if filters is not None and filters.doc_ids:
+        return filters
+    top_docs = centroid_index(settings.sqlite_path).top_documents(
+        store.collection_name, query_vector, settings.RETRIEVAL_TWO_STAGE_DOCS
+    )
+    if not top_docs:
+        return filters
+    return dataclasses.replace(filters or RetrievalFilters(), doc_ids=top_docs)
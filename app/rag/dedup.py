@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import re
+
+import numpy as np
+
+from app.core.config import Settings
+from app.db.sqlite import find_lsh_candidates, record_document_signature
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+
+def ref_key(doc_id: str) -> str:
+    return f"ref:{doc_id}"
+
+
+def content_hash(text: str) -> str:
+    normalized = " ".join(text.split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i : i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    )
+
+
+def _permutations(num_perm: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signature(text: str, *, num_perm: int = 64, shingle_size: int = 5) -> list[int]:
+    hashes = _shingle_hashes(text, shingle_size)
+    a, b = _permutations(num_perm)
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hashes, a) + b) % _MERSENNE_PRIME & _MAX_HASH
+    return [int(value) for value in permuted.min(axis=0)]
+
+
+def lsh_band_keys(signature: list[int], bands: int) -> list[str]:
+    rows = max(1, len(signature) // max(1, bands))
+    keys: list[str] = []
+    for band in range(len(signature) // rows):
+        chunk = ",".join(str(value) for value in signature[band * rows : (band + 1) * rows])
+        keys.append(f"{band}:{hashlib.blake2b(chunk.encode('ascii'), digest_size=8).hexdigest()}")
+    return keys
+
+
+def estimate_jaccard(left: list[int], right: list[int]) -> float:
+    if not left or len(left) != len(right):
+        return 0.0
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+def filter_near_duplicates(
+    settings: Settings, docs: list[tuple[str, str, str]]
+) -> tuple[list[tuple[str, str, str]], list[dict[str, object]]]:
+    # Banded LSH over MinHash signatures; candidates sharing a band are confirmed with the
+    # estimated Jaccard similarity before a document is skipped.
+    kept: list[tuple[str, str, str]] = []
+    skipped: list[dict[str, object]] = []
+    for doc_id, source, text in docs:
+        signature = minhash_signature(
+            text,
+            num_perm=settings.INGEST_MINHASH_PERMUTATIONS,
+            shingle_size=settings.INGEST_MINHASH_SHINGLE_SIZE,
+        )
+        band_keys = lsh_band_keys(signature, settings.INGEST_LSH_BANDS)
+        best_doc, best_score = None, 0.0
+        candidates = find_lsh_candidates(settings.sqlite_path, band_keys=band_keys, tenant=settings.TENANT)
+        for candidate_id, candidate_signature in candidates.items():
+            if candidate_id == doc_id:
+                continue
+            score = estimate_jaccard(signature, candidate_signature)
+            if score > best_score:
+                best_doc, best_score = candidate_id, score
+        if best_doc is not None and best_score >= settings.INGEST_NEAR_DUP_THRESHOLD:
+            skipped.append({"doc_id": doc_id, "source": source, "duplicate_of": best_doc, "similarity": round(best_score, 3)})
+            continue
+        record_document_signature(
+            settings.sqlite_path, doc_id=doc_id, signature=signature, band_keys=band_keys, tenant=settings.TENANT
+        )
+        kept.append((doc_id, source, text))
+    return kept, skipped
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+DOCSTORE_FILENAME = "docstore.sqlite3"
+_COMPRESSION_LEVEL = 6
+
+
+class ChunkDocStore:
+    # Chunk text lives outside Chroma in a zlib-compressed SQLite file read through mmap, keyed by
+    # (collection, chunk_id) so blue/green generations never see each other's text. A small LRU
+    # keeps hot chunks decoded; it is dropped whenever PRAGMA data_version shows another
+    # connection committed.
+    def __init__(self, path: Path, *, cache_size: int = 2048, mmap_bytes: int = 256 * 1024 * 1024) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.cache_size = max(0, cache_size)
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunk_text (
+                collection TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                body BLOB NOT NULL,
+                PRIMARY KEY (collection, chunk_id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+        self._data_version = self._version()
+
+    def _version(self) -> int:
+        return int(self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def _remember(self, key: tuple[str, str], text: str) -> None:
+        if self.cache_size == 0:
+            return
+        self._cache[key] = text
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, collection: str, items: Iterable[tuple[str, str]]) -> None:
+        rows = [(collection, chunk_id, zlib.compress(text.encode("utf-8"), _COMPRESSION_LEVEL)) for chunk_id, text in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunk_text (collection, chunk_id, body) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+            for _, chunk_id, _ in rows:
+                self._cache.pop((collection, chunk_id), None)
+
+    def get_many(self, collection: str, chunk_ids: Sequence[str]) -> dict[str, str]:
+        found: dict[str, str] = {}
+        with self._lock:
+            version = self._version()
+            if version != self._data_version:
+                self._cache.clear()
+                self._data_version = version
+            missing: list[str] = []
+            for chunk_id in dict.fromkeys(chunk_ids):
+                text = self._cache.get((collection, chunk_id))
+                if text is None:
+                    missing.append(chunk_id)
+                else:
+                    self._cache.move_to_end((collection, chunk_id))
+                    found[chunk_id] = text
+            self._hits += len(found)
+            self._misses += len(missing)
+            for i in range(0, len(missing), 500):
+                batch = missing[i : i + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT chunk_id, body FROM chunk_text WHERE collection = ? AND chunk_id IN ({placeholders})",
+                    [collection, *batch],
+                ).fetchall()
+                for chunk_id, body in rows:
+                    text = zlib.decompress(body).decode("utf-8")
+                    found[str(chunk_id)] = text
+                    self._remember((collection, str(chunk_id)), text)
+        return found
+
+    def delete(self, collection: str, chunk_ids: Sequence[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM chunk_text WHERE collection = ? AND chunk_id = ?",
+                [(collection, chunk_id) for chunk_id in chunk_ids],
+            )
+            self._conn.commit()
+            for chunk_id in chunk_ids:
+                self._cache.pop((collection, chunk_id), None)
+
+    def drop_collection(self, collection: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunk_text WHERE collection = ?", (collection,))
+            self._conn.commit()
+            for key in [key for key in self._cache if key[0] == collection]:
+                del self._cache[key]
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._conn.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "cached_chunks": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_docstores: dict[str, ChunkDocStore] = {}
+_docstores_lock = threading.Lock()
+
+
+def open_docstore(directory: Path, *, cache_size: int, mmap_bytes: int) -> ChunkDocStore:
+    # One instance per file, shared by the live store and its shadows so they share the LRU.
+    path = (directory / DOCSTORE_FILENAME).resolve()
+    with _docstores_lock:
+        store = _docstores.get(str(path))
+        if store is None:
+            store = _docstores[str(path)] = ChunkDocStore(path, cache_size=cache_size, mmap_bytes=mmap_bytes)
+        return store
+
+
+def close_docstore(directory: Path) -> None:
+    path = (directory / DOCSTORE_FILENAME).resolve()
+    with _docstores_lock:
+        store = _docstores.pop(str(path), None)
+    if store is not None:
+        store.close()
@@ -2,21 +2,28 @@ from __future__ import annotations
 
 import io
 import re
+import time
 from pathlib import Path
-from typing import Iterable
-
-from pypdf import PdfReader
+from typing import Any, Iterable
 
 from app.core.config import Settings
-from app.rag.models import Chunk
+from app.db.sqlite import ingested_source_map
+from app.rag.batching import controller_from_settings, embed_chunks_adaptively
+from app.rag.centroids import refresh_doc_centroids
+from app.rag.dedup import content_hash, filter_near_duplicates, ref_key
+from app.rag.models import Chunk, RetrievalFilters
 from app.rag.ollama_client import OllamaClient
-from app.rag.vector_store import ChromaVectorStore
+from app.rag.scheduler import PRIORITY_BULK, priority_scope
+from app.rag.vector_store import ChromaVectorStore, build_where, doc_refs, source_prefix_metadata
+from app.rag.write_journal import live_write
 
 SUPPORTED_EXTENSIONS = {".pdf", ".md", ".txt"}
 
 
 def _read_text(path: Path) -> str:
     if path.suffix.lower() == ".pdf":
+        from pypdf import PdfReader
+
         reader = PdfReader(str(path))
         pages = [(page.extract_text() or "") for page in reader.pages]
         return "\n".join(pages).strip()
@@ -28,6 +35,8 @@ def text_from_bytes(filename: str, raw: bytes) -> str:
     if ext not in SUPPORTED_EXTENSIONS:
         raise ValueError(f"Unsupported file extension: {ext}")
     if ext == ".pdf":
+        from pypdf import PdfReader
+
         reader = PdfReader(io.BytesIO(raw))
         pages = [(page.extract_text() or "") for page in reader.pages]
         return "\n".join(pages).strip()
@@ -40,20 +49,28 @@ def source_to_doc_id(source: str) -> str:
     return base.replace("/", "__")
 
 
-def iter_documents(root: Path) -> Iterable[tuple[str, str, str]]:
+def _iter_document_paths(root: Path) -> Iterable[tuple[str, str, Path]]:
     if not root.exists():
         return
     for path in sorted(root.rglob("*")):
         if not path.is_file() or path.suffix.lower() not in SUPPORTED_EXTENSIONS:
             continue
+        rel = path.relative_to(root).as_posix()
+        yield rel.replace("/", "__"), rel, path
+
+
+def iter_documents(root: Path) -> Iterable[tuple[str, str, str]]:
+    for doc_id, rel, path in _iter_document_paths(root):
         text = _read_text(path)
         if not text:
             continue
-        rel = path.relative_to(root).as_posix()
-        doc_id = rel.replace("/", "__")
         yield doc_id, rel, text
 
 
+def local_doc_ids(root: Path) -> set[str]:
+    return {doc_id for doc_id, _, _ in _iter_document_paths(root)}
+
+
 def chunk_text(text: str, chunk_size: int, overlap: int) -> list[str]:
     cleaned = " ".join(text.split())
     if not cleaned:
@@ -78,8 +95,17 @@ def build_chunks(settings: Settings) -> list[Chunk]:
     return chunks
 
 
-def document_to_chunks(settings: Settings, *, doc_id: str, source: str, text: str) -> list[Chunk]:
+def document_to_chunks(
+    settings: Settings,
+    *,
+    doc_id: str,
+    source: str,
+    text: str,
+    source_type: str = "local",
+    ingested_at: float | None = None,
+) -> list[Chunk]:
     chunks: list[Chunk] = []
+    ingested_at = time.time() if ingested_at is None else ingested_at
     parts = chunk_text(text, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
     for idx, part in enumerate(parts):
         chunk_id = f"{doc_id}::chunk::{idx}"
@@ -91,30 +117,150 @@ def document_to_chunks(settings: Settings, *, doc_id: str, source: str, text: st
                     "doc_id": doc_id,
                     "source": source,
                     "chunk_index": idx,
+                    "content_hash": content_hash(part),
+                    ref_key(doc_id): idx,
+                    "ref_count": 1,
+                    "source_type": source_type,
+                    "ingested_at": ingested_at,
+                    **source_prefix_metadata(source),
                 },
             )
         )
     return chunks
 
 
+def _drop_stale_refs(settings: Settings, store: ChromaVectorStore, chunks: list[Chunk]) -> dict[str, int]:
+    # A re-ingested document keeps its ref on stored chunks whose text it still has at the same
+    # position. Every other ref goes through the delete path, which removes chunks nobody else
+    # references and hands shared ones to another referrer, so new text never overwrites a
+    # chunk another document points at.
+    wanted = {
+        (chunk.metadata["doc_id"], chunk.metadata["chunk_index"]): chunk.metadata["content_hash"] for chunk in chunks
+    }
+    doc_ids = {str(chunk.metadata["doc_id"]) for chunk in chunks}
+    removals: dict[str, set[str]] = {}
+    if doc_ids:
+        for page in store.iter_chunks(where=build_where(RetrievalFilters(doc_ids=sorted(doc_ids)))):
+            for stored in page:
+                refs = doc_refs(stored.metadata)
+                for doc_id in doc_ids & refs.keys():
+                    if wanted.get((doc_id, refs[doc_id])) != stored.metadata.get("content_hash"):
+                        removals.setdefault(stored.chunk_id, set()).add(doc_id)
+    if not removals:
+        return {"chunks_deleted": 0, "chunks_updated": 0}
+    return store.remove_doc_refs(removals, sources=ingested_source_map(settings.sqlite_path, tenant=settings.TENANT))
+
+
+def dedupe_chunks(
+    store: ChromaVectorStore, chunks: list[Chunk], *, keep_unchanged: bool = True
+) -> tuple[list[Chunk], dict[str, dict[str, int]], int]:
+    # Exact duplicates (by normalized content hash) are embedded once; every other document
+    # containing the same text is recorded as a `ref:<doc_id>` key on the canonical chunk, whose
+    # value is the chunk's position in that document. A stored chunk with the chunk's own id and
+    # text is left alone when the document's ref on it was kept; callers that dropped the
+    # document's refs first pass keep_unchanged=False so the ref is added back.
+    existing = store.find_chunk_ids_by_hash([chunk.metadata["content_hash"] for chunk in chunks])
+    canonical: dict[str, Chunk] = {}
+    to_embed: list[Chunk] = []
+    store_refs: dict[str, dict[str, int]] = {}
+    unchanged = 0
+    for chunk in chunks:
+        digest = chunk.metadata["content_hash"]
+        doc_id = chunk.metadata["doc_id"]
+        stored_ids = existing.get(digest, [])
+        if keep_unchanged and chunk.chunk_id in stored_ids:
+            unchanged += 1
+        elif digest in canonical:
+            first = canonical[digest]
+            if ref_key(doc_id) not in first.metadata:
+                first.metadata[ref_key(doc_id)] = chunk.metadata["chunk_index"]
+                first.metadata["ref_count"] += 1
+        elif stored_ids:
+            store_refs.setdefault(stored_ids[0], {})[doc_id] = chunk.metadata["chunk_index"]
+        else:
+            canonical[digest] = chunk
+            to_embed.append(chunk)
+    # A chunk id can still be taken by a shared chunk this document used to own and handed to
+    # another referrer; its new text gets an id of its own.
+    taken = store.existing_chunk_ids([chunk.chunk_id for chunk in to_embed])
+    for index, chunk in enumerate(to_embed):
+        if chunk.chunk_id in taken:
+            renamed = Chunk(f"{chunk.chunk_id}::{chunk.metadata['content_hash'][:12]}", chunk.text, chunk.metadata)
+            canonical[chunk.metadata["content_hash"]] = to_embed[index] = renamed
+    return to_embed, store_refs, unchanged
+
+
+def index_chunks(
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+    chunks: list[Chunk],
+    *,
+    max_chunks_per_second: float = 0.0,
+) -> dict[str, Any]:
+    stale = _drop_stale_refs(settings, store, chunks)
+    to_embed, store_refs, unchanged = dedupe_chunks(store, chunks)
+    # New vectors must match the model that built the collection, even while a migration to
+    # a newly configured OLLAMA_EMBED_MODEL is still running.
+    model = store.embed_model
+    # One scheduler slot per batch: queries preempt bulk ingestion at batch boundaries.
+    with priority_scope(PRIORITY_BULK):
+        batching = embed_chunks_adaptively(
+            ollama,
+            to_embed,
+            controller_from_settings(settings),
+            store.upsert_chunks,
+            max_retries=settings.EMBED_MAX_RETRIES,
+            backoff_seconds=settings.EMBED_BACKOFF_SECONDS,
+            max_chunks_per_second=max_chunks_per_second,
+            model=None if model == settings.OLLAMA_EMBED_MODEL else model,
+        )
+    store.add_doc_refs(store_refs)
+    if settings.RETRIEVAL_TWO_STAGE_ENABLED and chunks:
+        refresh_doc_centroids(settings, store, [str(chunk.metadata["doc_id"]) for chunk in chunks])
+    skipped = len(chunks) - len(to_embed)
+    return {
+        "chunks": len(chunks),
+        "chunks_embedded": len(to_embed),
+        "chunks_deduplicated": skipped - unchanged,
+        "chunks_unchanged": unchanged,
+        "stale_chunks_deleted": stale["chunks_deleted"],
+        "stale_chunks_released": stale["chunks_updated"],
+        "dedup_ratio": round(skipped / len(chunks), 4) if chunks else 0.0,
+        **batching,
+    }
+
+
 def ingest_document_texts(
     settings: Settings,
     store: ChromaVectorStore,
     ollama: OllamaClient,
     docs: list[tuple[str, str, str]],
-    batch_size: int = 32,
-) -> dict[str, int]:
+    source_type: str = "local",
+) -> dict[str, Any]:
+    near_duplicates: list[dict[str, object]] = []
+    if settings.INGEST_NEAR_DUP_ENABLED:
+        docs, near_duplicates = filter_near_duplicates(settings, docs)
+    ingested_at = time.time()
     chunks: list[Chunk] = []
     for doc_id, source, text in docs:
-        chunks.extend(document_to_chunks(settings, doc_id=doc_id, source=source, text=text))
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i : i + batch_size]
-        vectors = ollama.embed([chunk.text for chunk in batch])
-        store.upsert_chunks(batch, vectors)
+        chunks.extend(
+            document_to_chunks(
+                settings, doc_id=doc_id, source=source, text=text, source_type=source_type, ingested_at=ingested_at
+            )
+        )
+    with live_write(str(store.settings.chroma_dir), [doc_id for doc_id, _, _ in docs]):
+        indexed = index_chunks(settings, store, ollama, chunks)
     unique_docs = len({chunk.metadata["doc_id"] for chunk in chunks}) if chunks else 0
-    return {"docs": unique_docs, "chunks": len(chunks), "vector_count": store.count()}
+    return {
+        "docs": unique_docs,
+        "vector_count": store.count(),
+        "docs_near_duplicate": len(near_duplicates),
+        "near_duplicates": near_duplicates[:50],
+        **indexed,
+    }
 
 
-def run_ingestion(settings: Settings, store: ChromaVectorStore, ollama: OllamaClient, batch_size: int = 32) -> dict[str, int]:
+def run_ingestion(settings: Settings, store: ChromaVectorStore, ollama: OllamaClient) -> dict[str, Any]:
     docs = list(iter_documents(settings.docs_dir))
-    return ingest_document_texts(settings, store, ollama, docs=docs, batch_size=batch_size)
+    return ingest_document_texts(settings, store, ollama, docs=docs)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_select(
+    query_vector: Sequence[float],
+    candidate_vectors: Sequence[Sequence[float]] | np.ndarray,
+    *,
+    k: int,
+    lambda_mult: float = 0.7,
+    doc_ids: Sequence[str] | None = None,
+    max_per_doc: int = 0,
+) -> list[int]:
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    if candidates.ndim != 2 or candidates.shape[0] == 0 or k <= 0:
+        return []
+    candidates = _normalize(candidates)
+    relevance = candidates @ _normalize(np.asarray(query_vector, dtype=np.float32))
+    pairwise = candidates @ candidates.T
+    # Running max similarity of every candidate to the already-selected set.
+    redundancy = np.full(candidates.shape[0], -np.inf, dtype=np.float32)
+    available = np.ones(candidates.shape[0], dtype=bool)
+    per_doc: dict[str, int] = {}
+    selected: list[int] = []
+    while len(selected) < k and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        available[best] = False
+        if doc_ids is not None and max_per_doc > 0:
+            doc_id = doc_ids[best]
+            if per_doc.get(doc_id, 0) >= max_per_doc:
+                continue
+            per_doc[doc_id] = per_doc.get(doc_id, 0) + 1
+        selected.append(best)
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
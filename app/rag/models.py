@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 
@@ -15,3 +15,24 @@ class RetrievedChunk:
     text: str
     metadata: dict[str, Any]
     distance: float
+    embedding: list[float] | None = None
+    # Index of the shard that returned the chunk, when it came from a sharded store.
+    shard: int | None = None
+
+
+@dataclass
+class RetrievalFilters:
+    doc_ids: list[str] = field(default_factory=list)
+    source_prefix: str | None = None
+    source_type: str | None = None
+    ingested_after: float | None = None
+    ingested_before: float | None = None
+
+    def is_empty(self) -> bool:
+        return not (
+            self.doc_ids
+            or self.source_prefix
+            or self.source_type
+            or self.ingested_after is not None
+            or self.ingested_before is not None
+        )
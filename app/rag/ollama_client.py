@@ -1,34 +1,274 @@
+import contextvars
+import json
 import logging
-from typing import Any
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
 
 import httpx
 
 from app.core.config import Settings
+from app.rag.backend_pool import EMBED_API_CURRENT, EMBED_API_LEGACY, BackendPool, OllamaBackend
+from app.rag.resilience import LatencyTracker
+from app.rag.scheduler import OllamaScheduler, parse_priority_weights
 
 logger = logging.getLogger(__name__)
 
 
+class _GenerateCancelled(Exception):
+    """Raised inside a hedged generate that lost the race."""
+
+
 class OllamaClient:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, scheduler: OllamaScheduler | None = None) -> None:
         self.settings = settings
         self._client = httpx.Client(timeout=settings.OLLAMA_TIMEOUT_SECONDS)
+        self.scheduler = scheduler or OllamaScheduler(
+            max_concurrency=settings.OLLAMA_MAX_CONCURRENCY,
+            weights=parse_priority_weights(settings.OLLAMA_PRIORITY_WEIGHTS),
+            interactive_reserved_slots=settings.OLLAMA_INTERACTIVE_RESERVED_SLOTS,
+        )
+        self.generate_pool = self._build_pool("generate", settings.ollama_base_urls)
+        if settings.ollama_embed_base_urls:
+            self.embed_pool = self._build_pool("embed", settings.ollama_embed_base_urls)
+        else:
+            self.embed_pool = self.generate_pool
+        self.generate_latency = LatencyTracker(window=settings.OLLAMA_HEDGE_WINDOW)
+        self._hedge_executor: ThreadPoolExecutor | None = None
+        self._hedge_lock = threading.Lock()
+        self._hedge_counters = dict.fromkeys(("requests", "hedged", "hedge_wins", "hedges_skipped", "losers_cancelled"), 0)
+        self._legacy_pool: ThreadPoolExecutor | None = None
+        self._models_lock = threading.Lock()
+        self._models_cache: list[str] | None = None
+        self._models_fetched_at = 0.0
+        self._models_refreshing = False
+
+    def _build_pool(self, name: str, urls: list[str]) -> BackendPool:
+        return BackendPool(
+            name,
+            urls,
+            failure_threshold=self.settings.OLLAMA_BACKEND_FAILURE_THRESHOLD,
+            eject_seconds=self.settings.OLLAMA_BACKEND_EJECT_SECONDS,
+            affinity_ttl_seconds=self.settings.OLLAMA_AFFINITY_TTL_SECONDS,
+        )
+
+    def _keep_alive(self) -> str | int | None:
+        raw = self.settings.OLLAMA_KEEP_ALIVE.strip()
+        if not raw:
+            return None
+        # Ollama parses strings as Go durations ("30m"); bare numbers must be sent as numbers.
+        try:
+            return int(raw)
+        except ValueError:
+            return raw
+
+    def _with_keep_alive(self, payload: dict[str, Any]) -> dict[str, Any]:
+        keep_alive = self._keep_alive()
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    def _request(
+        self,
+        pool: BackendPool,
+        send: Callable[[OllamaBackend], httpx.Response],
+        *,
+        model: str,
+    ) -> httpx.Response:
+        tried: set[str] = set()
+        attempts = min(2, len(pool))
+        while True:
+            with pool.lease(model, exclude=tried) as backend:
+                tried.add(backend.url)
+                try:
+                    response = send(backend)
+                except _GenerateCancelled:
+                    pool.record_cancelled(backend)
+                    raise
+                except httpx.TransportError:
+                    pool.record_failure(backend)
+                    if len(tried) >= attempts:
+                        raise
+                    logger.warning("Ollama backend unreachable, failing over", extra={"backend": backend.url})
+                    continue
+                except Exception:
+                    pool.record_failure(backend)
+                    raise
+                if response.status_code >= 500:
+                    pool.record_failure(backend)
+                else:
+                    pool.record_success(backend, model)
+                return response
+
+    def _post(self, pool: BackendPool, path: str, payload: dict[str, Any], *, model: str) -> httpx.Response:
+        return self._request(pool, lambda backend: self._client.post(f"{backend.url}{path}", json=payload), model=model)
+
+    def _post_generate_stream(self, payload: dict[str, Any], model: str, cancel: threading.Event) -> httpx.Response:
+        # A raced generate streams so the loser can be dropped between chunks; closing its
+        # connection makes Ollama stop generating. The chunks fold back into one response body.
+        def send(backend: OllamaBackend) -> httpx.Response:
+            if cancel.is_set():
+                raise _GenerateCancelled()
+            request = self._client.build_request(
+                "POST", f"{backend.url}/api/generate", json={**payload, "stream": True}
+            )
+            response = self._client.send(request, stream=True)
+            pieces: list[str] = []
+            body: dict[str, Any] = {}
+            try:
+                if response.status_code >= 400:
+                    response.read()
+                    return response
+                for line in response.iter_lines():
+                    if cancel.is_set():
+                        raise _GenerateCancelled()
+                    if not line.strip():
+                        continue
+                    body = json.loads(line)
+                    if "error" in body:
+                        raise RuntimeError(f"Ollama generate failed: {body['error']}")
+                    pieces.append(str(body.get("response", "")))
+                    if body.get("done"):
+                        break
+            finally:
+                response.close()
+            body["response"] = "".join(pieces)
+            return httpx.Response(response.status_code, json=body, request=request)
+
+        return self._request(self.generate_pool, send, model=model)
+
+    def _timed_generate_post(
+        self, payload: dict[str, Any], model: str, cancel: threading.Event | None = None
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        if cancel is None:
+            response = self._post(self.generate_pool, "/api/generate", payload, model=model)
+        else:
+            response = self._post_generate_stream(payload, model, cancel)
+        if response.status_code < 400:
+            self.generate_latency.observe(model, (time.perf_counter() - started) * 1000)
+        return response
+
+    def _count_hedge(self, key: str) -> None:
+        with self._hedge_lock:
+            self._hedge_counters[key] += 1
+
+    def _post_generate(self, payload: dict[str, Any], model: str) -> httpx.Response:
+        self._count_hedge("requests")
+        threshold_ms = None
+        if self.settings.OLLAMA_HEDGE_ENABLED:
+            threshold_ms = self.generate_latency.threshold_ms(
+                model,
+                percentile=self.settings.OLLAMA_HEDGE_PERCENTILE,
+                min_samples=self.settings.OLLAMA_HEDGE_MIN_SAMPLES,
+            )
+        if threshold_ms is None:
+            return self._timed_generate_post(payload, model)
+
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=max(2, self.settings.OLLAMA_MAX_CONCURRENCY * 2),
+                    thread_name_prefix="ollama-hedge",
+                )
+            executor = self._hedge_executor
+        primary_cancel = threading.Event()
+        primary = executor.submit(
+            contextvars.copy_context().run, self._timed_generate_post, payload, model, primary_cancel
+        )
+        done, _ = wait([primary], timeout=threshold_ms / 1000)
+        if done:
+            return primary.result()
+
+        # The primary is past the learned percentile: race a duplicate on a second scheduler slot.
+        # When none is free the hedge is skipped rather than queued, so it never displaces other
+        # work. The pool routes it to the least-loaded backend, another one whenever available.
+        hedge_slot = self.scheduler.try_acquire()
+        if hedge_slot is None:
+            self._count_hedge("hedges_skipped")
+            return primary.result()
+        self._count_hedge("hedged")
+        hedge_cancel = threading.Event()
+        hedge = executor.submit(contextvars.copy_context().run, self._timed_generate_post, payload, model, hedge_cancel)
+        hedge.add_done_callback(lambda _: self.scheduler.release(hedge_slot))
+        cancels = {primary: primary_cancel, hedge: hedge_cancel}
+        pending: set[Future[httpx.Response]] = {primary, hedge}
+        last_error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    error = future.exception()
+                    if error is not None:
+                        last_error = error
+                        continue
+                    if future is hedge:
+                        self._count_hedge("hedge_wins")
+                    return future.result()
+        finally:
+            for future in pending:
+                self._count_hedge("losers_cancelled")
+                cancels[future].set()
+                future.cancel()
+        if last_error is None:
+            raise RuntimeError("Hedged generate finished without a result.")
+        raise last_error
 
-    def embed(self, texts: list[str]) -> list[list[float]]:
+    def _legacy_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._legacy_pool is None:
+                self._legacy_pool = ThreadPoolExecutor(
+                    max_workers=max(1, self.settings.OLLAMA_LEGACY_EMBED_CONCURRENCY),
+                    thread_name_prefix="ollama-legacy-embed",
+                )
+            return self._legacy_pool
+
+    def _send_legacy_embed(self, backend: OllamaBackend, texts: list[str], model: str) -> httpx.Response:
+        # /api/embeddings takes one prompt per request; fan out with bounded concurrency and
+        # present the result in the /api/embed response shape.
+        def post_one(text: str) -> httpx.Response:
+            return self._client.post(
+                f"{backend.url}/api/embeddings",
+                json=self._with_keep_alive({"model": model, "prompt": text}),
+            )
+
+        responses = list(self._legacy_executor().map(post_one, texts))
+        for response in responses:
+            if response.status_code >= 400:
+                return response
+        return httpx.Response(
+            200,
+            json={"embeddings": [response.json()["embedding"] for response in responses]},
+            request=responses[-1].request,
+        )
+
+    def _send_embed(self, backend: OllamaBackend, texts: list[str], model: str) -> httpx.Response:
+        if backend.embed_api != EMBED_API_LEGACY:
+            response = self._client.post(
+                f"{backend.url}/api/embed",
+                json=self._with_keep_alive({"model": model, "input": texts}),
+            )
+            # A missing model is also a 404, but its error names the model; only a bare 404
+            # means the server predates /api/embed.
+            if response.status_code != 404 or "model" in response.text.lower():
+                if response.status_code < 400:
+                    backend.embed_api = EMBED_API_CURRENT
+                return response
+            logger.info("Ollama backend lacks /api/embed, using legacy API", extra={"backend": backend.url})
+            backend.embed_api = EMBED_API_LEGACY
+        return self._send_legacy_embed(backend, texts, model)
+
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
         if not texts:
             return []
-        payload = {"model": self.settings.OLLAMA_EMBED_MODEL, "input": texts}
-        response = self._client.post(f"{self.settings.OLLAMA_BASE_URL}/api/embed", json=payload)
-        if response.status_code == 404:
-            # Compatibility fallback for older Ollama versions.
-            legacy_embeddings: list[list[float]] = []
-            for text in texts:
-                legacy_resp = self._client.post(
-                    f"{self.settings.OLLAMA_BASE_URL}/api/embeddings",
-                    json={"model": self.settings.OLLAMA_EMBED_MODEL, "prompt": text},
-                )
-                legacy_resp.raise_for_status()
-                legacy_embeddings.append(legacy_resp.json()["embedding"])
-            return legacy_embeddings
+        model = model or self.settings.OLLAMA_EMBED_MODEL
+        with self.scheduler.slot():
+            response = self._request(
+                self.embed_pool,
+                lambda backend: self._send_embed(backend, texts, model),
+                model=model,
+            )
         response.raise_for_status()
         data = response.json()
         embeddings = data.get("embeddings")
@@ -36,28 +276,73 @@ class OllamaClient:
             raise RuntimeError("Ollama embed response missing embeddings list.")
         return embeddings
 
-    def list_models(self) -> list[str]:
-        response = self._client.get(f"{self.settings.OLLAMA_BASE_URL}/api/tags")
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
-        models = data.get("models")
-        if not isinstance(models, list):
-            return []
+    def _fetch_models(self) -> list[str]:
         names: list[str] = []
-        for item in models:
-            if isinstance(item, dict) and isinstance(item.get("name"), str):
-                names.append(str(item["name"]))
-        return names
-
-    def generate_with_meta(self, prompt: str, *, model: str | None = None) -> dict[str, Any]:
-        response = self._client.post(
-            f"{self.settings.OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": model or self.settings.OLLAMA_CHAT_MODEL,
-                "prompt": prompt,
-                "stream": False,
-            },
-        )
+        last_error: Exception | None = None
+        for backend in self.generate_pool.backends:
+            try:
+                response = self._client.get(f"{backend.url}/api/tags")
+                response.raise_for_status()
+            except Exception as exc:
+                last_error = exc
+                continue
+            data: dict[str, Any] = response.json()
+            models = data.get("models")
+            if not isinstance(models, list):
+                continue
+            for item in models:
+                if isinstance(item, dict) and isinstance(item.get("name"), str) and item["name"] not in names:
+                    names.append(str(item["name"]))
+        if not names and last_error is not None:
+            raise last_error
+        with self._models_lock:
+            self._models_cache = names
+            self._models_fetched_at = time.monotonic()
+        return list(names)
+
+    def _refresh_models_in_background(self) -> None:
+        try:
+            self._fetch_models()
+        except Exception:
+            logger.warning("Background Ollama model list refresh failed", exc_info=True)
+        finally:
+            with self._models_lock:
+                self._models_refreshing = False
+
+    def list_models(self, *, force_refresh: bool = False) -> list[str]:
+        ttl = self.settings.OLLAMA_MODEL_LIST_TTL_SECONDS
+        with self._models_lock:
+            cached = self._models_cache
+            age = time.monotonic() - self._models_fetched_at
+            if cached is not None and not force_refresh and age < ttl * 10:
+                if age >= ttl and not self._models_refreshing:
+                    # Serve the stale list now and refresh it off the request path.
+                    self._models_refreshing = True
+                    threading.Thread(
+                        target=self._refresh_models_in_background,
+                        name="ollama-model-refresh",
+                        daemon=True,
+                    ).start()
+                return list(cached)
+        return self._fetch_models()
+
+    def generate_with_meta(
+        self,
+        prompt: str,
+        *,
+        model: str | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        chat_model = model or self.settings.OLLAMA_CHAT_MODEL
+        payload: dict[str, Any] = {
+            "model": chat_model,
+            "prompt": prompt,
+            "stream": False,
+        }
+        if options:
+            payload["options"] = options
+        with self.scheduler.slot():
+            response = self._post_generate(self._with_keep_alive(payload), chat_model)
         response.raise_for_status()
         data: dict[str, Any] = response.json()
         text = data.get("response")
@@ -78,10 +363,49 @@ class OllamaClient:
     def generate(self, prompt: str, *, model: str | None = None) -> str:
         return str(self.generate_with_meta(prompt, model=model)["text"])
 
+    def preload(self, model: str, *, embedding: bool = False) -> dict[str, str | None]:
+        # A request without prompt/input makes Ollama load the model and hold it for keep_alive.
+        pool = self.embed_pool if embedding else self.generate_pool
+        path = "/api/embed" if embedding else "/api/generate"
+        results: dict[str, str | None] = {}
+        for backend in pool.backends:
+            try:
+                response = self._client.post(f"{backend.url}{path}", json=self._with_keep_alive({"model": model}))
+                response.raise_for_status()
+            except Exception as exc:
+                pool.record_failure(backend)
+                results[backend.url] = str(exc)
+                continue
+            pool.record_success(backend, model)
+            results[backend.url] = None
+        if all(error is not None for error in results.values()):
+            raise RuntimeError(f"Failed to load model {model} on any Ollama backend: {results}")
+        return results
+
+    def runtime_stats(self) -> dict[str, Any]:
+        pools = {"generate": self.generate_pool.stats()}
+        pools["embed"] = self.embed_pool.stats() if self.embed_pool is not self.generate_pool else pools["generate"]
+        with self._hedge_lock:
+            counters = dict(self._hedge_counters)
+        hedging = {
+            "enabled": self.settings.OLLAMA_HEDGE_ENABLED,
+            "percentile": self.settings.OLLAMA_HEDGE_PERCENTILE,
+            "requests": counters["requests"],
+            "hedged": counters["hedged"],
+            "hedge_wins": counters["hedge_wins"],
+            "hedges_skipped": counters["hedges_skipped"],
+            "losers_cancelled": counters["losers_cancelled"],
+            "hedge_rate": (counters["hedged"] / counters["requests"]) if counters["requests"] else 0.0,
+            "models": self.generate_latency.snapshot(
+                percentile=self.settings.OLLAMA_HEDGE_PERCENTILE,
+                min_samples=self.settings.OLLAMA_HEDGE_MIN_SAMPLES,
+            ),
+        }
+        return {"scheduler": self.scheduler.stats(), "pools": pools, "hedging": hedging}
+
     def healthcheck(self) -> bool:
         try:
-            response = self._client.get(f"{self.settings.OLLAMA_BASE_URL}/api/tags")
-            response.raise_for_status()
+            self.list_models(force_refresh=True)
             return True
         except Exception:
             logger.exception("Ollama healthcheck failed")
@@ -5,6 +5,9 @@ import time
 from typing import Any
 
 from app.core.config import Settings
+from app.rag.centroids import narrow_to_documents
+from app.rag.mmr import mmr_select
+from app.rag.models import RetrievalFilters
 from app.rag.ollama_client import OllamaClient
 from app.rag.vector_store import ChromaVectorStore
 
@@ -15,10 +18,52 @@ class RAGPipeline:
         self.store = store
         self.ollama = ollama
 
-    def retrieve(self, question: str, top_k: int | None = None) -> tuple[list[dict[str, Any]], list[str]]:
+    def _mmr_rerank(self, query_vector: list[float], k: int, query_kwargs: dict[str, Any]) -> list[Any]:
+        fetch_k = max(k, self.settings.RETRIEVAL_MMR_FETCH_K)
+        candidates = self.store.query(query_vector, top_k=fetch_k, include_embeddings=True, **query_kwargs)
+        if len(candidates) <= 1 or any(c.embedding is None for c in candidates):
+            return candidates[:k]
+        order = mmr_select(
+            query_vector,
+            [c.embedding for c in candidates],
+            k=k,
+            lambda_mult=self.settings.RETRIEVAL_MMR_LAMBDA,
+            doc_ids=[str(c.metadata.get("doc_id", "unknown")) for c in candidates],
+            max_per_doc=self.settings.RETRIEVAL_MAX_CHUNKS_PER_DOC,
+        )
+        return [candidates[i] for i in order]
+
+    def retrieve(
+        self,
+        question: str,
+        top_k: int | None = None,
+        *,
+        mmr: bool | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> tuple[list[dict[str, Any]], list[str]]:
         k = top_k or self.settings.TOP_K
-        query_vector = self.ollama.embed([question])[0]
-        chunks = self.store.query(query_vector, top_k=k)
+        index_model = getattr(self.store, "embed_model", self.settings.OLLAMA_EMBED_MODEL)
+        if index_model == self.settings.OLLAMA_EMBED_MODEL:
+            query_vector = self.ollama.embed([question])[0]
+        else:
+            # Query with the model that built the live index until a migration swaps it.
+            query_vector = self.ollama.embed([question], model=index_model)[0]
+        if self.settings.RETRIEVAL_TWO_STAGE_ENABLED:
+            filters = narrow_to_documents(self.settings, self.store, query_vector, filters)
+        # Filters are pushed down to the store as a metadata `where` clause.
+        query_kwargs: dict[str, Any] = {"filters": filters}
+        # Stores with a separate docstore skip chunk text during search; only the chunks that
+        # make it into the prompt are read.
+        lazy_text = hasattr(self.store, "load_texts")
+        if lazy_text:
+            query_kwargs["include_text"] = False
+        use_mmr = self.settings.RETRIEVAL_MMR_ENABLED if mmr is None else mmr
+        if use_mmr:
+            chunks = self._mmr_rerank(query_vector, k, query_kwargs)
+        else:
+            chunks = self.store.query(query_vector, top_k=k, **query_kwargs)
+        if lazy_text:
+            self.store.load_texts(chunks)
         citations: list[dict[str, Any]] = []
         retrieved_doc_ids: list[str] = []
         seen: set[str] = set()
@@ -66,9 +111,16 @@ class RAGPipeline:
             raw = min(raw, 0.6)
         return max(0.05, min(0.95, raw))
 
-    def answer(self, question: str, top_k: int | None = None, chat_model: str | None = None) -> dict[str, Any]:
+    def answer(
+        self,
+        question: str,
+        top_k: int | None = None,
+        chat_model: str | None = None,
+        mmr: bool | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> dict[str, Any]:
         start = time.perf_counter()
-        citations, retrieved_doc_ids = self.retrieve(question, top_k=top_k)
+        citations, retrieved_doc_ids = self.retrieve(question, top_k=top_k, mmr=mmr, filters=filters)
         if not citations:
             return {
                 "answer": "No indexed context was found. Ingest documents first.",
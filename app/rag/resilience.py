@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    # Not internally locked: BackendPool mutates breakers under its own lock.
+    def __init__(self, *, failure_threshold: int = 3, reset_seconds: float = 30.0) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = max(0.0, reset_seconds)
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probe_in_flight = False
+
+    def available(self, now: float) -> bool:
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN:
+            return (now - self.opened_at) >= self.reset_seconds
+        return not self._probe_in_flight
+
+    def on_dispatch(self, now: float) -> None:
+        if self.state == BREAKER_OPEN and (now - self.opened_at) >= self.reset_seconds:
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_HALF_OPEN:
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, now: float) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == BREAKER_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != BREAKER_OPEN:
+                self.open_count += 1
+            self.state = BREAKER_OPEN
+            self.opened_at = now
+
+    def release_probe(self) -> None:
+        # A dispatched request that ended without an outcome (e.g. a cancelled hedge) frees the
+        # half-open probe so the next request can probe instead.
+        self._probe_in_flight = False
+
+    def retry_in_seconds(self, now: float) -> float:
+        if self.state != BREAKER_OPEN:
+            return 0.0
+        return max(0.0, self.reset_seconds - (now - self.opened_at))
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * p
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = index - lower
+    return ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+
+class LatencyTracker:
+    def __init__(self, *, window: int = 200) -> None:
+        self.window = max(1, window)
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, latency_ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(latency_ms)
+
+    def samples(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def threshold_ms(self, key: str, *, percentile: float, min_samples: int) -> float | None:
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return _percentile(samples, percentile)
+
+    def snapshot(self, *, percentile: float, min_samples: int) -> dict[str, Any]:
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {
+                "samples": len(self._samples[key]),
+                "threshold_ms": self.threshold_ms(key, percentile=percentile, min_samples=min_samples),
+            }
+            for key in keys
+        }
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_EVAL = "eval"
+PRIORITY_BULK = "bulk"
+PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_EVAL, PRIORITY_BULK)
+
+_current_priority: ContextVar[str] = ContextVar("ollama_priority", default=PRIORITY_INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def parse_priority_weights(raw: str) -> dict[str, int]:
+    weights = {PRIORITY_INTERACTIVE: 8, PRIORITY_EVAL: 3, PRIORITY_BULK: 1}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition(":")
+        name = name.strip().lower()
+        if name not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class in weights: {name}")
+        weights[name] = max(1, int(value.strip()))
+    return weights
+
+
+class OllamaScheduler:
+    # Start-time fair queueing across priority classes: a backlogged class gets slots in
+    # proportion to its weight. Non-interactive work can never take the reserved slots, so
+    # bulk callers that acquire one slot per batch yield to queries at batch boundaries.
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        weights: dict[str, int],
+        interactive_reserved_slots: int = 1,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.weights = {name: max(1, weights.get(name, 1)) for name in PRIORITY_CLASSES}
+        self.reserved_slots = max(0, min(interactive_reserved_slots, self.max_concurrency - 1))
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque[object]] = {name: deque() for name in PRIORITY_CLASSES}
+        self._vtime: dict[str, float] = {name: 0.0 for name in PRIORITY_CLASSES}
+        self._clock = 0.0
+        self._in_flight: dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+        self._granted: dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+        self._wait_ms_total: dict[str, float] = {name: 0.0 for name in PRIORITY_CLASSES}
+
+    def _total_in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    def _can_admit(self, priority: str) -> bool:
+        free = self.max_concurrency - self._total_in_flight()
+        if priority == PRIORITY_INTERACTIVE:
+            return free > 0
+        return free > self.reserved_slots
+
+    def _next_class(self) -> str | None:
+        candidates = [name for name in PRIORITY_CLASSES if self._queues[name] and self._can_admit(name)]
+        if not candidates:
+            return None
+        # Ties resolve in PRIORITY_CLASSES order, i.e. interactive first.
+        return min(candidates, key=lambda name: self._vtime[name])
+
+    @contextmanager
+    def slot(self, priority: str | None = None) -> Iterator[None]:
+        klass = priority or current_priority()
+        if klass not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {klass}")
+        ticket = object()
+        started = time.perf_counter()
+        with self._cond:
+            if not self._queues[klass]:
+                # A class returning from idle must not redeem credit it built up while idle.
+                self._vtime[klass] = max(self._vtime[klass], self._clock)
+            self._queues[klass].append(ticket)
+            while not (self._next_class() == klass and self._queues[klass][0] is ticket):
+                self._cond.wait()
+            self._queues[klass].popleft()
+            self._clock = self._vtime[klass]
+            self._vtime[klass] += 1.0 / self.weights[klass]
+            self._in_flight[klass] += 1
+            self._granted[klass] += 1
+            self._wait_ms_total[klass] += (time.perf_counter() - started) * 1000
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            self.release(klass)
+
+    def try_acquire(self, priority: str | None = None) -> str | None:
+        # Non-blocking slot for optional extra work such as a hedged request: granted only when a
+        # slot is free for the class and nobody is queued, so it never delays or jumps waiters.
+        # Returns the class to pass to release(), or None when no slot was taken.
+        klass = priority or current_priority()
+        if klass not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {klass}")
+        with self._cond:
+            if any(self._queues.values()) or not self._can_admit(klass):
+                return None
+            self._vtime[klass] = max(self._vtime[klass], self._clock)
+            self._clock = self._vtime[klass]
+            self._vtime[klass] += 1.0 / self.weights[klass]
+            self._in_flight[klass] += 1
+            self._granted[klass] += 1
+            return klass
+
+    def release(self, klass: str) -> None:
+        with self._cond:
+            self._in_flight[klass] -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            classes = {
+                name: {
+                    "weight": self.weights[name],
+                    "in_flight": self._in_flight[name],
+                    "waiting": len(self._queues[name]),
+                    "granted": self._granted[name],
+                    "avg_wait_ms": (self._wait_ms_total[name] / self._granted[name]) if self._granted[name] else 0.0,
+                }
+                for name in PRIORITY_CLASSES
+            }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "interactive_reserved_slots": self.reserved_slots,
+                "in_flight": self._total_in_flight(),
+                "classes": classes,
+            }
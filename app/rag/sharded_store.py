@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, Sequence
+
+from app.core.config import Settings
+from app.rag.models import Chunk, RetrievalFilters, RetrievedChunk
+from app.rag.resilience import LatencyTracker
+from app.rag.vector_store import (
+    POINTER_FILENAME,
+    ChromaVectorStore,
+    ReadOnlyStoreError,
+    StorePins,
+    open_persistent_client,
+    query_latency_stats,
+    release_persistent_client,
+    shadow_collection_name,
+)
+
+SHARD_DIR_PATTERN = "shard-[0-9][0-9]"
+
+
+class ShardLayoutError(RuntimeError):
+    pass
+
+
+def shard_for(doc_id: str, shard_count: int) -> int:
+    # Stable across processes (unlike hash()), so every writer routes a document to the same shard.
+    digest = hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def shard_settings(settings: Settings, index: int) -> Settings:
+    return settings.model_copy(update={"CHROMA_DIR": str(settings.chroma_dir / f"shard-{index:02d}")})
+
+
+def _has_unsharded_chunks(settings: Settings) -> bool:
+    root = settings.chroma_dir
+    if not (root / POINTER_FILENAME).exists() and not (root / "chroma.sqlite3").exists():
+        return False
+    client = open_persistent_client(root)
+    try:
+        return any(collection.count() for collection in client.list_collections())
+    finally:
+        release_persistent_client(root)
+
+
+def check_shard_layout(settings: Settings) -> None:
+    # Routing depends on the shard count, so an index written with another count would be
+    # silently ignored (or half-routed). Refuse to open it; snapshots are the reshard path.
+    shard_count = max(1, settings.VECTOR_STORE_SHARDS)
+    existing = sorted(path.name for path in settings.chroma_dir.glob(SHARD_DIR_PATTERN) if path.is_dir())
+    hint = (
+        "Export a snapshot with the old VECTOR_STORE_SHARDS, move CHROMA_DIR aside, "
+        "then import the snapshot with the new value."
+    )
+    if shard_count == 1:
+        if existing:
+            raise ShardLayoutError(
+                f"{settings.chroma_dir} holds a {len(existing)}-shard index but VECTOR_STORE_SHARDS=1. {hint}"
+            )
+        return
+    if existing and len(existing) != shard_count:
+        raise ShardLayoutError(
+            f"{settings.chroma_dir} holds a {len(existing)}-shard index but VECTOR_STORE_SHARDS={shard_count}. {hint}"
+        )
+    if _has_unsharded_chunks(settings):
+        raise ShardLayoutError(
+            f"{settings.chroma_dir} holds an unsharded index but VECTOR_STORE_SHARDS={shard_count}. {hint}"
+        )
+
+
+def open_vector_store(
+    settings: Settings, *, read_only: bool = False, latency: LatencyTracker | None = None
+) -> ChromaVectorStore | ShardedVectorStore:
+    # Shards are a local-disk layout; a Chroma server is scaled on its own side.
+    if settings.VECTOR_STORE_BACKEND == "http":
+        return ChromaVectorStore(settings, read_only=read_only, latency=latency)
+    check_shard_layout(settings)
+    if settings.VECTOR_STORE_SHARDS > 1:
+        return ShardedVectorStore(settings, read_only=read_only, latency=latency)
+    return ChromaVectorStore(settings, read_only=read_only, latency=latency)
+
+
+class ShardedVectorStore(StorePins):
+    # Same interface as ChromaVectorStore (composed, not inherited) over VECTOR_STORE_SHARDS independent stores, one
+    # persistent directory each (CHROMA_DIR/shard-NN) with its own blue/green pointer. Chunks are
+    # routed by a hash of their owning doc_id; queries fan out to every shard in parallel and the
+    # per-shard top-k lists are merged by distance. Dedup refs may point across shards, so ref
+    # and hash lookups fan out as well.
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        collection_name: str | None = None,
+        shards: list[ChromaVectorStore] | None = None,
+        read_only: bool = False,
+        latency: LatencyTracker | None = None,
+    ) -> None:
+        if shards is None:
+            check_shard_layout(settings)
+        self.settings = settings
+        self.read_only = read_only
+        self.shards = shards or [
+            ChromaVectorStore(shard_settings(settings, i), collection_name=collection_name, read_only=read_only)
+            for i in range(max(1, settings.VECTOR_STORE_SHARDS))
+        ]
+        self._latency = latency or LatencyTracker()
+        self._init_pins()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="shard-query")
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise ReadOnlyStoreError("This worker opened the index read-only; writes go through the writer process.")
+
+    def _shard_index(self, metadata: dict[str, Any] | None, fallback: str) -> int:
+        doc_id = str((metadata or {}).get("doc_id") or fallback)
+        return shard_for(doc_id, len(self.shards))
+
+    def _fan_out(self, fn: Any) -> list[Any]:
+        return list(self._executor.map(fn, self.shards))
+
+    @property
+    def last_used(self) -> float:
+        return max(shard.last_used for shard in self.shards)
+
+    @property
+    def embed_model(self) -> str:
+        return str(self.collection_metadata().get("embed_model") or self.settings.OLLAMA_EMBED_MODEL)
+
+    def index_generation(self) -> str:
+        return "|".join(shard.index_generation() for shard in self.shards)
+
+    def update_collection_metadata(self, **values: Any) -> None:
+        for shard in self.shards:
+            shard.update_collection_metadata(**values)
+
+    def record_embedding_signature(self, model: str, dim: int) -> None:
+        self.update_collection_metadata(embed_model=model, embed_dim=dim)
+
+    def hnsw_config(self) -> dict[str, int | None]:
+        return self.shards[0].hnsw_config()
+
+    def set_search_ef(self, ef_search: int) -> dict[str, int | None]:
+        for shard in self.shards:
+            shard.set_search_ef(ef_search)
+        return self.hnsw_config()
+
+    @property
+    def collection_name(self) -> str:
+        return self.shards[0].collection_name
+
+    def collection_metadata(self) -> dict[str, Any]:
+        # Shards record their signature on first upsert; an empty shard has none yet.
+        metadatas = [shard.collection_metadata() for shard in self.shards]
+        return next((m for m in metadatas if m.get("embed_model")), metadatas[0])
+
+    def collection_state(self) -> dict[str, Any]:
+        state = self.shards[0].collection_state()
+        metadata = self.collection_metadata()
+        state.update({"embed_model": metadata.get("embed_model"), "embed_dim": metadata.get("embed_dim")})
+        return state
+
+    def create_shadow(self, label: str = "shadow", *, settings: Settings | None = None) -> ShardedVectorStore:
+        # One shared name, so promote() can swap every shard to the same generation.
+        self._check_writable()
+        name = shadow_collection_name(self.settings.CHROMA_COLLECTION, label)
+        base = settings or self.settings
+        return ShardedVectorStore(
+            base,
+            shards=[
+                ChromaVectorStore(shard_settings(base, i), collection_name=name, client=shard._client)
+                for i, shard in enumerate(self.shards)
+            ],
+        )
+
+    def promote(self, name: str) -> dict[str, Any]:
+        for shard in self.shards:
+            shard.promote(name)
+        return self.collection_state()
+
+    def rollback(self) -> dict[str, Any]:
+        for shard in self.shards:
+            shard.rollback()
+        return self.collection_state()
+
+    def gc_retired(self, grace_seconds: float) -> list[str]:
+        deleted = [shard.gc_retired(grace_seconds) for shard in self.shards]
+        return list(dict.fromkeys(itertools.chain.from_iterable(deleted)))
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+        self._executor.shutdown(wait=False)
+
+    def drop(self) -> None:
+        for shard in self.shards:
+            shard.drop()
+
+    def iter_chunks(
+        self, *, batch_size: int = 500, where: dict[str, Any] | None = None, include_embeddings: bool = False
+    ) -> Iterator[list[RetrievedChunk]]:
+        for shard in self.shards:
+            yield from shard.iter_chunks(batch_size=batch_size, where=where, include_embeddings=include_embeddings)
+
+    def upsert_chunks(self, chunks: Sequence[Chunk], embeddings: Sequence[Sequence[float]]) -> None:
+        routed: dict[int, list[int]] = defaultdict(list)
+        for position, chunk in enumerate(chunks):
+            routed[self._shard_index(chunk.metadata, chunk.chunk_id)].append(position)
+        for index, positions in routed.items():
+            self.shards[index].upsert_chunks([chunks[i] for i in positions], [embeddings[i] for i in positions])
+
+    def upsert_raw(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str | None],
+        metadatas: Sequence[dict[str, Any]],
+        embeddings: Any,
+    ) -> None:
+        routed: dict[int, list[int]] = defaultdict(list)
+        for position, (chunk_id, metadata) in enumerate(zip(ids, metadatas)):
+            routed[self._shard_index(metadata, chunk_id)].append(position)
+        for index, positions in routed.items():
+            self.shards[index].upsert_raw(
+                [ids[i] for i in positions],
+                [documents[i] for i in positions],
+                [metadatas[i] for i in positions],
+                [embeddings[i] for i in positions],
+            )
+
+    def query(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        *,
+        include_embeddings: bool = False,
+        filters: RetrievalFilters | None = None,
+        include_text: bool = True,
+    ) -> list[RetrievedChunk]:
+        def search(shard: ChromaVectorStore) -> list[RetrievedChunk]:
+            started = time.perf_counter()
+            try:
+                chunks = shard.query(query_embedding, top_k, include_embeddings=include_embeddings, filters=filters, include_text=False)
+            finally:
+                self._latency.observe(shard.settings.CHROMA_DIR, (time.perf_counter() - started) * 1000)
+            index = self.shards.index(shard)
+            for chunk in chunks:
+                chunk.shard = index
+            return chunks
+
+        started = time.perf_counter()
+        merged = sorted(itertools.chain.from_iterable(self._fan_out(search)), key=lambda chunk: chunk.distance)
+        self._latency.observe("query", (time.perf_counter() - started) * 1000)
+        if include_text:
+            self.load_texts(merged[:top_k])
+        return merged[:top_k]
+
+    def load_texts(self, chunks: Sequence[RetrievedChunk]) -> None:
+        # A shared chunk stays in its original shard when a delete hands it to another owner, so
+        # its doc_id no longer names the shard; query() records the shard each chunk came from.
+        routed: dict[int, list[RetrievedChunk]] = defaultdict(list)
+        for chunk in chunks:
+            index = chunk.shard if chunk.shard is not None else self._shard_index(chunk.metadata, chunk.chunk_id)
+            routed[index].append(chunk)
+        for index, group in routed.items():
+            self.shards[index].load_texts(group)
+
+    def find_chunk_ids_by_hash(self, hashes: Sequence[str]) -> dict[str, list[str]]:
+        found: dict[str, list[str]] = {}
+        for partial in self._fan_out(lambda shard: shard.find_chunk_ids_by_hash(hashes)):
+            for digest, chunk_ids in partial.items():
+                found.setdefault(digest, []).extend(chunk_ids)
+        return found
+
+    def existing_chunk_ids(self, ids: Sequence[str]) -> set[str]:
+        return set().union(*self._fan_out(lambda shard: shard.existing_chunk_ids(ids)))
+
+    def add_doc_refs(self, refs: dict[str, dict[str, int]]) -> None:
+        # Each shard only updates the chunk ids it holds.
+        for shard in self.shards:
+            shard.add_doc_refs(refs)
+
+    def remove_doc_refs(
+        self, removals: dict[str, set[str]], *, sources: dict[str, tuple[str, str]] | None = None
+    ) -> dict[str, int]:
+        totals = {"chunks_deleted": 0, "chunks_updated": 0}
+        for shard in self.shards:
+            for key, value in shard.remove_doc_refs(removals, sources=sources).items():
+                totals[key] += value
+        return totals
+
+    def delete_by_doc_id(self, doc_id: str, *, sources: dict[str, tuple[str, str]] | None = None) -> dict[str, int]:
+        totals = {"chunks_deleted": 0, "chunks_updated": 0}
+        for shard in self.shards:
+            for key, value in shard.delete_by_doc_id(doc_id, sources=sources).items():
+                totals[key] += value
+        return totals
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards)
+
+    def reset_collection(self) -> int:
+        empty = self.create_shadow("reset")
+        self.promote(empty.collection_name)
+        return self.count()
+
+    def _docstore_stats(self) -> dict[str, Any]:
+        stats = [shard.docstore.stats() for shard in self.shards]
+        totals = {key: sum(s[key] for s in stats) for key in ("cached_chunks", "hits", "misses")}
+        lookups = totals["hits"] + totals["misses"]
+        return {**totals, "hit_rate": round(totals["hits"] / lookups, 4) if lookups else 0.0}
+
+    def runtime_stats(self) -> dict[str, Any]:
+        return {
+            "shard_count": len(self.shards),
+            "docstore": self._docstore_stats(),
+            "query": query_latency_stats(self._latency, "query"),
+            "hnsw": self.hnsw_config(),
+            "shards": [
+                {
+                    "shard": i,
+                    "collection": shard.collection_name,
+                    "count": shard.count(),
+                    **query_latency_stats(self._latency, shard.settings.CHROMA_DIR),
+                }
+                for i, shard in enumerate(self.shards)
+            ],
+        }
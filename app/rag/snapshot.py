@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from app.core.config import Settings
+from app.db.sqlite import ingested_source_map, record_ingested_sources
+from app.rag.centroids import refresh_doc_centroids
+from app.rag.vector_store import ChromaVectorStore
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _columns(page: list[Any]) -> dict[str, Any]:
+    # Column-oriented metadata: one list per key, None where a chunk lacks the key. Dedup
+    # `ref:*` keys make rows sparse, which gzip absorbs well.
+    keys = sorted({key for chunk in page for key in chunk.metadata})
+    return {
+        "ids": [chunk.chunk_id for chunk in page],
+        "documents": [chunk.text for chunk in page],
+        "metadata": {key: [chunk.metadata.get(key) for chunk in page] for key in keys},
+    }
+
+
+def _rows(columns: dict[str, Any]) -> list[dict[str, Any]]:
+    metadata: dict[str, list[Any]] = columns["metadata"]
+    rows: list[dict[str, Any]] = []
+    for i in range(len(columns["ids"])):
+        rows.append({key: values[i] for key, values in metadata.items() if values[i] is not None})
+    return rows
+
+
+def _write_member(archive: zipfile.ZipFile, name: str, payload: bytes, checksums: dict[str, str]) -> None:
+    checksums[name] = hashlib.sha256(payload).hexdigest()
+    archive.writestr(name, payload, compress_type=zipfile.ZIP_STORED)
+
+
+def _overall_checksum(checksums: dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(checksums):
+        digest.update(f"{name}:{checksums[name]}\n".encode("ascii"))
+    return digest.hexdigest()
+
+
+def export_snapshot(settings: Settings, store: ChromaVectorStore, path: Path) -> dict[str, Any]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    collection_meta = store.collection_metadata()
+    checksums: dict[str, str] = {}
+    shards: list[dict[str, Any]] = []
+    dim: int | None = None
+    sources: dict[str, tuple[str, str]] = {}
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w") as archive:
+        for index, page in enumerate(store.iter_chunks(batch_size=settings.SNAPSHOT_SHARD_SIZE, include_embeddings=True)):
+            vectors = np.asarray([chunk.embedding for chunk in page], dtype=np.float16)
+            dim = int(vectors.shape[1])
+            buffer = io.BytesIO()
+            np.save(buffer, vectors, allow_pickle=False)
+            vectors_name = f"vectors-{index:05d}.npy"
+            columns_name = f"columns-{index:05d}.json.gz"
+            _write_member(archive, vectors_name, buffer.getvalue(), checksums)
+            _write_member(archive, columns_name, gzip.compress(json.dumps(_columns(page)).encode("utf-8")), checksums)
+            shards.append({"vectors": vectors_name, "columns": columns_name, "count": len(page)})
+            for chunk in page:
+                if chunk.metadata.get("doc_id"):
+                    owner = str(chunk.metadata["doc_id"])
+                    sources[owner] = (str(chunk.metadata.get("source_type") or "local"), str(chunk.metadata.get("source") or owner))
+        sources.update(ingested_source_map(settings.sqlite_path, tenant=settings.TENANT))
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": time.time(),
+            "collection": store.collection_name,
+            "embed_model": collection_meta.get("embed_model") or settings.OLLAMA_EMBED_MODEL,
+            "embed_dim": dim or collection_meta.get("embed_dim"),
+            "chunk_size": collection_meta.get("chunk_size", settings.CHUNK_SIZE),
+            "chunk_overlap": collection_meta.get("chunk_overlap", settings.CHUNK_OVERLAP),
+            "count": sum(shard["count"] for shard in shards),
+            "shards": shards,
+            "sources": [[doc_id, source_type, source] for doc_id, (source_type, source) in sorted(sources.items())],
+            "checksums": checksums,
+            "checksum": _overall_checksum(checksums),
+        }
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    tmp_path.replace(path)
+    return manifest
+
+
+def read_manifest(path: Path) -> dict[str, Any]:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = dict(json.loads(archive.read(MANIFEST_NAME)))
+    except (zipfile.BadZipFile, KeyError) as exc:
+        raise SnapshotError(f"Not a snapshot archive: {exc}") from exc
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+    if _overall_checksum(manifest.get("checksums", {})) != manifest.get("checksum"):
+        raise SnapshotError("Snapshot manifest checksum mismatch.")
+    return manifest
+
+
+def iter_snapshot_shards(path: Path, manifest: dict[str, Any]) -> Iterator[tuple[dict[str, Any], np.ndarray]]:
+    # One shard in memory at a time; each member is verified before it is used.
+    with zipfile.ZipFile(path) as archive:
+        for shard in manifest["shards"]:
+            payloads = {}
+            for key in ("vectors", "columns"):
+                name = shard[key]
+                payload = archive.read(name)
+                if hashlib.sha256(payload).hexdigest() != manifest["checksums"].get(name):
+                    raise SnapshotError(f"Checksum mismatch in {name}.")
+                payloads[key] = payload
+            vectors = np.load(io.BytesIO(payloads["vectors"]), allow_pickle=False)
+            columns = json.loads(gzip.decompress(payloads["columns"]))
+            yield columns, vectors
+
+
+def import_snapshot(settings: Settings, store: ChromaVectorStore, path: Path, *, replace: bool = True) -> dict[str, Any]:
+    # replace=True loads into a shadow collection and swaps it in (the old index stays
+    # available for rollback); replace=False upserts into the live collection.
+    manifest = read_manifest(path)
+    live_meta = store.collection_metadata()
+    if not replace and store.count() > 0 and live_meta.get("embed_model"):
+        if (live_meta["embed_model"], live_meta.get("embed_dim")) != (manifest["embed_model"], manifest["embed_dim"]):
+            raise SnapshotError(
+                f"Snapshot vectors ({manifest['embed_model']}, dim {manifest['embed_dim']}) do not match the live "
+                f"collection ({live_meta['embed_model']}, dim {live_meta.get('embed_dim')})."
+            )
+    target = store.create_shadow("snapshot") if replace else store
+    started = time.perf_counter()
+    loaded = 0
+    try:
+        if replace or not live_meta.get("embed_model"):
+            target.update_collection_metadata(
+                embed_model=manifest["embed_model"],
+                embed_dim=manifest["embed_dim"],
+                chunk_size=manifest["chunk_size"],
+                chunk_overlap=manifest["chunk_overlap"],
+            )
+        for columns, vectors in iter_snapshot_shards(path, manifest):
+            target.upsert_raw(columns["ids"], columns["documents"], _rows(columns), vectors.astype(np.float32))
+            loaded += len(columns["ids"])
+        if settings.RETRIEVAL_TWO_STAGE_ENABLED:
+            refresh_doc_centroids(settings, target)
+    except Exception:
+        if replace:
+            target.drop()
+        raise
+    if replace:
+        store.promote(target.collection_name)
+    # Registers the snapshot's documents so orphan GC does not treat them as deleted.
+    by_type: dict[str, dict[str, str]] = {}
+    for doc_id, source_type, source in manifest.get("sources", []):
+        by_type.setdefault(source_type, {})[doc_id] = source
+    for source_type, type_sources in by_type.items():
+        record_ingested_sources(
+            settings.sqlite_path, source_type=source_type, sources=type_sources, tenant=settings.TENANT
+        )
+    elapsed = time.perf_counter() - started
+    return {
+        "chunks": loaded,
+        "vector_count": store.count(),
+        "collection": store.collection_name,
+        "embed_model": manifest["embed_model"],
+        "embed_dim": manifest["embed_dim"],
+        "checksum": manifest["checksum"],
+        "embed_model_matches_config": manifest["embed_model"] == settings.OLLAMA_EMBED_MODEL,
+        "chunks_per_sec": round(loaded / elapsed, 2) if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from app.core.config import Settings
+from app.db.sqlite import list_tenants
+from app.rag.resilience import LatencyTracker
+from app.rag.sharded_store import open_vector_store
+from app.rag.vector_store import ChromaVectorStore, query_latency_stats
+
+logger = logging.getLogger(__name__)
+
+TENANT_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+# Resident bytes per vector besides the float32 embedding and its level-0 HNSW links (2*M
+# neighbour ids of 4 bytes): label and id bookkeeping.
+HNSW_BOOKKEEPING_BYTES = 64
+
+
+class TenantError(ValueError):
+    pass
+
+
+def validate_tenant(settings: Settings, name: str) -> str:
+    tenant = name.strip().lower()
+    if not TENANT_NAME_PATTERN.match(tenant):
+        raise TenantError("Tenant names are 1-32 characters of a-z, 0-9, '-' or '_'.")
+    allowed = settings.tenant_names
+    if allowed and tenant != settings.TENANT and tenant not in allowed:
+        raise TenantError(f"Unknown tenant: {tenant}")
+    return tenant
+
+
+def tenant_settings(settings: Settings, tenant: str) -> Settings:
+    # A tenant's index gets its own directory (pointer, docstore, generation file) and a distinct
+    # collection name, which also keys its centroids and separates it on a Chroma server.
+    if tenant == settings.TENANT:
+        return settings
+    return settings.model_copy(
+        update={
+            "TENANT": tenant,
+            "CHROMA_DIR": str(settings.chroma_dir / "tenants" / tenant),
+            "CHROMA_COLLECTION": f"{settings.CHROMA_COLLECTION}__t_{tenant}",
+        }
+    )
+
+
+def estimate_index_bytes(count: int, dim: int, m: int = 16) -> int:
+    return count * (dim * 4 + 2 * m * 4 + HNSW_BOOKKEEPING_BYTES)
+
+
+class TenantRegistry:
+    # Stores for tenants other than settings.TENANT, opened on first use. When the estimated
+    # resident size of the open tenant indexes exceeds TENANT_MEMORY_BUDGET_MB, the least recently
+    # used ones that have been idle for TENANT_EVICT_IDLE_SECONDS are closed. Latency history and
+    # the last measured size outlive the store so metrics cover evicted tenants too. Stores leased
+    # by a request or pinned by a background job are never evicted. Opening and measuring stores
+    # happen outside the registry lock, so a slow open does not stall requests for other tenants.
+    def __init__(self, settings: Settings, *, read_only: bool = False) -> None:
+        self.settings = settings
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._open: dict[str, ChromaVectorStore] = {}
+        self._opening: dict[str, threading.Event] = {}
+        self._latency: dict[str, LatencyTracker] = {}
+        self._sizes: dict[str, dict[str, int]] = {}
+        self._loads: dict[str, int] = {}
+        self.evictions = 0
+
+    def store(self, tenant: str) -> ChromaVectorStore:
+        # Unpinned: callers that keep using the store should hold a lease() instead.
+        with self.lease(tenant) as store:
+            return store
+
+    @contextmanager
+    def lease(self, tenant: str) -> Iterator[ChromaVectorStore]:
+        store = self._acquire(tenant)
+        try:
+            yield store
+        finally:
+            store.unpin()
+
+    def _acquire(self, tenant: str) -> ChromaVectorStore:
+        while True:
+            with self._lock:
+                store = self._open.get(tenant)
+                if store is not None:
+                    store.pin()
+                    return store
+                opening = self._opening.get(tenant)
+                if opening is None:
+                    opening = self._opening[tenant] = threading.Event()
+                    latency = self._latency.setdefault(tenant, LatencyTracker())
+                    break
+            # Another request is opening this tenant; use its store once it is in.
+            opening.wait()
+        try:
+            store = open_vector_store(tenant_settings(self.settings, tenant), read_only=self.read_only, latency=latency)
+        except BaseException:
+            with self._lock:
+                self._opening.pop(tenant).set()
+            raise
+        with self._lock:
+            self._open[tenant] = store
+            self._loads[tenant] = self._loads.get(tenant, 0) + 1
+            store.pin()
+            self._opening.pop(tenant).set()
+        self._enforce_budget()
+        return store
+
+    def _measure(self, store: ChromaVectorStore) -> dict[str, int]:
+        count = store.count()
+        dim = int(store.collection_metadata().get("embed_dim") or 0)
+        size = estimate_index_bytes(count, dim, store.hnsw_config()["M"] or self.settings.HNSW_M)
+        return {"vector_count": count, "estimated_bytes": size}
+
+    def _measure_open(self) -> dict[str, int]:
+        # Stores stay pinned while counted so an eviction running meanwhile cannot close them.
+        with self._lock:
+            stores = dict(self._open)
+            for store in stores.values():
+                store.pin()
+        try:
+            sizes = {tenant: self._measure(store) for tenant, store in stores.items()}
+        finally:
+            for store in stores.values():
+                store.unpin()
+        with self._lock:
+            self._sizes.update(sizes)
+        return {tenant: size["estimated_bytes"] for tenant, size in sizes.items()}
+
+    def _enforce_budget(self) -> list[str]:
+        sizes = self._measure_open()
+        total = sum(sizes.values())
+        budget = self.settings.TENANT_MEMORY_BUDGET_MB * 1024 * 1024
+        now = time.monotonic()
+        evicted: dict[str, ChromaVectorStore] = {}
+        with self._lock:
+            for tenant in sorted(self._open, key=lambda name: self._open[name].last_used):
+                if total <= budget:
+                    break
+                store = self._open[tenant]
+                if tenant not in sizes or store.pins or now - store.last_used < self.settings.TENANT_EVICT_IDLE_SECONDS:
+                    continue
+                evicted[tenant] = self._open.pop(tenant)
+                total -= sizes[tenant]
+            self.evictions += len(evicted)
+        for store in evicted.values():
+            store.close_when_released()
+        if evicted:
+            logger.info("Evicted tenant indexes", extra={"tenants": sorted(evicted), "resident_bytes": total})
+        return sorted(evicted)
+
+    def known(self, tenant: str) -> bool:
+        # A tenant exists once its index has been opened here or by another process, or once it
+        # has ingested sources.
+        with self._lock:
+            if tenant in self._open:
+                return True
+        return tenant_settings(self.settings, tenant).chroma_dir.is_dir() or tenant in list_tenants(self.settings.sqlite_path)
+
+    def loaded(self) -> list[str]:
+        with self._lock:
+            return sorted(self._open)
+
+    def stats(self, default_store: ChromaVectorStore) -> dict[str, Any]:
+        resident = sum(self._measure_open().values())
+        default_measure = self._measure(default_store)
+        default_size = default_measure["estimated_bytes"]
+        with self._lock:
+            self._sizes[self.settings.TENANT] = default_measure
+            loaded = set(self._open)
+            sizes = {tenant: dict(size) for tenant, size in self._sizes.items()}
+            trackers = dict(self._latency)
+            loads = dict(self._loads)
+        names = sorted({self.settings.TENANT, *sizes, *list_tenants(self.settings.sqlite_path)})
+        tenants: list[dict[str, Any]] = []
+        for name in names:
+            default = name == self.settings.TENANT
+            size = sizes.get(name, {})
+            if default:
+                latency = default_store.runtime_stats()["query"]
+            elif name in trackers:
+                latency = query_latency_stats(trackers[name], "query")
+            else:
+                latency = {"queries": 0}
+            tenants.append(
+                {
+                    "tenant": name,
+                    "loaded": default or name in loaded,
+                    "loads": 1 if default else loads.get(name, 0),
+                    "vector_count": size.get("vector_count"),
+                    "estimated_mb": round(size["estimated_bytes"] / 1024 / 1024, 3) if size else None,
+                    **latency,
+                }
+            )
+        return {
+            "budget_mb": self.settings.TENANT_MEMORY_BUDGET_MB,
+            "resident_mb": round(resident / 1024 / 1024, 3),
+            "default_tenant_mb": round(default_size / 1024 / 1024, 3),
+            "evictions": self.evictions,
+            "tenants": tenants,
+        }
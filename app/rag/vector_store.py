@@ -1,63 +1,746 @@
 from __future__ import annotations
 
-from typing import Sequence
-
-import chromadb
-from chromadb.api.models.Collection import Collection
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
 
 from app.core.config import Settings
-from app.rag.models import Chunk, RetrievedChunk
+from app.rag.dedup import ref_key
+from app.rag.docstore import close_docstore, open_docstore
+from app.rag.models import Chunk, RetrievalFilters, RetrievedChunk
+from app.rag.resilience import LatencyTracker
+
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILENAME = "collections.json"
+GENERATION_FILENAME = "generation"
+POINTER_COLLECTION_SUFFIX = "__pointer"
+SOURCE_PREFIX_DEPTH = 6
+# A system replaced by a reload may still serve a query that started just before the swap.
+RETIRED_SYSTEM_GRACE_SECONDS = 5.0
+
+_stores: weakref.WeakSet[ChromaVectorStore] = weakref.WeakSet()
+_retired_systems: list[tuple[Any, float]] = []
+_retired_lock = threading.Lock()
+_http_clients: dict[tuple[str, tuple[tuple[str, str], ...]], Any] = {}
+_http_clients_lock = threading.Lock()
+
+
+def source_segments(source: str) -> list[str]:
+    return [part for part in source.replace("\\", "/").split("/") if part]
+
+
+def source_prefix_metadata(source: str) -> dict[str, str]:
+    # Chroma metadata filters have no string prefix operator, so each leading path segment
+    # prefix is stored under its own key and a prefix filter becomes an equality match.
+    parts = source_segments(source)
+    return {f"source_p{depth}": "/".join(parts[:depth]) for depth in range(1, min(len(parts), SOURCE_PREFIX_DEPTH) + 1)}
+
+
+def shadow_collection_name(base: str, label: str) -> str:
+    return f"{base}__{label}_{time.strftime('%Y%m%d%H%M%S')}{int(time.time() * 1000) % 1000:03d}"
+
+
+def query_latency_stats(tracker: LatencyTracker, key: str) -> dict[str, Any]:
+    p50 = tracker.threshold_ms(key, percentile=0.5, min_samples=1)
+    p95 = tracker.threshold_ms(key, percentile=0.95, min_samples=1)
+    return {
+        "queries": tracker.samples(key),
+        "latency_p50_ms": round(p50, 2) if p50 is not None else None,
+        "latency_p95_ms": round(p95, 2) if p95 is not None else None,
+    }
+
+
+def doc_refs(metadata: dict[str, Any]) -> dict[str, int]:
+    # doc_id -> chunk position for every document sharing this chunk; chunks written before
+    # dedup refs existed only carry their owner.
+    refs = {key[4:]: int(value) for key, value in metadata.items() if key.startswith("ref:")}
+    if not refs and metadata.get("doc_id"):
+        refs = {str(metadata["doc_id"]): int(metadata.get("chunk_index", 0))}
+    return refs
+
+
+class ReadOnlyStoreError(RuntimeError):
+    pass
+
+
+def open_persistent_client(path: Path, *, reload: bool = False) -> Any:
+    # Deferred so that importing the app (or a script that never opens the index) does not pay
+    # for chromadb's import.
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+
+    if reload:
+        # chromadb shares one system (and its in-memory HNSW segments) per path within a
+        # process; dropping it is the only way to see vectors another process has written.
+        # Stores may still hold the old one, so it is stopped later by stop_retired_systems().
+        retired = SharedSystemClient._identifier_to_system.pop(str(path), None)
+        if retired is not None:
+            with _retired_lock:
+                _retired_systems.append((retired, time.monotonic()))
+    return chromadb.PersistentClient(path=str(path))
+
+
+def stop_retired_systems() -> int:
+    # Stops systems dropped by a reload once no open store's client uses them, which frees their
+    # HNSW segments and SQLite handles.
+    now = time.monotonic()
+    with _retired_lock:
+        if not _retired_systems:
+            return 0
+        from chromadb.api import ServerAPI
+
+        # A client looks its system up by path, but keeps the server API it was created with.
+        in_use = {id(getattr(store._client, "_server", None)) for store in list(_stores)}
+        stopped = [
+            (system, retired_at)
+            for system, retired_at in _retired_systems
+            if id(system.instance(ServerAPI)) not in in_use and now - retired_at >= RETIRED_SYSTEM_GRACE_SECONDS
+        ]
+        for entry in stopped:
+            _retired_systems.remove(entry)
+    for system, _ in stopped:
+        system.stop()
+    return len(stopped)
+
 
+def release_persistent_client(path: Path) -> None:
+    # Stops this process's chromadb system for the path, which frees its HNSW segments; the next
+    # open_persistent_client() loads them again from disk.
+    from chromadb.api.client import SharedSystemClient
 
-class ChromaVectorStore:
-    def __init__(self, settings: Settings) -> None:
+    system = SharedSystemClient._identifier_to_system.pop(str(path), None)
+    if system is not None:
+        system.stop()
+
+
+def open_http_client(settings: Settings) -> Any:
+    # Each chromadb.HttpClient opens its own keep-alive connection pool, so stores for the same
+    # server (tenants, shadows) share one client instead of a pool each. TLS verification and
+    # auth come from chromadb's own settings (CHROMA_SERVER_SSL_VERIFY, CHROMA_CLIENT_AUTH_*).
+    import chromadb
+    import httpx
+
+    headers = settings.chroma_http_headers
+    key = (settings.CHROMA_HTTP_URL, tuple(sorted(headers.items())))
+    with _http_clients_lock:
+        client = _http_clients.get(key)
+        if client is None:
+            url = httpx.URL(settings.CHROMA_HTTP_URL)
+            client = _http_clients[key] = chromadb.HttpClient(
+                host=url.host,
+                port=url.port or (443 if url.scheme == "https" else 80),
+                ssl=url.scheme == "https",
+                headers=headers,
+            )
+        return client
+
+
+def open_client(settings: Settings) -> Any:
+    if settings.VECTOR_STORE_BACKEND == "http":
+        return open_http_client(settings)
+    return open_persistent_client(settings.chroma_dir)
+
+
+def build_where(filters: RetrievalFilters | None) -> dict[str, Any] | None:
+    if filters is None or filters.is_empty():
+        return None
+    clauses: list[dict[str, Any]] = []
+    if filters.doc_ids:
+        doc_clauses: list[dict[str, Any]] = [{"doc_id": {"$in": list(filters.doc_ids)}}]
+        doc_clauses.extend({ref_key(doc_id): {"$gte": 0}} for doc_id in filters.doc_ids)
+        clauses.append({"$or": doc_clauses})
+    if filters.source_prefix:
+        parts = source_segments(filters.source_prefix)
+        if not parts:
+            raise ValueError("source_prefix must contain at least one path segment.")
+        if len(parts) > SOURCE_PREFIX_DEPTH:
+            raise ValueError(f"source_prefix supports at most {SOURCE_PREFIX_DEPTH} path segments.")
+        clauses.append({f"source_p{len(parts)}": "/".join(parts)})
+    if filters.source_type:
+        clauses.append({"source_type": filters.source_type})
+    if filters.ingested_after is not None:
+        clauses.append({"ingested_at": {"$gte": float(filters.ingested_after)}})
+    if filters.ingested_before is not None:
+        clauses.append({"ingested_at": {"$lt": float(filters.ingested_before)}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class StorePins:
+    # Pin bookkeeping shared by every store type; subclasses provide close().
+    def _init_pins(self) -> None:
+        self.pins = 0
+        self._pin_lock = threading.Lock()
+        self._close_on_release = False
+
+    def pin(self) -> None:
+        with self._pin_lock:
+            self.pins += 1
+
+    def unpin(self) -> None:
+        with self._pin_lock:
+            self.pins -= 1
+            if self.pins == 0 and self._close_on_release:
+                self._close_on_release = False
+                self.close()
+
+    @contextmanager
+    def pinned(self) -> Iterator[None]:
+        # Requests and background jobs hold the store while they use it; the tenant registry
+        # never evicts a pinned store, and one it drops meanwhile closes on the last release.
+        self.pin()
+        try:
+            yield
+        finally:
+            self.unpin()
+
+    def close_when_released(self) -> None:
+        with self._pin_lock:
+            if self.pins:
+                self._close_on_release = True
+            else:
+                self.close()
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class ChromaVectorStore(StorePins):
+    # The live collection is resolved through a pointer file in CHROMA_DIR so a reindex can build
+    # a shadow collection and swap it in atomically, in this and in other processes. With the http
+    # backend the index lives on a Chroma server shared by every API node, so the pointer is kept
+    # in the metadata of a small collection on that server and chunk text stays in Chroma instead
+    # of the node-local docstore.
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        collection_name: str | None = None,
+        client: Any | None = None,
+        read_only: bool = False,
+        latency: LatencyTracker | None = None,
+    ) -> None:
         settings.chroma_dir.mkdir(parents=True, exist_ok=True)
-        self._client = chromadb.PersistentClient(path=str(settings.chroma_dir))
-        self._collection: Collection = self._client.get_or_create_collection(
-            name=settings.CHROMA_COLLECTION,
-            metadata={"hnsw:space": "cosine"},
+        self.settings = settings
+        self.read_only = read_only
+        self.remote = settings.VECTOR_STORE_BACKEND == "http"
+        self._client = client or open_client(settings)
+        self._pointer_path = settings.chroma_dir / POINTER_FILENAME
+        self._generation_path = settings.chroma_dir / GENERATION_FILENAME
+        self._generation_version = self._stat_version(self._generation_path)
+        self._generation_checked = time.monotonic()
+        self._pinned = collection_name is not None
+        self._pointer_version: Any = None
+        self._pointer_checked = time.monotonic()
+        self._lock = threading.Lock()
+        self._latency = latency or LatencyTracker()
+        self.last_used = time.monotonic()
+        self._init_pins()
+        self.docstore = open_docstore(
+            settings.chroma_dir, cache_size=settings.DOCSTORE_CACHE_SIZE, mmap_bytes=settings.DOCSTORE_MMAP_BYTES
         )
+        name = collection_name or self._read_pointer().get("active") or settings.CHROMA_COLLECTION
+        self._collection: Collection = self._open_collection(str(name))
+        _stores.add(self)
+        if not read_only:
+            self.set_search_ef(settings.HNSW_SEARCH_EF)
+
+    @staticmethod
+    def _stat_version(path: Path) -> tuple[int, int] | None:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise ReadOnlyStoreError("This worker opened the index read-only; writes go through the writer process.")
+
+    def _bump_generation(self) -> None:
+        # Tells read-only workers in other processes, and the replica publisher, that the index
+        # changed under them.
+        if self.settings.WORKER_MODE != "multi" and self.settings.REPLICA_ROLE != "publisher":
+            return
+        tmp_path = self._generation_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(str(time.time_ns()), encoding="utf-8")
+        os.replace(tmp_path, self._generation_path)
+
+    def _reload_if_stale(self) -> None:
+        now = time.monotonic()
+        if now - self._generation_checked < self.settings.INDEX_RELOAD_MIN_INTERVAL_SECONDS:
+            return
+        self._generation_checked = now
+        stop_retired_systems()
+        version = self._stat_version(self._generation_path)
+        if version == self._generation_version:
+            return
+        with self._lock:
+            self._generation_version = version
+            self._client = open_persistent_client(self.settings.chroma_dir, reload=True)
+            self._collection = self._client.get_collection(name=self._collection.name)
+        logger.info("Reloaded index after a write by another process", extra={"collection": self._collection.name})
+
+    def _open_collection(self, name: str) -> Collection:
+        return self._client.get_or_create_collection(
+            name=name,
+            metadata={
+                "hnsw:space": "cosine",
+                "hnsw:M": self.settings.HNSW_M,
+                "hnsw:construction_ef": self.settings.HNSW_CONSTRUCTION_EF,
+                "hnsw:search_ef": self.settings.HNSW_SEARCH_EF,
+                "chunk_size": self.settings.CHUNK_SIZE,
+                "chunk_overlap": self.settings.CHUNK_OVERLAP,
+            },
+        )
+
+    def _pointer_collection(self) -> Collection:
+        return self._client.get_or_create_collection(name=f"{self.settings.CHROMA_COLLECTION}{POINTER_COLLECTION_SUFFIX}")
+
+    def _read_pointer(self) -> dict[str, Any]:
+        if self.remote:
+            metadata = self._pointer_collection().metadata or {}
+            self._pointer_version = metadata.get("updated_ns")
+            return dict(json.loads(str(metadata.get("pointer") or "{}")))
+        try:
+            stat = self._pointer_path.stat()
+        except FileNotFoundError:
+            return {}
+        self._pointer_version = (stat.st_ino, stat.st_mtime_ns)
+        return dict(json.loads(self._pointer_path.read_text(encoding="utf-8")))
+
+    def _write_pointer(self, pointer: dict[str, Any]) -> None:
+        if self.remote:
+            version = time.time_ns()
+            self._pointer_collection().modify(metadata={"pointer": json.dumps(pointer), "updated_ns": version})
+            self._pointer_version = version
+            return
+        tmp_path = self._pointer_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(pointer, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self._pointer_path)
+        stat = self._pointer_path.stat()
+        self._pointer_version = (stat.st_ino, stat.st_mtime_ns)
+
+    def _sync_active(self) -> Collection:
+        # One stat() per call picks up swaps made by another process; the pointer is replaced
+        # atomically, so its inode changes on every write.
+        self.last_used = time.monotonic()
+        if self.read_only and not self.remote:
+            self._reload_if_stale()
+        if self._pinned:
+            return self._collection
+        if self.remote:
+            return self._sync_remote_active()
+        try:
+            stat = self._pointer_path.stat()
+        except FileNotFoundError:
+            return self._collection
+        if (stat.st_ino, stat.st_mtime_ns) != self._pointer_version:
+            with self._lock:
+                active = self._read_pointer().get("active")
+                if active and active != self._collection.name:
+                    self._collection = self._client.get_collection(name=str(active))
+        return self._collection
+
+    def _sync_remote_active(self) -> Collection:
+        # A pointer read is a round trip to the server, so it is rate-limited like index reloads.
+        now = time.monotonic()
+        if now - self._pointer_checked < self.settings.INDEX_RELOAD_MIN_INTERVAL_SECONDS:
+            return self._collection
+        self._pointer_checked = now
+        with self._lock:
+            active = self._read_pointer().get("active")
+            if active and active != self._collection.name:
+                self._collection = self._client.get_collection(name=str(active))
+        return self._collection
+
+    @property
+    def embed_model(self) -> str:
+        return str(self.collection_metadata().get("embed_model") or self.settings.OLLAMA_EMBED_MODEL)
+
+    def index_generation(self) -> str:
+        version = self._stat_version(self._generation_path)
+        return f"{self.collection_name}:{version[1] if version else 0}"
+
+    def update_collection_metadata(self, **values: Any) -> None:
+        self._check_writable()
+        collection = self._sync_active()
+        metadata = {k: v for k, v in (collection.metadata or {}).items() if not k.startswith("hnsw:")}
+        metadata.update(values)
+        # modify() replaces the whole metadata dict; the distance function lives in the
+        # collection configuration and cannot be re-sent.
+        collection.modify(metadata=metadata)
+        self._bump_generation()
+
+    def record_embedding_signature(self, model: str, dim: int) -> None:
+        self.update_collection_metadata(embed_model=model, embed_dim=dim)
+
+    def hnsw_config(self) -> dict[str, int | None]:
+        hnsw = (self._sync_active().configuration_json or {}).get("hnsw") or {}
+        return {
+            "M": hnsw.get("max_neighbors"),
+            "construction_ef": hnsw.get("ef_construction"),
+            "search_ef": hnsw.get("ef_search"),
+        }
+
+    def set_search_ef(self, ef_search: int) -> dict[str, int | None]:
+        # ef_search is persisted in the collection configuration, but an embedded index that is
+        # already loaded keeps searching with the value it was loaded with, so the client reopens.
+        if self.hnsw_config()["search_ef"] != ef_search:
+            self._check_writable()
+            collection = self._sync_active()
+            collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+            if not self.remote:
+                with self._lock:
+                    self._client = open_persistent_client(self.settings.chroma_dir, reload=True)
+                    self._collection = self._client.get_collection(name=collection.name)
+            self._bump_generation()
+        return self.hnsw_config()
+
+    @property
+    def collection_name(self) -> str:
+        return self._sync_active().name
+
+    def collection_metadata(self) -> dict[str, Any]:
+        return dict(self._sync_active().metadata or {})
+
+    def collection_state(self) -> dict[str, Any]:
+        pointer = self._read_pointer()
+        metadata = self.collection_metadata()
+        return {
+            "active": self.collection_name,
+            "embed_model": metadata.get("embed_model"),
+            "embed_dim": metadata.get("embed_dim"),
+            "previous": pointer.get("previous"),
+            "retired": list(pointer.get("retired", [])),
+            "collections": sorted(
+                c.name for c in self._client.list_collections() if not c.name.endswith(POINTER_COLLECTION_SUFFIX)
+            ),
+        }
+
+    def create_shadow(self, label: str = "shadow", *, settings: Settings | None = None) -> ChromaVectorStore:
+        self._check_writable()
+        name = shadow_collection_name(self.settings.CHROMA_COLLECTION, label)
+        return ChromaVectorStore(settings or self.settings, collection_name=name, client=self._client)
+
+    def promote(self, name: str) -> dict[str, Any]:
+        self._check_writable()
+        with self._lock:
+            new_collection = self._client.get_collection(name=name)
+            pointer = self._read_pointer()
+            old_name = self._collection.name
+            retired = [r for r in pointer.get("retired", []) if r.get("name") != name]
+            if old_name != name:
+                retired.append({"name": old_name, "retired_at": time.time()})
+            self._write_pointer({"active": name, "previous": old_name, "retired": retired})
+            self._collection = new_collection
+        self._bump_generation()
+        logger.info("Promoted Chroma collection", extra={"active": name, "previous": old_name})
+        return self.collection_state()
+
+    def rollback(self) -> dict[str, Any]:
+        pointer = self._read_pointer()
+        previous = pointer.get("previous")
+        if not previous:
+            raise ValueError("No previous collection to roll back to.")
+        try:
+            self._client.get_collection(name=str(previous))
+        except Exception as exc:
+            raise ValueError(f"Previous collection {previous} was already garbage-collected.") from exc
+        return self.promote(str(previous))
+
+    def gc_retired(self, grace_seconds: float) -> list[str]:
+        self._check_writable()
+        deleted: list[str] = []
+        with self._lock:
+            pointer = self._read_pointer()
+            if not pointer:
+                return deleted
+            now = time.time()
+            keep: list[dict[str, Any]] = []
+            for entry in pointer.get("retired", []):
+                name = str(entry.get("name"))
+                if name == pointer.get("active"):
+                    continue
+                if now - float(entry.get("retired_at", now)) < grace_seconds:
+                    keep.append(entry)
+                    continue
+                try:
+                    self._client.delete_collection(name=name)
+                except Exception:
+                    logger.warning("Could not delete retired collection", extra={"collection": name})
+                self.docstore.drop_collection(name)
+                deleted.append(name)
+            pointer["retired"] = keep
+            if pointer.get("previous") in deleted:
+                pointer["previous"] = None
+            self._write_pointer(pointer)
+        return deleted
+
+    def close(self) -> None:
+        if not self.remote:
+            release_persistent_client(self.settings.chroma_dir)
+        close_docstore(self.settings.chroma_dir)
+
+    def drop(self) -> None:
+        self._check_writable()
+        self._client.delete_collection(name=self._collection.name)
+        self.docstore.drop_collection(self._collection.name)
+
+    def load_texts(self, chunks: Sequence[RetrievedChunk]) -> None:
+        self._load_texts(self._sync_active(), chunks)
+
+    def _load_texts(self, collection: Collection, chunks: Sequence[RetrievedChunk]) -> None:
+        # Fills chunk text from the docstore. Collections written before the docstore existed
+        # still hold text in Chroma; those chunks are copied over on first read.
+        wanted = [chunk.chunk_id for chunk in chunks if not chunk.text]
+        if not wanted:
+            return
+        texts = {} if self.remote else self.docstore.get_many(collection.name, wanted)
+        legacy = [chunk_id for chunk_id in wanted if chunk_id not in texts]
+        if legacy:
+            result = collection.get(ids=legacy, include=["documents"])
+            backfill = [(chunk_id, text) for chunk_id, text in zip(result.get("ids", []), result.get("documents") or []) if text]
+            if not self.read_only and not self.remote:
+                self.docstore.put(collection.name, backfill)
+            texts.update(backfill)
+        for chunk in chunks:
+            if not chunk.text:
+                chunk.text = texts.get(chunk.chunk_id, "")
+
+    def iter_chunks(
+        self, *, batch_size: int = 500, where: dict[str, Any] | None = None, include_embeddings: bool = False
+    ) -> Iterator[list[RetrievedChunk]]:
+        collection = self._sync_active()
+        include = ["metadatas"] + (["embeddings"] if include_embeddings else [])
+        offset = 0
+        while True:
+            result = collection.get(where=where, limit=batch_size, offset=offset, include=include)
+            ids = result.get("ids", [])
+            if not ids:
+                return
+            embeddings = result.get("embeddings")
+            vectors = embeddings if include_embeddings and embeddings is not None else [None] * len(ids)
+            page = [
+                RetrievedChunk(
+                    chunk_id=chunk_id,
+                    text="",
+                    metadata=dict(metadata) if metadata else {},
+                    distance=0.0,
+                    embedding=[float(x) for x in vector] if vector is not None else None,
+                )
+                for chunk_id, metadata, vector in zip(ids, result.get("metadatas") or [], vectors)
+            ]
+            self._load_texts(collection, page)
+            yield page
+            offset += len(ids)
 
     def upsert_chunks(self, chunks: Sequence[Chunk], embeddings: Sequence[Sequence[float]]) -> None:
         if not chunks:
             return
-        self._collection.upsert(
-            ids=[chunk.chunk_id for chunk in chunks],
-            documents=[chunk.text for chunk in chunks],
-            metadatas=[chunk.metadata for chunk in chunks],
-            embeddings=[list(embed) for embed in embeddings],
-        )
+        self._check_writable()
+        collection = self._sync_active()
+        if "embed_model" not in (collection.metadata or {}):
+            self.record_embedding_signature(self.settings.OLLAMA_EMBED_MODEL, len(embeddings[0]))
+        if not self.remote:
+            self.docstore.put(collection.name, [(chunk.chunk_id, chunk.text) for chunk in chunks])
+        step = self._write_batch_size()
+        for i in range(0, len(chunks), step):
+            batch = chunks[i : i + step]
+            collection.upsert(
+                ids=[chunk.chunk_id for chunk in batch],
+                documents=[chunk.text for chunk in batch] if self.remote else None,
+                metadatas=[chunk.metadata for chunk in batch],
+                embeddings=[list(embed) for embed in embeddings[i : i + step]],
+            )
+        self._bump_generation()
+
+    def _write_batch_size(self) -> int:
+        # Remote writes are capped lower than the server's limit so one request stays short.
+        step = max(1, int(self._client.get_max_batch_size()))
+        return min(step, max(1, self.settings.CHROMA_HTTP_UPSERT_BATCH_SIZE)) if self.remote else step
 
-    def query(self, query_embedding: Sequence[float], top_k: int) -> list[RetrievedChunk]:
-        result = self._collection.query(
+    def upsert_raw(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str | None],
+        metadatas: Sequence[dict[str, Any]],
+        embeddings: Any,
+    ) -> None:
+        # Bulk path for pre-computed vectors (snapshots, offline embeddings); splits on the
+        # server's max batch size instead of the embed batch size.
+        self._check_writable()
+        collection = self._sync_active()
+        step = self._write_batch_size()
+        if not self.remote:
+            self.docstore.put(collection.name, [(chunk_id, text) for chunk_id, text in zip(ids, documents) if text])
+        for i in range(0, len(ids), step):
+            collection.upsert(
+                ids=list(ids[i : i + step]),
+                documents=[text or "" for text in documents[i : i + step]] if self.remote else None,
+                metadatas=[dict(m) if m else None for m in metadatas[i : i + step]],
+                embeddings=embeddings[i : i + step],
+            )
+        self._bump_generation()
+
+    def query(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        *,
+        include_embeddings: bool = False,
+        filters: RetrievalFilters | None = None,
+        include_text: bool = True,
+    ) -> list[RetrievedChunk]:
+        # include_text=False returns ids, metadata and distances only; callers fetch text for
+        # the chunks they keep with load_texts().
+        include = ["metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        if include_text and self.remote:
+            # Saves the second round trip load_texts() would make to the server.
+            include.append("documents")
+        collection = self._sync_active()
+        started = time.perf_counter()
+        result = collection.query(
             query_embeddings=[list(query_embedding)],
             n_results=top_k,
-            include=["documents", "metadatas", "distances"],
+            where=build_where(filters),
+            include=include,
         )
+        self._latency.observe("query", (time.perf_counter() - started) * 1000)
         ids = result.get("ids", [[]])[0]
-        docs = result.get("documents", [[]])[0]
         metas = result.get("metadatas", [[]])[0]
         distances = result.get("distances", [[]])[0]
+        embeddings = result.get("embeddings")
+        vectors = embeddings[0] if include_embeddings and embeddings is not None else [None] * len(ids)
+        documents = (result.get("documents") or [[]])[0] or [None] * len(ids)
         retrieved: list[RetrievedChunk] = []
-        for chunk_id, text, metadata, distance in zip(ids, docs, metas, distances):
+        for chunk_id, metadata, distance, vector, text in zip(ids, metas, distances, vectors, documents):
             retrieved.append(
                 RetrievedChunk(
                     chunk_id=chunk_id,
-                    text=text,
+                    text=text or "",
                     metadata=dict(metadata) if metadata else {},
                     distance=float(distance),
+                    embedding=[float(x) for x in vector] if vector is not None else None,
                 )
             )
+        if include_text:
+            self._load_texts(collection, retrieved)
         return retrieved
 
+    def find_chunk_ids_by_hash(self, hashes: Sequence[str]) -> dict[str, list[str]]:
+        found: dict[str, list[str]] = {}
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), 500):
+            result = self._sync_active().get(
+                where={"content_hash": {"$in": unique[i : i + 500]}},
+                include=["metadatas"],
+            )
+            for chunk_id, metadata in zip(result.get("ids", []), result.get("metadatas") or []):
+                if metadata and metadata.get("content_hash"):
+                    found.setdefault(str(metadata["content_hash"]), []).append(chunk_id)
+        return found
+
+    def existing_chunk_ids(self, ids: Sequence[str]) -> set[str]:
+        found: set[str] = set()
+        unique = list(dict.fromkeys(ids))
+        for i in range(0, len(unique), 500):
+            found.update(self._sync_active().get(ids=unique[i : i + 500], include=[]).get("ids", []))
+        return found
+
+    def add_doc_refs(self, refs: dict[str, dict[str, int]]) -> None:
+        if not refs:
+            return
+        self._check_writable()
+        ids = list(refs)
+        collection = self._sync_active()
+        result = collection.get(ids=ids, include=["metadatas"])
+        metadatas: list[dict[str, Any]] = []
+        for chunk_id, metadata in zip(result.get("ids", []), result.get("metadatas") or []):
+            merged = dict(metadata or {})
+            merged.update({ref_key(doc_id): index for doc_id, index in refs[chunk_id].items()})
+            merged["ref_count"] = sum(1 for key in merged if key.startswith("ref:"))
+            metadatas.append(merged)
+        if metadatas:
+            collection.update(ids=list(result.get("ids", [])), metadatas=metadatas)
+            self._bump_generation()
+
+    def remove_doc_refs(
+        self, removals: dict[str, set[str]], *, sources: dict[str, tuple[str, str]] | None = None
+    ) -> dict[str, int]:
+        # Drops the given documents from each chunk's refs. Chunks no document references any
+        # more are deleted; shared chunks whose owner was removed are handed to another ref
+        # (`sources` maps doc_id -> (source_type, source) for the new owner's fields).
+        self._check_writable()
+        collection = self._sync_active()
+        step = self._write_batch_size()
+        ids = list(removals)
+        to_delete: list[str] = []
+        update_ids: list[str] = []
+        patches: list[dict[str, Any]] = []
+        for i in range(0, len(ids), 500):
+            result = collection.get(ids=ids[i : i + 500], include=["metadatas"])
+            for chunk_id, metadata in zip(result.get("ids", []), result.get("metadatas") or []):
+                metadata = dict(metadata or {})
+                gone = removals[chunk_id]
+                remaining = {doc_id: index for doc_id, index in doc_refs(metadata).items() if doc_id not in gone}
+                if not remaining:
+                    to_delete.append(chunk_id)
+                    continue
+                patch: dict[str, Any] = {ref_key(doc_id): None for doc_id in gone if ref_key(doc_id) in metadata}
+                patch["ref_count"] = len(remaining)
+                if metadata.get("doc_id") in gone:
+                    owner = min(remaining)
+                    patch.update({"doc_id": owner, "chunk_index": remaining[owner]})
+                    if sources and owner in sources:
+                        source_type, source = sources[owner]
+                        patch.update({f"source_p{depth}": None for depth in range(1, SOURCE_PREFIX_DEPTH + 1)})
+                        patch.update({"source": source, "source_type": source_type, **source_prefix_metadata(source)})
+                update_ids.append(chunk_id)
+                patches.append(patch)
+        for i in range(0, len(to_delete), step):
+            collection.delete(ids=to_delete[i : i + step])
+        self.docstore.delete(collection.name, to_delete)
+        for i in range(0, len(update_ids), step):
+            collection.update(ids=update_ids[i : i + step], metadatas=patches[i : i + step])
+        if to_delete or update_ids:
+            self._bump_generation()
+        return {"chunks_deleted": len(to_delete), "chunks_updated": len(update_ids)}
+
+    def delete_by_doc_id(self, doc_id: str, *, sources: dict[str, tuple[str, str]] | None = None) -> dict[str, int]:
+        removals: dict[str, set[str]] = {}
+        for page in self.iter_chunks(where=build_where(RetrievalFilters(doc_ids=[doc_id]))):
+            removals.update({chunk.chunk_id: {doc_id} for chunk in page})
+        return self.remove_doc_refs(removals, sources=sources)
+
     def count(self) -> int:
-        return self._collection.count()
+        return self._sync_active().count()
+
+    def runtime_stats(self) -> dict[str, Any]:
+        latency = query_latency_stats(self._latency, "query")
+        shard = {"shard": 0, "collection": self.collection_name, "count": self.count(), **latency}
+        return {
+            "shard_count": 1,
+            "query": latency,
+            "shards": [shard],
+            "docstore": self.docstore.stats(),
+            "hnsw": self.hnsw_config(),
+        }
 
     def reset_collection(self) -> int:
-        name = self._collection.name
-        self._client.delete_collection(name=name)
-        self._collection = self._client.get_or_create_collection(
-            name=name,
-            metadata={"hnsw:space": "cosine"},
-        )
-        return self._collection.count()
+        # Swap to an empty collection instead of deleting in place; the old one stays
+        # available for rollback until the GC grace period ends.
+        empty = self.create_shadow("reset")
+        self.promote(empty.collection_name)
+        return self.count()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+# While a blue/green rebuild of an index directory runs, ingestion into it records the documents
+# it writes here so the rebuild can replay them into its shadow collection. For the final replay
+# and the pointer swap the rebuild pauses writes to that directory, so nothing lands in the old
+# collection after its last replay.
+_cond = threading.Condition()
+_journals: dict[str, set[str]] = {}
+_paused: set[str] = set()
+_active: dict[str, int] = {}
+
+
+@contextmanager
+def live_write(index_dir: str, doc_ids: Iterable[str]) -> Iterator[None]:
+    with _cond:
+        _cond.wait_for(lambda: index_dir not in _paused)
+        _active[index_dir] = _active.get(index_dir, 0) + 1
+        if index_dir in _journals:
+            _journals[index_dir].update(doc_ids)
+    try:
+        yield
+    finally:
+        with _cond:
+            _active[index_dir] -= 1
+            _cond.notify_all()
+
+
+def start_journal(index_dir: str) -> None:
+    with _cond:
+        _journals[index_dir] = set()
+
+
+def drain_journal(index_dir: str) -> set[str]:
+    with _cond:
+        drained = _journals.get(index_dir, set())
+        if index_dir in _journals:
+            _journals[index_dir] = set()
+        return drained
+
+
+def stop_journal(index_dir: str) -> set[str]:
+    with _cond:
+        return _journals.pop(index_dir, set())
+
+
+@contextmanager
+def writes_paused(index_dir: str) -> Iterator[None]:
+    # Waits for writes already in flight, which are journaled, and holds new ones until exit.
+    with _cond:
+        _paused.add(index_dir)
+        _cond.wait_for(lambda: not _active.get(index_dir))
+    try:
+        yield
+    finally:
+        with _cond:
+            _paused.discard(index_dir)
+            _cond.notify_all()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+
+from app.core.config import Settings
+from app.db.sqlite import record_ingested_sources, update_ingestion_job
+from app.rag.bulk_import import BULK_SOURCE_TYPE, bulk_upsert, iter_ndjson_records, iter_npy_records
+from app.rag.centroids import refresh_doc_centroids
+from app.rag.vector_store import ChromaVectorStore
+from app.services.reindex import exclusive_rebuild
+
+logger = logging.getLogger(__name__)
+
+
+def import_embedding_files(
+    settings: Settings,
+    store: ChromaVectorStore,
+    *,
+    records_path: Path,
+    vectors_path: Path | None = None,
+    embed_model: str | None = None,
+) -> dict[str, object]:
+    records = iter_ndjson_records(records_path) if vectors_path is None else iter_npy_records(vectors_path, records_path)
+    # Holding the rebuild lock keeps a concurrent blue/green swap from dropping these chunks.
+    with exclusive_rebuild(settings.TENANT):
+        summary, sources = bulk_upsert(settings, store, records, embed_model=embed_model)
+        if settings.RETRIEVAL_TWO_STAGE_ENABLED:
+            refresh_doc_centroids(settings, store, list(sources))
+    record_ingested_sources(
+        settings.sqlite_path, source_type=BULK_SOURCE_TYPE, sources=sources, tenant=settings.TENANT
+    )
+    return summary
+
+
+def run_bulk_import(
+    settings: Settings,
+    store: ChromaVectorStore,
+    *,
+    job_id: int,
+    records_path: Path,
+    vectors_path: Path | None = None,
+    embed_model: str | None = None,
+) -> None:
+    started = time.perf_counter()
+    update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=1)
+    try:
+        summary = import_embedding_files(
+            settings, store, records_path=records_path, vectors_path=vectors_path, embed_model=embed_model
+        )
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="success",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            summary=summary,
+        )
+    except Exception as exc:
+        logger.exception("Bulk embedding import failed", extra={"job_id": job_id})
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="error",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=str(exc),
+        )
+    finally:
+        records_path.unlink(missing_ok=True)
+        if vectors_path is not None:
+            vectors_path.unlink(missing_ok=True)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from app.core.config import Settings
+from app.db.sqlite import delete_document_centroids, delete_ingested_source, ingested_source_map
+from app.rag.centroids import refresh_doc_centroids
+from app.rag.ingestion import local_doc_ids
+from app.rag.vector_store import ChromaVectorStore, doc_refs
+from app.services.reindex import exclusive_rebuild, run_blue_green_rebuild
+
+
+def delete_document(settings: Settings, store: ChromaVectorStore, doc_id: str) -> dict[str, Any]:
+    with exclusive_rebuild(settings.TENANT):
+        sources_removed = delete_ingested_source(settings.sqlite_path, doc_id=doc_id, tenant=settings.TENANT)
+        removed = store.delete_by_doc_id(doc_id, sources=ingested_source_map(settings.sqlite_path, tenant=settings.TENANT))
+        delete_document_centroids(settings.sqlite_path, collection=store.collection_name, doc_ids=[doc_id])
+    return {"doc_id": doc_id, "sources_removed": sources_removed, **removed, "vector_count": store.count()}
+
+
+def find_orphan_refs(settings: Settings, store: ChromaVectorStore, *, cutoff: float) -> dict[str, set[str]]:
+    # A doc ref is orphaned when the document is neither in ingested_sources nor a file under
+    # DOCS_DIR. Chunks written after `cutoff` are skipped: upload jobs register their source
+    # only after the chunks land.
+    known = set(ingested_source_map(settings.sqlite_path, tenant=settings.TENANT)) | local_doc_ids(settings.docs_dir)
+    orphans: dict[str, set[str]] = {}
+    for page in store.iter_chunks():
+        for chunk in page:
+            if float(chunk.metadata.get("ingested_at", 0.0)) >= cutoff:
+                continue
+            gone = {doc_id for doc_id in doc_refs(chunk.metadata) if doc_id not in known}
+            if gone:
+                orphans[chunk.chunk_id] = gone
+    return orphans
+
+
+def copy_chunks(source: ChromaVectorStore, target: ChromaVectorStore, where: dict[str, Any] | None = None) -> dict[str, Any]:
+    copied = 0
+    for page in source.iter_chunks(batch_size=2000, where=where, include_embeddings=True):
+        target.upsert_raw(
+            [chunk.chunk_id for chunk in page],
+            [chunk.text for chunk in page],
+            [chunk.metadata for chunk in page],
+            [chunk.embedding for chunk in page],
+        )
+        copied += len(page)
+    return {"chunks": copied}
+
+
+def run_orphan_gc(settings: Settings, store: ChromaVectorStore, *, job_id: int) -> None:
+    # Deletes orphaned refs/chunks from the live collection, then compacts by copying the
+    # surviving vectors into a fresh collection: Chroma only marks HNSW deletions, so the old
+    # index keeps paying for them in memory and search time until it is rebuilt.
+    cutoff = time.time() - settings.INGEST_GC_MIN_AGE_SECONDS
+
+    def build(shadow: ChromaVectorStore, where: dict[str, Any] | None) -> dict[str, Any]:
+        if where is not None:
+            copied = copy_chunks(store, shadow, where)
+            if settings.RETRIEVAL_TWO_STAGE_ENABLED:
+                refresh_doc_centroids(settings, shadow)
+            return copied
+        orphans = find_orphan_refs(settings, store, cutoff=cutoff)
+        summary: dict[str, Any] = {
+            "orphan_refs": sum(len(docs) for docs in orphans.values()),
+            "orphan_docs": len(set().union(*orphans.values())) if orphans else 0,
+            **store.remove_doc_refs(orphans, sources=ingested_source_map(settings.sqlite_path, tenant=settings.TENANT)),
+        }
+        metadata = store.collection_metadata()
+        keep = ("embed_model", "embed_dim", "chunk_size", "chunk_overlap")
+        shadow.update_collection_metadata(**{key: metadata[key] for key in keep if key in metadata})
+        summary.update(copy_chunks(store, shadow))
+        if settings.RETRIEVAL_TWO_STAGE_ENABLED:
+            refresh_doc_centroids(settings, shadow)
+        return summary
+
+    run_blue_green_rebuild(settings, store, job_id=job_id, label="compact", build=build)
+
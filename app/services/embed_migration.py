@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from app.core.config import Settings
+from app.rag.batching import controller_from_settings, embed_chunks_adaptively
+from app.rag.centroids import refresh_doc_centroids
+from app.rag.models import Chunk
+from app.rag.ollama_client import OllamaClient
+from app.rag.scheduler import PRIORITY_BULK, priority_scope
+from app.rag.vector_store import ChromaVectorStore
+from app.services.reindex import run_blue_green_rebuild
+
+logger = logging.getLogger(__name__)
+
+EMBED_MISMATCH_POLICIES = ("warn", "refuse", "migrate")
+
+
+def check_embedding_compatibility(settings: Settings, store: ChromaVectorStore) -> dict[str, Any]:
+    metadata = store.collection_metadata()
+    index_model = metadata.get("embed_model")
+    if store.count() == 0:
+        status = "empty"
+    elif index_model is None:
+        status = "unrecorded"
+    elif index_model != settings.OLLAMA_EMBED_MODEL:
+        status = "mismatch"
+    else:
+        status = "ok"
+    return {
+        "status": status,
+        "collection": store.collection_name,
+        "index_embed_model": index_model,
+        "index_embed_dim": metadata.get("embed_dim"),
+        "configured_embed_model": settings.OLLAMA_EMBED_MODEL,
+    }
+
+
+def copy_with_new_embeddings(
+    settings: Settings,
+    source: ChromaVectorStore,
+    target: ChromaVectorStore,
+    ollama: OllamaClient,
+    where: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    # Chunk ids, text and metadata (including dedup refs) are kept; only vectors change.
+    # One controller and pool for the whole copy, so the window learned on one page carries over.
+    summary: dict[str, Any] = {"chunks": 0, "embed_batches": 0, "embed_timeouts": 0, "embed_errors": 0}
+    controller = controller_from_settings(settings)
+    with priority_scope(PRIORITY_BULK), ThreadPoolExecutor(
+        max_workers=controller.max_in_flight, thread_name_prefix="embed-batch"
+    ) as executor:
+        for page in source.iter_chunks(where=where):
+            chunks = [Chunk(chunk_id=c.chunk_id, text=c.text, metadata=c.metadata) for c in page]
+            stats = embed_chunks_adaptively(
+                ollama,
+                chunks,
+                controller,
+                target.upsert_chunks,
+                max_retries=settings.EMBED_MAX_RETRIES,
+                backoff_seconds=settings.EMBED_BACKOFF_SECONDS,
+                max_chunks_per_second=settings.REINDEX_MAX_CHUNKS_PER_SECOND,
+                executor=executor,
+            )
+            for key in ("embed_batches", "embed_timeouts", "embed_errors"):
+                summary[key] += stats[key]
+            summary["chunks"] += len(chunks)
+    summary["embed_in_flight_limit"] = controller.in_flight_limit
+    if settings.RETRIEVAL_TWO_STAGE_ENABLED:
+        refresh_doc_centroids(settings, target)
+    summary["embed_model"] = settings.OLLAMA_EMBED_MODEL
+    return summary
+
+
+def run_embed_migration(settings: Settings, store: ChromaVectorStore, ollama: OllamaClient, *, job_id: int) -> None:
+    run_blue_green_rebuild(
+        settings,
+        store,
+        job_id=job_id,
+        label="migrate",
+        build=lambda shadow, where: copy_with_new_embeddings(settings, store, shadow, ollama, where),
+    )
+
+
+def enforce_embedding_policy(settings: Settings, store: ChromaVectorStore) -> dict[str, Any]:
+    report = check_embedding_compatibility(settings, store)
+    if report["status"] == "mismatch":
+        message = (
+            f"Collection {report['collection']} was embedded with {report['index_embed_model']} "
+            f"but OLLAMA_EMBED_MODEL={report['configured_embed_model']}."
+        )
+        if settings.EMBED_MODEL_MISMATCH_POLICY == "refuse":
+            raise RuntimeError(f"{message} Run the embedding migration or restore the previous model.")
+        logger.warning(message + " Queries keep using the index model until a migration completes.")
+    elif report["status"] == "unrecorded":
+        logger.warning("Collection has no recorded embed model; assuming OLLAMA_EMBED_MODEL", extra=report)
+    return report
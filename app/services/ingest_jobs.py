@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import time
+
+from app.core.config import Settings
+from app.db.sqlite import record_ingested_source, update_ingestion_job
+from app.rag.ingest_service import fetch_link_text
+from app.rag.ingestion import ingest_document_texts, source_to_doc_id, text_from_bytes
+from app.rag.ollama_client import OllamaClient
+from app.rag.vector_store import ChromaVectorStore
+
+
+def run_upload_ingest_job(
+    *,
+    job_id: int,
+    filename: str,
+    raw: bytes,
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+) -> None:
+    started = time.perf_counter()
+    update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=1)
+    try:
+        text = text_from_bytes(filename, raw)
+        doc_id = source_to_doc_id(filename)
+        summary = ingest_document_texts(settings, store, ollama, docs=[(doc_id, filename, text)], source_type="upload")
+        latency_ms = (time.perf_counter() - started) * 1000
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="success",
+            attempt_count=1,
+            latency_ms=latency_ms,
+            summary=summary,
+        )
+        record_ingested_source(
+            settings.sqlite_path, source_type="upload", source=filename, doc_id=doc_id, tenant=settings.TENANT
+        )
+    except Exception as exc:
+        latency_ms = (time.perf_counter() - started) * 1000
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="error",
+            attempt_count=1,
+            latency_ms=latency_ms,
+            error=str(exc),
+        )
+
+
+def run_link_ingest_job(
+    *,
+    job_id: int,
+    url: str,
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+) -> None:
+    started = time.perf_counter()
+    max_attempts = max(1, settings.INGEST_LINK_MAX_RETRIES + 1)
+    attempt = 0
+    last_error: str | None = None
+    while attempt < max_attempts:
+        attempt += 1
+        update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=attempt)
+        try:
+            _, text = fetch_link_text(url, settings)
+            doc_id = source_to_doc_id(url)
+            summary = ingest_document_texts(settings, store, ollama, docs=[(doc_id, url, text)], source_type="link")
+            latency_ms = (time.perf_counter() - started) * 1000
+            update_ingestion_job(
+                settings.sqlite_path,
+                job_id=job_id,
+                status="success",
+                attempt_count=attempt,
+                latency_ms=latency_ms,
+                summary=summary,
+            )
+            record_ingested_source(
+                settings.sqlite_path, source_type="link", source=url, doc_id=doc_id, tenant=settings.TENANT
+            )
+            return
+        except Exception as exc:
+            last_error = str(exc)
+            if attempt >= max_attempts:
+                break
+            backoff = settings.INGEST_LINK_BACKOFF_SECONDS * (2 ** (attempt - 1))
+            time.sleep(backoff)
+    latency_ms = (time.perf_counter() - started) * 1000
+    update_ingestion_job(
+        settings.sqlite_path,
+        job_id=job_id,
+        status="error",
+        attempt_count=attempt,
+        latency_ms=latency_ms,
+        error=last_error or "Unknown link ingestion error",
+    )
@@ -4,6 +4,7 @@ from typing import Any
 
 from app.core.config import Settings
 from app.db.sqlite import log_retrieval_event
+from app.rag.models import RetrievalFilters
 from app.rag.pipeline import RAGPipeline
 
 
@@ -12,9 +13,17 @@ class QueryService:
         self.settings = settings
         self.pipeline = pipeline
 
-    def run_query(self, *, question: str, top_k: int | None, request_id: str | None, chat_model: str | None = None) -> dict[str, Any]:
+    def run_query(
+        self,
+        *,
+        question: str,
+        top_k: int | None,
+        request_id: str | None,
+        chat_model: str | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> dict[str, Any]:
         k = top_k or self.settings.TOP_K
-        result = self.pipeline.answer(question, top_k=k, chat_model=chat_model)
+        result = self.pipeline.answer(question, top_k=k, chat_model=chat_model, filters=filters)
         hit = len(result.get("citations", [])) > 0
         log_retrieval_event(
             self.settings.sqlite_path,
@@ -27,5 +36,6 @@ class QueryService:
             recall_at_5=1.0 if hit else 0.0,
             citations=result.get("citations", []),
             retrieved_doc_ids=result.get("retrieved_doc_ids", []),
+            tenant=self.settings.TENANT,
         )
         return result
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import statistics
+import threading
+import time
+from typing import Any, Callable
+
+from app.core.config import Settings
+from app.rag.centroids import narrow_to_documents
+from app.rag.ollama_client import OllamaClient
+from app.rag.vector_store import ChromaVectorStore
+from app.services.replica import index_version
+from app.services.warmup import warmup_status
+
+logger = logging.getLogger(__name__)
+
+_state_lock = threading.Lock()
+_state: dict[str, Any] = {"index_warmup": {"status": "pending"}, "checks": {}, "checked_at": None}
+
+
+def _timed_query(settings: Settings, store: ChromaVectorStore, vector: list[float], top_k: int) -> float:
+    started = time.perf_counter()
+    filters = narrow_to_documents(settings, store, vector, None) if settings.RETRIEVAL_TWO_STAGE_ENABLED else None
+    # include_text primes the docstore LRU with the chunks real queries are likely to hit.
+    store.query(vector, top_k=top_k, filters=filters)
+    return (time.perf_counter() - started) * 1000
+
+
+def warm_up_index(settings: Settings, store: ChromaVectorStore) -> dict[str, Any]:
+    # Opens the collection and replays stored vectors as sample queries in rounds until the
+    # first query of a round is no slower than READINESS_WARMUP_TOLERANCE x that round's median,
+    # i.e. a cold first query no longer pays for paging in the HNSW graph or filling caches.
+    started = time.perf_counter()
+    count = store.count()
+    summary: dict[str, Any] = {"vector_count": count, "rounds": 0, "converged": count == 0}
+    samples = max(2, settings.READINESS_WARMUP_QUERIES)
+    vectors: list[list[float]] = []
+    if count:
+        page = next(store.iter_chunks(batch_size=samples, include_embeddings=True), [])
+        vectors = [list(chunk.embedding) for chunk in page if chunk.embedding is not None]
+    while vectors and summary["rounds"] < max(1, settings.READINESS_WARMUP_MAX_ROUNDS):
+        latencies = [_timed_query(settings, store, vector, settings.TOP_K) for vector in vectors]
+        summary["rounds"] += 1
+        median = statistics.median(latencies[1:]) if len(latencies) > 1 else latencies[0]
+        summary["first_query_ms"] = round(latencies[0], 2)
+        summary["steady_query_ms"] = round(median, 2)
+        if latencies[0] <= median * settings.READINESS_WARMUP_TOLERANCE:
+            summary["converged"] = True
+            break
+    if vectors and not summary["converged"]:
+        logger.warning("Index warm-up did not converge", extra={"warmup": summary})
+    summary["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return summary
+
+
+def _check(fn: Callable[[], Any]) -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        detail = fn()
+        ok, error = True, None
+    except Exception as exc:
+        detail, ok, error = None, False, str(exc)
+    result: dict[str, Any] = {"ok": ok, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    if detail is not None:
+        result["detail"] = detail
+    if error:
+        result["error"] = error
+    return result
+
+
+def _ping_sqlite(settings: Settings) -> None:
+    with sqlite3.connect(settings.sqlite_path, timeout=2) as conn:
+        conn.execute("SELECT 1").fetchone()
+
+
+def _ping_ollama(ollama: OllamaClient) -> None:
+    if not ollama.healthcheck():
+        raise RuntimeError("Ollama is unreachable.")
+
+
+def refresh_readiness(settings: Settings, store: ChromaVectorStore, ollama: OllamaClient) -> dict[str, Any]:
+    checks = {
+        "sqlite": _check(lambda: _ping_sqlite(settings)),
+        "vector_store": _check(lambda: {"collection": store.collection_name, "count": store.count()}),
+        "ollama": _check(lambda: _ping_ollama(ollama)),
+    }
+    with _state_lock:
+        _state["checks"] = checks
+        _state["checked_at"] = time.time()
+    return checks
+
+
+def run_index_warmup(settings: Settings, store: ChromaVectorStore) -> dict[str, Any]:
+    with _state_lock:
+        _state["index_warmup"] = {"status": "running"}
+    try:
+        summary = warm_up_index(settings, store)
+        status = "done"
+    except Exception as exc:
+        logger.exception("Index warm-up failed")
+        summary, status = {"error": str(exc)}, "error"
+    with _state_lock:
+        _state["index_warmup"] = {"status": status, **summary}
+    logger.info("Index warm-up finished", extra={"warmup": summary})
+    return summary
+
+
+def run_readiness_monitor(
+    settings: Settings, store: ChromaVectorStore, ollama: OllamaClient, stop: threading.Event
+) -> None:
+    # Requests to /ready only read the last result; the live dependency calls happen here.
+    run_index_warmup(settings, store)
+    while True:
+        try:
+            refresh_readiness(settings, store, ollama)
+        except Exception:
+            logger.exception("Readiness check failed")
+        if stop.wait(settings.READINESS_CHECK_INTERVAL_SECONDS):
+            return
+
+
+def readiness_status(settings: Settings) -> dict[str, Any]:
+    with _state_lock:
+        state = {
+            "index_warmup": dict(_state["index_warmup"]),
+            "checks": {name: dict(check) for name, check in _state["checks"].items()},
+            "checked_at": _state["checked_at"],
+        }
+    reasons = [f"{name}: {check.get('error', 'failed')}" for name, check in state["checks"].items() if not check["ok"]]
+    if state["checked_at"] is None:
+        reasons.append("dependency checks have not run yet")
+    elif time.time() - state["checked_at"] > 3 * settings.READINESS_CHECK_INTERVAL_SECONDS:
+        reasons.append("dependency checks are stale")
+    if state["index_warmup"]["status"] in ("pending", "running"):
+        reasons.append("index warm-up has not finished")
+    if settings.OLLAMA_WARMUP_ON_STARTUP and warmup_status()["status"] in ("pending", "running"):
+        reasons.append("model warm-up has not finished")
+    version = index_version(settings)
+    if settings.REPLICA_ROLE == "replica" and version is None:
+        reasons.append("no published index version has been loaded yet")
+    return {"ready": not reasons, "reasons": reasons, "index_version": version, **state}
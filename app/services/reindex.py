@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from app.core.config import Settings
+from app.db.sqlite import clear_ingested_sources, ingested_source_map, mark_index_reset, update_ingestion_job
+from app.rag.ingestion import document_to_chunks, index_chunks
+from app.rag.models import Chunk, RetrievalFilters
+from app.rag.ollama_client import OllamaClient
+from app.rag.vector_store import ChromaVectorStore, build_where, doc_refs
+from app.rag.write_journal import drain_journal, start_journal, stop_journal, writes_paused
+
+logger = logging.getLogger(__name__)
+
+# One rebuild lock per tenant: each tenant's index is swapped independently.
+_reindex_locks: dict[str, threading.Lock] = {}
+_reindex_locks_guard = threading.Lock()
+
+
+@dataclass
+class StoredDocument:
+    doc_id: str
+    source: str | None = None
+    source_type: str | None = None
+    ingested_at: float | None = None
+    parts: dict[int, str] = field(default_factory=dict)
+
+
+def reconstruct_text(parts: list[str], overlap_hint: int) -> str:
+    # chunk_text() slides a fixed window, so consecutive chunks share exactly `overlap`
+    # characters; fall back to searching for the overlap when the hint does not fit.
+    if not parts:
+        return ""
+    text = parts[0]
+    for part in parts[1:]:
+        overlap = 0
+        if 0 < overlap_hint <= len(part) and text.endswith(part[:overlap_hint]):
+            overlap = overlap_hint
+        else:
+            for size in range(min(len(text), len(part)) - 1, 0, -1):
+                if text.endswith(part[:size]):
+                    overlap = size
+                    break
+        text += part[overlap:]
+    return text
+
+
+def collect_documents(store: ChromaVectorStore, *, where: dict[str, Any] | None = None) -> dict[str, StoredDocument]:
+    docs: dict[str, StoredDocument] = {}
+    for page in store.iter_chunks(where=where):
+        for chunk in page:
+            meta = chunk.metadata
+            owner = str(meta.get("doc_id", ""))
+            for doc_id, index in doc_refs(meta).items():
+                doc = docs.setdefault(doc_id, StoredDocument(doc_id=doc_id))
+                doc.parts[index] = chunk.text
+                if doc_id == owner:
+                    doc.source = str(meta.get("source") or doc_id)
+                    doc.source_type = str(meta.get("source_type") or "local")
+                    doc.ingested_at = float(meta["ingested_at"]) if "ingested_at" in meta else None
+    return docs
+
+
+def rebuild_documents(
+    settings: Settings,
+    source: ChromaVectorStore,
+    target: ChromaVectorStore,
+    ollama: OllamaClient,
+    where: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    docs = collect_documents(source, where=where)
+    if where is not None and docs:
+        # A partial match only names the documents; rebuild each of them from all its chunks.
+        doc_ids = sorted(docs)
+        docs = {}
+        for i in range(0, len(doc_ids), 100):
+            wanted = doc_ids[i : i + 100]
+            found = collect_documents(source, where=build_where(RetrievalFilters(doc_ids=wanted)))
+            docs.update({doc_id: found[doc_id] for doc_id in wanted if doc_id in found})
+    overlap_hint = int(source.collection_metadata().get("chunk_overlap", settings.CHUNK_OVERLAP))
+    known_sources = ingested_source_map(settings.sqlite_path, tenant=settings.TENANT)
+    chunks: list[Chunk] = []
+    for doc in docs.values():
+        fallback_type, fallback_source = known_sources.get(doc.doc_id, ("local", doc.doc_id))
+        text = reconstruct_text([doc.parts[i] for i in sorted(doc.parts)], overlap_hint)
+        chunks.extend(
+            document_to_chunks(
+                settings,
+                doc_id=doc.doc_id,
+                source=doc.source or fallback_source,
+                text=text,
+                source_type=doc.source_type or fallback_type,
+                ingested_at=doc.ingested_at,
+            )
+        )
+    summary = index_chunks(
+        settings, target, ollama, chunks, max_chunks_per_second=settings.REINDEX_MAX_CHUNKS_PER_SECOND
+    )
+    summary["docs"] = len(docs)
+    return summary
+
+
+def schedule_collection_gc(store: ChromaVectorStore, grace_seconds: float) -> None:
+    timer = threading.Timer(grace_seconds + 1.0, store.gc_retired, kwargs={"grace_seconds": grace_seconds})
+    timer.daemon = True
+    timer.start()
+
+
+def reset_index(settings: Settings, store: ChromaVectorStore) -> dict[str, Any]:
+    # A rebuild running meanwhile would promote its shadow over the empty collection after the
+    # sources were cleared, so reset takes the rebuild lock (and fails while one holds it).
+    with exclusive_rebuild(settings.TENANT):
+        count = store.reset_collection()
+        schedule_collection_gc(store, settings.REINDEX_GC_GRACE_SECONDS)
+        sources_cleared = clear_ingested_sources(settings.sqlite_path, tenant=settings.TENANT)
+        state = mark_index_reset(settings.sqlite_path, tenant=settings.TENANT)
+    return {
+        "vector_count": count,
+        "sources_cleared": sources_cleared,
+        "last_reset_utc": state["last_reset_utc"],
+        "reset_count": int(state["reset_count"]),
+    }
+
+
+def rollback_index(settings: Settings, store: ChromaVectorStore) -> dict[str, Any]:
+    state = store.rollback()
+    schedule_collection_gc(store, settings.REINDEX_GC_GRACE_SECONDS)
+    return state
+
+
+def _rebuild_lock(tenant: str) -> threading.Lock:
+    with _reindex_locks_guard:
+        return _reindex_locks.setdefault(tenant, threading.Lock())
+
+
+def reindex_running(tenant: str = "default") -> bool:
+    return _rebuild_lock(tenant).locked()
+
+
+@contextmanager
+def exclusive_rebuild(tenant: str = "default") -> Iterator[None]:
+    lock = _rebuild_lock(tenant)
+    if not lock.acquire(blocking=False):
+        raise RuntimeError("Another reindex is running.")
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def replay_documents(
+    shadow: ChromaVectorStore,
+    build: Callable[[ChromaVectorStore, dict[str, Any] | None], dict[str, Any]],
+    doc_ids: set[str],
+) -> dict[str, int]:
+    # The shadow's copy of each document may be stale (re-ingested with other text) or, for a
+    # document that only added refs to shared chunks, missing; drop it and rebuild from live.
+    replayed = {"docs": len(doc_ids), "chunks": 0}
+    ordered = sorted(doc_ids)
+    for i in range(0, len(ordered), 100):
+        batch = ordered[i : i + 100]
+        for doc_id in batch:
+            shadow.delete_by_doc_id(doc_id)
+        replayed["chunks"] += int(build(shadow, build_where(RetrievalFilters(doc_ids=batch))).get("chunks", 0))
+    return replayed
+
+
+def run_blue_green_rebuild(
+    settings: Settings,
+    store: ChromaVectorStore,
+    *,
+    job_id: int,
+    label: str,
+    build: Callable[[ChromaVectorStore, dict[str, Any] | None], dict[str, Any]],
+) -> None:
+    # Builds a shadow collection from the live one while queries keep using it, replays
+    # documents ingested meanwhile, then swaps the pointer. The old collection is retired
+    # (rollback target) and deleted after REINDEX_GC_GRACE_SECONDS.
+    lock = _rebuild_lock(settings.TENANT)
+    if not lock.acquire(blocking=False):
+        update_ingestion_job(settings.sqlite_path, job_id=job_id, status="error", error="Another reindex is running.")
+        return
+    started = time.perf_counter()
+    index_dir = str(store.settings.chroma_dir)
+    shadow: ChromaVectorStore | None = None
+    update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=1)
+    start_journal(index_dir)
+    try:
+        shadow = store.create_shadow(label)
+        summary = build(shadow, None)
+        # Catch up while ingestion continues, then replay what is left with writes paused so
+        # nothing reaches the old collection between the last replay and the swap.
+        late = replay_documents(shadow, build, drain_journal(index_dir))
+        with writes_paused(index_dir):
+            final = replay_documents(shadow, build, stop_journal(index_dir))
+            previous = store.collection_name
+            store.promote(shadow.collection_name)
+        summary.update(
+            {
+                "late_docs": late["docs"] + final["docs"],
+                "late_chunks": late["chunks"] + final["chunks"],
+                "collection": shadow.collection_name,
+                "previous_collection": previous,
+                "vector_count": store.count(),
+            }
+        )
+        schedule_collection_gc(store, settings.REINDEX_GC_GRACE_SECONDS)
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="success",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            summary=summary,
+        )
+    except Exception as exc:
+        logger.exception("Blue/green rebuild failed", extra={"job_id": job_id})
+        if shadow is not None and shadow.collection_name != store.collection_name:
+            shadow.drop()
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="error",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=str(exc),
+        )
+    finally:
+        stop_journal(index_dir)
+        lock.release()
+
+
+def run_reindex(settings: Settings, store: ChromaVectorStore, ollama: OllamaClient, *, job_id: int) -> None:
+    run_blue_green_rebuild(
+        settings,
+        store,
+        job_id=job_id,
+        label="reindex",
+        build=lambda shadow, where: rebuild_documents(settings, store, shadow, ollama, where),
+    )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import Settings
+from app.db.sqlite import get_app_setting, set_app_setting
+from app.rag.snapshot import SnapshotError, export_snapshot, import_snapshot, read_manifest
+from app.rag.vector_store import ChromaVectorStore
+from app.rag.write_journal import writes_paused
+from app.services.reindex import exclusive_rebuild, reindex_running, schedule_collection_gc
+
+logger = logging.getLogger(__name__)
+
+LATEST_FILENAME = "LATEST.json"
+INDEX_VERSION_KEY = "index_version"
+
+
+def index_version(settings: Settings) -> str | None:
+    return get_app_setting(settings.sqlite_path, key=INDEX_VERSION_KEY)
+
+
+def read_latest(shared_dir: Path) -> dict[str, Any] | None:
+    try:
+        return dict(json.loads((shared_dir / LATEST_FILENAME).read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return None
+
+
+def _write_latest(shared_dir: Path, latest: dict[str, Any]) -> None:
+    tmp_path = shared_dir / f"{LATEST_FILENAME}.{os.getpid()}.tmp"
+    tmp_path.write_text(json.dumps(latest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, shared_dir / LATEST_FILENAME)
+
+
+def publish_snapshot(settings: Settings, store: ChromaVectorStore) -> dict[str, Any] | None:
+    # Skips the export when nothing was written since the last published version.
+    shared_dir = settings.replica_shared_dir
+    versions_dir = shared_dir / "versions"
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    latest = read_latest(shared_dir)
+    if reindex_running(settings.TENANT):
+        # The rebuild bumps the generation when it promotes; publish that one next time.
+        return None
+    generation = store.index_generation()
+    if latest and latest.get("generation") == generation:
+        return None
+    version = max(int(time.time() * 1000), int(latest["version"]) + 1 if latest else 0)
+    path = versions_dir / f"index-{version}.zip"
+    index_dir = str(store.settings.chroma_dir)
+    # The rebuild lock keeps the collection from being swapped under the export. Ingestion keeps
+    # running; every write bumps the generation, so an unchanged generation afterwards (read once
+    # in-flight writes have finished) means the archive is that one generation.
+    with exclusive_rebuild(settings.TENANT):
+        manifest = export_snapshot(settings, store, path)
+        with writes_paused(index_dir):
+            torn = store.index_generation() != generation
+        if torn:
+            # Writes landed mid-export; redo it with ingestion held, as the export job does.
+            with writes_paused(index_dir):
+                generation = store.index_generation()
+                manifest = export_snapshot(settings, store, path)
+    published = {
+        "version": version,
+        "file": path.name,
+        "checksum": manifest["checksum"],
+        "count": manifest["count"],
+        "embed_model": manifest["embed_model"],
+        "generation": generation,
+        "published_at": time.time(),
+    }
+    _write_latest(shared_dir, published)
+    set_app_setting(settings.sqlite_path, key=INDEX_VERSION_KEY, value=str(version))
+    # Older versions stay around briefly so a replica mid-download can finish.
+    keep = max(2, settings.REPLICA_KEEP_VERSIONS)
+    for old in sorted(versions_dir.glob("index-*.zip"), key=lambda p: int(p.stem.split("-")[1]))[:-keep]:
+        old.unlink(missing_ok=True)
+    logger.info("Published index snapshot", extra={"replica": published})
+    return published
+
+
+def sync_replica(settings: Settings, store: ChromaVectorStore) -> dict[str, Any] | None:
+    # Copies the newest published version to local disk, loads it into a shadow collection and
+    # swaps it in; queries keep reading the previous version until the pointer flips.
+    latest = read_latest(settings.replica_shared_dir)
+    if latest is None:
+        return None
+    served = index_version(settings)
+    if served is not None and int(served) >= int(latest["version"]):
+        return None
+    source = settings.replica_shared_dir / "versions" / str(latest["file"])
+    local = settings.snapshot_dir / f"replica-{latest['version']}.zip"
+    local.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = local.with_suffix(".zip.tmp")
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, local)
+        if read_manifest(local)["checksum"] != latest["checksum"]:
+            raise SnapshotError(f"Downloaded version {latest['version']} does not match its published checksum.")
+        with exclusive_rebuild(settings.TENANT):
+            summary = import_snapshot(settings, store, local, replace=True)
+        schedule_collection_gc(store, settings.REPLICA_GC_GRACE_SECONDS)
+        set_app_setting(settings.sqlite_path, key=INDEX_VERSION_KEY, value=str(latest["version"]))
+    finally:
+        tmp_path.unlink(missing_ok=True)
+        local.unlink(missing_ok=True)
+    summary["version"] = latest["version"]
+    logger.info("Replica switched to new index version", extra={"replica": summary})
+    return summary
+
+
+def run_replica_loop(settings: Settings, store: ChromaVectorStore, stop: threading.Event) -> None:
+    publisher = settings.REPLICA_ROLE == "publisher"
+    interval = settings.REPLICA_PUBLISH_INTERVAL_SECONDS if publisher else settings.REPLICA_POLL_SECONDS
+    while True:
+        try:
+            if publisher:
+                publish_snapshot(settings, store)
+            else:
+                sync_replica(settings, store)
+        except Exception:
+            logger.exception("Replica snapshot shipping failed", extra={"role": settings.REPLICA_ROLE})
+        if stop.wait(interval):
+            return
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import Settings
+from app.db.sqlite import update_ingestion_job
+from app.rag.snapshot import export_snapshot, import_snapshot
+from app.rag.vector_store import ChromaVectorStore
+from app.rag.write_journal import writes_paused
+from app.services.reindex import exclusive_rebuild, schedule_collection_gc
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_path(settings: Settings, prefix: str) -> Path:
+    return settings.snapshot_dir / f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.zip"
+
+
+def export_fenced(settings: Settings, store: ChromaVectorStore, path: Path) -> dict[str, Any]:
+    # Rebuilds, imports and GC cannot swap the collection mid-export, and ingestion into this
+    # index waits until the export finishes, so the archive is one consistent generation.
+    with exclusive_rebuild(settings.TENANT), writes_paused(str(store.settings.chroma_dir)):
+        return export_snapshot(settings, store, path)
+
+
+def run_snapshot_export(settings: Settings, store: ChromaVectorStore, *, job_id: int, path: Path) -> None:
+    started = time.perf_counter()
+    update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=1)
+    try:
+        manifest = export_fenced(settings, store, path)
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="success",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            summary={
+                "file": path.name,
+                "checksum": manifest["checksum"],
+                "count": manifest["count"],
+                "collection": manifest["collection"],
+                "embed_model": manifest["embed_model"],
+            },
+        )
+    except Exception as exc:
+        logger.exception("Snapshot export failed", extra={"job_id": job_id, "path": str(path)})
+        path.unlink(missing_ok=True)
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="error",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=str(exc),
+        )
+
+
+def run_snapshot_import(
+    settings: Settings,
+    store: ChromaVectorStore,
+    *,
+    job_id: int,
+    path: Path,
+    replace: bool = True,
+    cleanup: bool = False,
+) -> None:
+    started = time.perf_counter()
+    update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=1)
+    try:
+        with exclusive_rebuild(settings.TENANT):
+            summary = import_snapshot(settings, store, path, replace=replace)
+        if replace:
+            schedule_collection_gc(store, settings.REINDEX_GC_GRACE_SECONDS)
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="success",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            summary=summary,
+        )
+    except Exception as exc:
+        logger.exception("Snapshot import failed", extra={"job_id": job_id, "path": str(path)})
+        update_ingestion_job(
+            settings.sqlite_path,
+            job_id=job_id,
+            status="error",
+            attempt_count=1,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=str(exc),
+        )
+    finally:
+        if cleanup:
+            path.unlink(missing_ok=True)
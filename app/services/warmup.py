@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any
+
+from app.core.config import Settings
+from app.db.sqlite import get_app_setting
+from app.rag.ollama_client import OllamaClient
+
+logger = logging.getLogger(__name__)
+
+_state_lock = threading.Lock()
+_state: dict[str, Any] = {"status": "pending", "summary": None}
+
+
+def warm_up_models(settings: Settings, ollama: OllamaClient, *, chat_model: str) -> dict[str, Any]:
+    started = time.perf_counter()
+    summary: dict[str, Any] = {"chat_model": chat_model, "embed_model": settings.OLLAMA_EMBED_MODEL, "errors": []}
+    steps = (
+        ("preload_chat", lambda: ollama.preload(chat_model)),
+        ("preload_embed", lambda: ollama.preload(settings.OLLAMA_EMBED_MODEL, embedding=True)),
+        ("embed", lambda: ollama.embed(["warm-up"])),
+        ("generate", lambda: ollama.generate_with_meta("Reply with OK.", model=chat_model, options={"num_predict": 1})),
+    )
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            logger.warning("Model warm-up step failed", extra={"step": name, "error": str(exc)})
+            summary["errors"].append(f"{name}: {exc}")
+        summary[f"{name}_ms"] = round((time.perf_counter() - step_started) * 1000, 2)
+    summary["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return summary
+
+
+def run_startup_warmup(settings: Settings, ollama: OllamaClient) -> dict[str, Any]:
+    with _state_lock:
+        _state["status"] = "running"
+    chat_model = get_app_setting(settings.sqlite_path, key="active_chat_model") or settings.OLLAMA_CHAT_MODEL
+    summary = warm_up_models(settings, ollama, chat_model=chat_model)
+    with _state_lock:
+        _state["status"] = "error" if summary["errors"] else "done"
+        _state["summary"] = summary
+    logger.info("Model warm-up finished", extra={"warmup": summary})
+    return summary
+
+
+def warmup_status() -> dict[str, Any]:
+    with _state_lock:
+        return dict(_state)
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi import BackgroundTasks
+
+from app.core.config import Settings
+from app.db.sqlite import (
+    claim_writer_job,
+    create_ingestion_job,
+    enqueue_writer_job,
+    finish_writer_job,
+    get_ingestion_job,
+    requeue_writer_jobs,
+    update_ingestion_job,
+)
+from app.rag.ollama_client import OllamaClient
+from app.rag.tenants import TenantRegistry
+from app.rag.vector_store import ChromaVectorStore
+from app.services.bulk_import import run_bulk_import
+from app.services.cleanup import delete_document, run_orphan_gc
+from app.services.embed_migration import run_embed_migration
+from app.services.ingest_jobs import run_link_ingest_job, run_upload_ingest_job
+from app.services.reindex import reset_index, rollback_index, run_reindex
+from app.services.snapshots import run_snapshot_export, run_snapshot_import
+
+logger = logging.getLogger(__name__)
+
+WRITER_LOCK_FILENAME = "writer.lock"
+# Identifies this process's claims on writer_queue rows.
+WRITER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_role_lock = threading.Lock()
+_role: dict[str, Any] = {"role": "single", "handle": None}
+# Held by the writer while it runs a job or a synchronous write op.
+_writer_job_lock = threading.Lock()
+
+
+def _try_lock(handle: Any) -> bool:
+    try:
+        import fcntl
+
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        import msvcrt
+
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+    except OSError:
+        return False
+    return True
+
+
+def elect_writer(settings: Settings) -> str:
+    # In multi-worker mode the first process to take the lock file becomes the writer and holds
+    # it for its lifetime; the OS releases it if that process dies, and the worker uvicorn
+    # starts in its place takes over.
+    with _role_lock:
+        if settings.WORKER_MODE != "multi":
+            _role.update(role="single", handle=None)
+            return "single"
+        if _role["handle"] is not None:
+            return str(_role["role"])
+        path = settings.sqlite_path.parent / WRITER_LOCK_FILENAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle = path.open("a+")
+        if _try_lock(handle):
+            handle.seek(0)
+            handle.truncate()
+            handle.write(str(os.getpid()))
+            handle.flush()
+            _role.update(role="writer", handle=handle)
+            requeued = requeue_writer_jobs(settings.sqlite_path, owner=WRITER_ID)
+            if requeued:
+                logger.warning("Requeued jobs claimed by a previous writer", extra={"job_ids": requeued})
+        else:
+            handle.close()
+            _role.update(role="reader", handle=None)
+        logger.info("Worker role elected", extra={"role": _role["role"], "pid": os.getpid()})
+        return str(_role["role"])
+
+
+def worker_role() -> str:
+    with _role_lock:
+        return str(_role["role"])
+
+
+# Background jobs the writer runs: kind (the ingestion job's source_type) -> runner. Payloads
+# are JSON; bytes values are staged to WRITER_QUEUE_DIR when the job is queued.
+JobRunner = Callable[[Settings, ChromaVectorStore, OllamaClient, int, dict[str, Any]], None]
+
+WRITER_JOBS: dict[str, JobRunner] = {
+    "upload": lambda settings, store, ollama, job_id, p: run_upload_ingest_job(
+        job_id=job_id, filename=p["filename"], raw=p["raw"], settings=settings, store=store, ollama=ollama
+    ),
+    "link": lambda settings, store, ollama, job_id, p: run_link_ingest_job(
+        job_id=job_id, url=p["url"], settings=settings, store=store, ollama=ollama
+    ),
+    "reindex": lambda settings, store, ollama, job_id, p: run_reindex(settings, store, ollama, job_id=job_id),
+    "embed_migration": lambda settings, store, ollama, job_id, p: run_embed_migration(
+        settings, store, ollama, job_id=job_id
+    ),
+    "snapshot_export": lambda settings, store, ollama, job_id, p: run_snapshot_export(
+        settings, store, job_id=job_id, path=Path(p["path"])
+    ),
+    "snapshot_import": lambda settings, store, ollama, job_id, p: run_snapshot_import(
+        settings, store, job_id=job_id, path=Path(p["path"]), replace=p["replace"], cleanup=True
+    ),
+    "bulk_import": lambda settings, store, ollama, job_id, p: run_bulk_import(
+        settings,
+        store,
+        job_id=job_id,
+        records_path=Path(p["records_path"]),
+        vectors_path=Path(p["vectors_path"]) if p.get("vectors_path") else None,
+        embed_model=p.get("embed_model"),
+    ),
+    "orphan_gc": lambda settings, store, ollama, job_id, p: run_orphan_gc(settings, store, job_id=job_id),
+}
+
+# Synchronous index writes: the request waits for the result.
+WriteOp = Callable[[Settings, ChromaVectorStore, dict[str, Any]], dict[str, Any]]
+
+WRITER_OPS: dict[str, WriteOp] = {
+    "reset": lambda settings, store, p: reset_index(settings, store),
+    "rollback": lambda settings, store, p: rollback_index(settings, store),
+    "delete_source": lambda settings, store, p: delete_document(settings, store, p["doc_id"]),
+}
+
+
+def _stage_payload(settings: Settings, payload: dict[str, Any]) -> dict[str, Any]:
+    staged: dict[str, Any] = {}
+    for key, value in payload.items():
+        if isinstance(value, bytes):
+            path = settings.writer_queue_dir / uuid.uuid4().hex
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(value)
+            staged[key] = {"$file": str(path)}
+        else:
+            staged[key] = value
+    return staged
+
+
+def _load_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    loaded: dict[str, Any] = {}
+    for key, value in payload.items():
+        if isinstance(value, dict) and "$file" in value:
+            loaded[key] = Path(value["$file"]).read_bytes()
+        else:
+            loaded[key] = value
+    return loaded
+
+
+def _discard_staged(payload: dict[str, Any]) -> None:
+    # Staged files outlive the claim so a job requeued after a writer crash can still load them.
+    for value in payload.values():
+        if isinstance(value, dict) and "$file" in value:
+            Path(value["$file"]).unlink(missing_ok=True)
+
+
+def _run_pinned(
+    runner: JobRunner,
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+    job_id: int,
+    payload: dict[str, Any],
+) -> None:
+    # The caller pinned the store when it queued the job, so a tenant store cannot be evicted
+    # between the response and the job starting.
+    try:
+        runner(settings, store, ollama, job_id, payload)
+    finally:
+        store.unpin()
+
+
+def submit_job(
+    background_tasks: BackgroundTasks,
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+    *,
+    kind: str,
+    source: str,
+    payload: dict[str, Any],
+    max_attempts: int = 1,
+) -> int:
+    # In multi-worker mode every worker, the writer included, hands the job to the writer loop
+    # through SQLite so index writes run one at a time; a single worker runs it in this process
+    # after the response, as before.
+    if worker_role() != "single":
+        return enqueue_writer_job(
+            settings.sqlite_path,
+            source_type=kind,
+            source=source,
+            payload={**_stage_payload(settings, payload), "tenant": settings.TENANT},
+            max_attempts=max_attempts,
+            tenant=settings.TENANT,
+        )
+    job_id = create_ingestion_job(
+        settings.sqlite_path, source_type=kind, source=source, max_attempts=max_attempts, tenant=settings.TENANT
+    )
+    store.pin()
+    background_tasks.add_task(_run_pinned, WRITER_JOBS[kind], settings, store, ollama, job_id, payload)
+    return job_id
+
+
+def run_write_op(settings: Settings, store: ChromaVectorStore, *, kind: str, source: str, payload: dict[str, Any]) -> dict[str, Any]:
+    role = worker_role()
+    if role == "single":
+        return WRITER_OPS[kind](settings, store, payload)
+    if role == "writer":
+        if not _writer_job_lock.acquire(timeout=settings.WRITER_JOB_WAIT_SECONDS):
+            raise TimeoutError(f"The writer was busy with another job for {settings.WRITER_JOB_WAIT_SECONDS}s; {kind} not run.")
+        try:
+            return WRITER_OPS[kind](settings, store, payload)
+        finally:
+            _writer_job_lock.release()
+    job_id = enqueue_writer_job(
+        settings.sqlite_path,
+        source_type=kind,
+        source=source,
+        payload={**payload, "tenant": settings.TENANT},
+        tenant=settings.TENANT,
+    )
+    deadline = time.monotonic() + settings.WRITER_JOB_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        job = get_ingestion_job(settings.sqlite_path, job_id=job_id, tenant=settings.TENANT)
+        if job and job["status"] == "success":
+            return dict(job["summary"] or {})
+        if job and job["status"] == "error":
+            raise RuntimeError(job["error"] or f"{kind} failed on the writer.")
+        time.sleep(min(0.05, settings.WRITER_QUEUE_POLL_SECONDS))
+    raise TimeoutError(f"The writer did not finish {kind} job {job_id} within {settings.WRITER_JOB_WAIT_SECONDS}s.")
+
+
+def process_next_writer_job(
+    settings: Settings, store: ChromaVectorStore, ollama: OllamaClient, tenants: TenantRegistry | None = None
+) -> int | None:
+    with _writer_job_lock:
+        claimed = claim_writer_job(
+            settings.sqlite_path, owner=WRITER_ID, lease_seconds=settings.WRITER_JOB_LEASE_SECONDS
+        )
+        if claimed is None:
+            return None
+        job_id, kind, payload = claimed
+        try:
+            return _run_writer_job(settings, store, ollama, tenants, job_id, kind, dict(payload))
+        finally:
+            finish_writer_job(settings.sqlite_path, job_id=job_id)
+            _discard_staged(payload)
+
+
+def _run_writer_job(
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+    tenants: TenantRegistry | None,
+    job_id: int,
+    kind: str,
+    payload: dict[str, Any],
+) -> int:
+    tenant = str(payload.pop("tenant", settings.TENANT))
+    if tenant != settings.TENANT:
+        if tenants is None:
+            # Running it against the default store would write one tenant's data into another's index.
+            error = f"No tenant registry to run {kind} for tenant {tenant}."
+            update_ingestion_job(settings.sqlite_path, job_id=job_id, status="error", error=error)
+            return job_id
+        with tenants.lease(tenant) as tenant_store:
+            return _dispatch_writer_job(tenant_store.settings, tenant_store, ollama, job_id, kind, payload)
+    return _dispatch_writer_job(settings, store, ollama, job_id, kind, payload)
+
+
+def _dispatch_writer_job(
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+    job_id: int,
+    kind: str,
+    payload: dict[str, Any],
+) -> int:
+    if kind in WRITER_OPS:
+        started = time.perf_counter()
+        update_ingestion_job(settings.sqlite_path, job_id=job_id, status="running", attempt_count=1)
+        try:
+            result = WRITER_OPS[kind](settings, store, payload)
+        except Exception as exc:
+            update_ingestion_job(
+                settings.sqlite_path,
+                job_id=job_id,
+                status="error",
+                attempt_count=1,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                error=str(exc),
+            )
+        else:
+            update_ingestion_job(
+                settings.sqlite_path,
+                job_id=job_id,
+                status="success",
+                attempt_count=1,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                summary=result or {"ok": True},
+            )
+        return job_id
+    runner = WRITER_JOBS.get(kind)
+    if runner is None:
+        update_ingestion_job(settings.sqlite_path, job_id=job_id, status="error", error=f"Unknown writer job: {kind}")
+        return job_id
+    with store.pinned():
+        runner(settings, store, ollama, job_id, _load_payload(payload))
+    return job_id
+
+
+def run_writer_loop(
+    settings: Settings,
+    store: ChromaVectorStore,
+    ollama: OllamaClient,
+    stop: threading.Event,
+    tenants: TenantRegistry | None = None,
+) -> None:
+    # Jobs run one at a time and write ops the writer serves itself wait for them, so index
+    # writes from every worker are serialized here.
+    while not stop.is_set():
+        try:
+            if process_next_writer_job(settings, store, ollama, tenants) is not None:
+                continue
+        except Exception:
+            logger.exception("Writer job failed")
+        stop.wait(settings.WRITER_QUEUE_POLL_SECONDS)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+DEFAULT_MODULES = ["app.main", "scripts.metrics_report", "scripts.eval_gate"]
+HEAVY_MODULES = ["chromadb", "pypdf"]
+
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    # `-X importtime` writes "import time: self | cumulative | name" to stderr, nested modules
+    # indented under their importer; the unindented line for `module` is its total cost.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    loaded: set[str] = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        loaded.add(name.strip())
+        if name.rstrip() == f" {module}":
+            total_us = int(cumulative)
+    return total_us / 1000, loaded
+
+
+def bench_imports(module: str, runs: int) -> dict[str, object]:
+    timings: list[float] = []
+    loaded: set[str] = set()
+    for _ in range(runs):
+        ms, loaded = import_profile(module)
+        timings.append(ms)
+    heavy = sorted(name for name in loaded if name.split(".")[0] in HEAVY_MODULES and "." not in name)
+    return {"module": module, "import_ms": round(min(timings), 1), "heavy_imports": heavy}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def time_to_first_request(path: str, timeout: float) -> float:
+    # Wall time from spawning uvicorn to the first successful response on `path`.
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "OLLAMA_WARMUP_ON_STARTUP": "false"},
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1.0).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"{path} did not answer 200 within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark import time and uvicorn time-to-first-request.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=3, help="Best of N fresh interpreters per module.")
+    parser.add_argument("--max-import-ms", type=float, default=1500.0, help="Fail when any module exceeds this.")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure imports.")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    results = [bench_imports(module, args.runs) for module in args.modules]
+    report: dict[str, object] = {"imports": results}
+    if not args.skip_server:
+        report["time_to_first_request_ms"] = round(time_to_first_request(args.path, args.timeout), 1)
+    print(json.dumps(report, indent=2))
+
+    failures = [f"{r['module']} imports {', '.join(r['heavy_imports'])}" for r in results if r["heavy_imports"]]
+    failures += [
+        f"{r['module']} import {r['import_ms']}ms exceeds {args.max_import_ms}ms"
+        for r in results
+        if float(r["import_ms"]) > args.max_import_ms
+    ]
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.rag.mmr import mmr_select
+
+
+def bench(*, fetch_k: int, k: int, dim: int, docs: int, iterations: int) -> dict[str, float]:
+    rng = np.random.default_rng(0)
+    query = rng.standard_normal(dim).astype(np.float32)
+    candidates = rng.standard_normal((fetch_k, dim)).astype(np.float32)
+    doc_ids = [f"doc-{i % docs}" for i in range(fetch_k)]
+    timings: list[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        mmr_select(query, candidates, k=k, doc_ids=doc_ids, max_per_doc=2)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "fetch_k": fetch_k,
+        "k": k,
+        "dim": dim,
+        "p50_ms": round(timings[len(timings) // 2], 4),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 4),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark MMR re-selection latency over over-fetched candidates.")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--docs", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--max-p95-ms", type=float, default=3.0, help="Fail when p95 at the first fetch-k exceeds this.")
+    args = parser.parse_args()
+
+    results = [
+        bench(fetch_k=fetch_k, k=args.k, dim=args.dim, docs=args.docs, iterations=args.iterations)
+        for fetch_k in args.fetch_k
+    ]
+    print(json.dumps(results, indent=2))
+    if results and results[0]["p95_ms"] > args.max_p95_ms:
+        print(f"MMR p95 {results[0]['p95_ms']}ms exceeds {args.max_p95_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
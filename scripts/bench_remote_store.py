@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+
+from app.core.config import Settings
+from app.eval.harness import percentile
+from app.rag.vector_store import ChromaVectorStore
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_chroma_server(path: Path, *, timeout: float = 30.0) -> tuple[subprocess.Popen[bytes], str]:
+    # Runs `chroma run` (installed with the chromadb package) and waits for its heartbeat.
+    executable = shutil.which("chroma")
+    if executable is None:
+        raise RuntimeError("The chroma CLI is not on PATH.")
+    port = _free_port()
+    server = subprocess.Popen(
+        [executable, "run", "--path", str(path), "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"chroma run exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{url}/api/v2/heartbeat", timeout=1.0).status_code == 200:
+                return server, url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise TimeoutError(f"Chroma server did not answer within {timeout}s")
+
+
+def _bench(store: ChromaVectorStore, vectors: np.ndarray, queries: np.ndarray, k: int) -> dict[str, float]:
+    ids = [f"bench::chunk::{i}" for i in range(len(vectors))]
+    metadatas: list[dict[str, Any]] = [{"doc_id": f"bench-{i % 100}", "chunk_index": i} for i in range(len(vectors))]
+    started = time.perf_counter()
+    store.upsert_raw(ids, [f"chunk {i}" for i in range(len(vectors))], metadatas, vectors)
+    upsert_ms = (time.perf_counter() - started) * 1000
+    store.query(queries[0].tolist(), k)
+    timings: list[float] = []
+    for query in queries:
+        started = time.perf_counter()
+        store.query(query.tolist(), k)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "upsert_ms": round(upsert_ms, 1),
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare in-process and remote Chroma query latency.")
+    parser.add_argument("--url", help="Existing Chroma server; by default one is started with `chroma run`.")
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--upsert-batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((args.vectors, args.dim)).astype(np.float32)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        server = None
+        url = args.url
+        if url is None:
+            server, url = start_chroma_server(root / "server")
+        try:
+            base = {"CHROMA_COLLECTION": f"bench_{int(time.time())}", "SQLITE_PATH": str(root / "app.db")}
+            local = ChromaVectorStore(Settings(**base, CHROMA_DIR=str(root / "local")))
+            remote = ChromaVectorStore(
+                Settings(
+                    **base,
+                    CHROMA_DIR=str(root / "remote"),
+                    VECTOR_STORE_BACKEND="http",
+                    CHROMA_HTTP_URL=url,
+                    CHROMA_HTTP_UPSERT_BATCH_SIZE=args.upsert_batch_size,
+                )
+            )
+            results = {
+                "vectors": args.vectors,
+                "dim": args.dim,
+                "queries": args.queries,
+                "k": args.k,
+                "in_process": _bench(local, vectors, queries, args.k),
+                "remote": _bench(remote, vectors, queries, args.k),
+            }
+            if args.url:
+                remote.drop()
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+    results["remote_overhead_p50_ms"] = round(results["remote"]["p50_ms"] - results["in_process"]["p50_ms"], 3)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
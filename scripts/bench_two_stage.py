@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.db.sqlite import document_centroid_version, init_db
+from app.eval.harness import load_cases, percentile
+from app.rag.centroids import centroid_index, refresh_doc_centroids
+from app.rag.models import RetrievalFilters
+from app.rag.ollama_client import OllamaClient
+from app.rag.scheduler import PRIORITY_EVAL, priority_scope
+from app.rag.sharded_store import open_vector_store
+
+
+def _measure(
+    cases: list[Any], vectors: list[list[float]], k: int, search: Callable[[list[float]], list[Any]]
+) -> dict[str, float]:
+    recalls: list[float] = []
+    timings: list[float] = []
+    for case, vector in zip(cases, vectors):
+        started = time.perf_counter()
+        chunks = search(vector)
+        timings.append((time.perf_counter() - started) * 1000)
+        retrieved = {str(chunk.metadata.get("doc_id")) for chunk in chunks[:k]}
+        expected = set(case.expected_doc_ids)
+        recalls.append(len(retrieved & expected) / len(expected) if expected else 0.0)
+    return {
+        "recall_at_k": round(sum(recalls) / len(recalls), 4) if recalls else 0.0,
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare direct chunk search with centroid document-then-chunk search on the benchmark set."
+    )
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10, 20, 50], help="Candidate documents (M) to try.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the centroid index before measuring.")
+    parser.add_argument("--max-recall-drop", type=float, default=0.05, help="Fail when the first M loses more recall.")
+    args = parser.parse_args()
+
+    configure_logging()
+    settings = get_settings()
+    init_db(settings.sqlite_path)
+    store = open_vector_store(settings)
+    cases = [case for case in load_cases(settings.benchmark_path) if case.expected_doc_ids]
+    if args.rebuild or document_centroid_version(settings.sqlite_path, collection=store.collection_name)[0] == 0:
+        refresh_doc_centroids(settings, store)
+    ollama = OllamaClient(settings)
+    with priority_scope(PRIORITY_EVAL):
+        vectors = [ollama.embed([case.question], model=store.embed_model)[0] for case in cases]
+
+    index = centroid_index(settings.sqlite_path)
+    results: dict[str, Any] = {
+        "cases": len(cases),
+        "k": args.k,
+        "direct": _measure(cases, vectors, args.k, lambda v: store.query(v, args.k)),
+    }
+    for m in args.docs:
+
+        def two_stage(vector: list[float], m: int = m) -> list[Any]:
+            docs = index.top_documents(store.collection_name, vector, m)
+            return store.query(vector, args.k, filters=RetrievalFilters(doc_ids=docs))
+
+        results[f"two_stage_m{m}"] = _measure(cases, vectors, args.k, two_stage)
+    print(json.dumps(results, indent=2))
+    first = results.get(f"two_stage_m{args.docs[0]}") if args.docs else None
+    if first and results["direct"]["recall_at_k"] - first["recall_at_k"] > args.max_recall_drop:
+        print(f"Two-stage recall@{args.k} drops more than {args.max_recall_drop}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
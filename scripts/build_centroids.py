@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import json
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.db.sqlite import init_db
+from app.rag.centroids import refresh_doc_centroids
+from app.rag.sharded_store import open_vector_store
+
+
+def main() -> None:
+    configure_logging()
+    settings = get_settings()
+    init_db(settings.sqlite_path)
+    store = open_vector_store(settings)
+    docs = refresh_doc_centroids(settings, store)
+    print(json.dumps({"collection": store.collection_name, "documents": docs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.db.sqlite import init_db
+from app.rag.sharded_store import open_vector_store
+from app.services.bulk_import import import_embedding_files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load pre-computed embeddings into the vector index without calling Ollama.")
+    parser.add_argument("records", type=Path, help="NDJSON with doc_id/source/text/vector, or JSONL metadata when --vectors is set.")
+    parser.add_argument("--vectors", type=Path, default=None, help="(n, dim) .npy array; row i belongs to record i.")
+    parser.add_argument("--embed-model", default=None, help="Model that produced the vectors (default: the collection's).")
+    args = parser.parse_args()
+
+    configure_logging()
+    settings = get_settings()
+    init_db(settings.sqlite_path)
+    summary = import_embedding_files(
+        settings,
+        open_vector_store(settings),
+        records_path=args.records,
+        vectors_path=args.vectors,
+        embed_model=args.embed_model,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.rag.snapshot import export_snapshot
+from app.rag.sharded_store import open_vector_store
+from app.services.snapshots import snapshot_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the live vector index as a float16 snapshot archive.")
+    parser.add_argument("--out", type=Path, default=None, help="Output .zip path (default: SNAPSHOT_DIR/snapshot-<ts>.zip).")
+    args = parser.parse_args()
+
+    configure_logging()
+    settings = get_settings()
+    path = args.out or snapshot_path(settings, "snapshot")
+    manifest = export_snapshot(settings, open_vector_store(settings), path)
+    print(json.dumps({"path": str(path), **{k: v for k, v in manifest.items() if k not in {"shards", "checksums"}}}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
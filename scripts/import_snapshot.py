@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.rag.snapshot import import_snapshot
+from app.rag.sharded_store import open_vector_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load a snapshot archive without calling Ollama.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--merge", action="store_true", help="Upsert into the live collection instead of swapping in a new one.")
+    args = parser.parse_args()
+
+    configure_logging()
+    settings = get_settings()
+    summary = import_snapshot(settings, open_vector_store(settings), args.path, replace=not args.merge)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,13 @@ from app.core.config import get_settings
 from app.core.logging import configure_logging
 from app.rag.ingestion import run_ingestion
 from app.rag.ollama_client import OllamaClient
-from app.rag.vector_store import ChromaVectorStore
+from app.rag.sharded_store import open_vector_store
 
 
 def main() -> None:
     configure_logging()
     settings = get_settings()
-    store = ChromaVectorStore(settings)
+    store = open_vector_store(settings)
     ollama = OllamaClient(settings)
     summary = run_ingestion(settings, store, ollama)
     print(summary)
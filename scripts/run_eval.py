@@ -6,7 +6,7 @@ from app.db.sqlite import init_db
 from app.eval.harness import run_eval
 from app.rag.ollama_client import OllamaClient
 from app.rag.pipeline import RAGPipeline
-from app.rag.vector_store import ChromaVectorStore
+from app.rag.sharded_store import open_vector_store
 
 
 def main() -> None:
@@ -14,7 +14,7 @@ def main() -> None:
     settings = get_settings()
     init_db(settings.sqlite_path)
 
-    store = ChromaVectorStore(settings)
+    store = open_vector_store(settings)
     ollama = OllamaClient(settings)
     pipeline = RAGPipeline(settings, store, ollama)
     metrics = run_eval(settings, pipeline)
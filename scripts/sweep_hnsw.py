@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import Settings, get_settings
+from app.core.logging import configure_logging
+from app.db.sqlite import init_db
+from app.eval.harness import EvalCase, load_cases, percentile
+from app.rag.ollama_client import OllamaClient
+from app.rag.scheduler import PRIORITY_EVAL, priority_scope
+from app.rag.sharded_store import open_vector_store
+from app.rag.vector_store import ChromaVectorStore
+
+
+def load_query_embeddings(
+    settings: Settings, cases: list[EvalCase], model: str, cache_path: Path, ollama: Any | None = None
+) -> list[list[float]]:
+    # Vectors are cached per embed model and question, so only new questions reach Ollama and a
+    # sweep over a warm cache runs without it.
+    cache: dict[str, dict[str, list[float]]] = {}
+    if cache_path.exists():
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+    vectors = cache.setdefault(model, {})
+    missing = [case.question for case in cases if case.question not in vectors]
+    if missing:
+        ollama = ollama or OllamaClient(settings)
+        with priority_scope(PRIORITY_EVAL):
+            vectors.update(zip(missing, ollama.embed(missing, model=model)))
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(cache), encoding="utf-8")
+    return [vectors[case.question] for case in cases]
+
+
+def _recall_at_5(chunks: list[Any], expected: set[str]) -> float:
+    # Documents in rank order of their best chunk, like the answer context sees them.
+    docs: list[str] = []
+    for chunk in chunks:
+        doc_id = str(chunk.metadata.get("doc_id"))
+        if doc_id not in docs:
+            docs.append(doc_id)
+    return len(set(docs[:5]) & expected) / len(expected) if expected else 0.0
+
+
+def sweep(
+    store: ChromaVectorStore,
+    cases: list[EvalCase],
+    vectors: list[list[float]],
+    ef_values: list[int],
+    top_k_values: list[int],
+    *,
+    repeats: int = 3,
+) -> list[dict[str, Any]]:
+    original = store.hnsw_config()["search_ef"]
+    results: list[dict[str, Any]] = []
+    try:
+        for ef in ef_values:
+            store.set_search_ef(ef)
+            for vector in vectors:
+                store.query(vector, max(top_k_values))
+            for top_k in top_k_values:
+                recalls: list[float] = []
+                timings: list[float] = []
+                for case, vector in zip(cases, vectors):
+                    for _ in range(repeats):
+                        started = time.perf_counter()
+                        chunks = store.query(vector, top_k)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    recalls.append(_recall_at_5(chunks, set(case.expected_doc_ids)))
+                results.append(
+                    {
+                        "ef_search": ef,
+                        "top_k": top_k,
+                        "recall_at_5": round(sum(recalls) / len(recalls), 4) if recalls else 0.0,
+                        "p50_ms": round(percentile(timings, 0.5), 3),
+                        "p95_ms": round(percentile(timings, 0.95), 3),
+                    }
+                )
+    finally:
+        if original is not None:
+            store.set_search_ef(int(original))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay the benchmark questions across HNSW ef_search and top_k values and report "
+        "recall@5 against vector query latency."
+    )
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 50, 100, 200])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--repeats", type=int, default=3, help="Timed queries per question and setting.")
+    parser.add_argument("--embeddings", default=None, help="Query embedding cache (JSON).")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    configure_logging()
+    settings = get_settings()
+    init_db(settings.sqlite_path)
+    store = open_vector_store(settings)
+    cases = [case for case in load_cases(settings.benchmark_path) if case.expected_doc_ids]
+    cache_path = Path(args.embeddings) if args.embeddings else settings.reports_dir / "query_embeddings.json"
+    vectors = load_query_embeddings(settings, cases, store.embed_model, cache_path)
+
+    rows = sweep(store, cases, vectors, args.ef_search, args.top_k, repeats=args.repeats)
+    report = {"cases": len(cases), "vectors": store.count(), "hnsw": store.hnsw_config(), "results": rows}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,31 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Settings the app builds without a test override (app.main's module-level settings used by the
+# request-logging middleware, the lru-cached default store) write under these paths, so point
+# them at a scratch directory before app.main is imported instead of the checkout's data/.
+_SCRATCH_ENV = {
+    "SQLITE_PATH": "app.db",
+    "CHROMA_DIR": "chroma",
+    "WRITER_QUEUE_DIR": "queue",
+    "REPLICA_SHARED_DIR": "replica",
+    "REPORTS_DIR": "reports",
+    "SNAPSHOT_DIR": "snapshots",
+    "BULK_IMPORT_DIR": "bulk",
+}
+_scratch_dir: str | None = None
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    global _scratch_dir
+    _scratch_dir = tempfile.mkdtemp(prefix="rag-tests-")
+    for name, relative in _SCRATCH_ENV.items():
+        os.environ[name] = os.path.join(_scratch_dir, relative)
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    if _scratch_dir is not None:
+        shutil.rmtree(_scratch_dir, ignore_errors=True)
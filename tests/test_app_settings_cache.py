@@ -0,0 +1,42 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.db.sqlite import _AppSettingsCache, cache_version, get_app_setting, init_db, log_request, set_app_setting
+
+
+def test_app_settings_cache_invalidates_on_local_and_external_writes(tmp_path: Path) -> None:
+    db_path = tmp_path / "app.db"
+    init_db(db_path)
+    assert get_app_setting(db_path, key="active_chat_model") is None
+
+    set_app_setting(db_path, key="active_chat_model", value="llama3.2:3b")
+    assert get_app_setting(db_path, key="active_chat_model") == "llama3.2:3b"
+
+    # Simulates another worker process writing through its own connection.
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE app_settings SET value = ? WHERE key = ?", ("qwen2.5:7b", "active_chat_model"))
+    assert get_app_setting(db_path, key="active_chat_model") == "qwen2.5:7b"
+
+
+def test_unrelated_writes_keep_the_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    db_path = tmp_path / "app.db"
+    init_db(db_path)
+    set_app_setting(db_path, key="active_chat_model", value="m")
+    version = cache_version(db_path, "app_settings")
+    assert get_app_setting(db_path, key="active_chat_model") == "m"
+
+    loads: list[int] = []
+    original = _AppSettingsCache._load
+    monkeypatch.setattr(_AppSettingsCache, "_load", lambda self: loads.append(1) or original(self))
+    log_request(db_path, method="POST", path="/query", status_code=200, latency_ms=1.0, success=True, error=None)
+    assert get_app_setting(db_path, key="active_chat_model") == "m"
+    assert loads == [] and cache_version(db_path, "app_settings") == version
+
+
+def test_app_settings_cache_creates_missing_schema(tmp_path: Path) -> None:
+    db_path = tmp_path / "fresh" / "app.db"
+    assert get_app_setting(db_path, key="active_chat_model") is None
+    set_app_setting(db_path, key="active_chat_model", value="m")
+    assert get_app_setting(db_path, key="active_chat_model") == "m"
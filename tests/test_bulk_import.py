@@ -0,0 +1,131 @@
+import io
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import get_ingestion_job, init_db, ingested_source_map
+from app.dependencies import get_store
+from app.main import app
+from app.rag.bulk_import import BulkImportError
+from app.rag.ingestion import ingest_document_texts
+from app.rag.vector_store import ChromaVectorStore
+from app.services.bulk_import import import_embedding_files
+
+
+class FakeOllama:
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+def _settings(tmp_path: Path) -> Settings:
+    return Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        BULK_IMPORT_DIR=str(tmp_path / "bulk"),
+        BULK_IMPORT_BATCH_SIZE=2,
+        OLLAMA_EMBED_MODEL="offline-embed",
+    )
+
+
+def _records(count: int) -> list[dict[str, object]]:
+    return [{"doc_id": f"doc{i // 2}", "source": f"corpus/doc{i // 2}.md", "text": f"chunk {i}"} for i in range(count)]
+
+
+def test_bulk_import_ndjson_and_npy_without_model_calls(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    init_db(settings.sqlite_path)
+    store = ChromaVectorStore(settings)
+    ndjson = tmp_path / "chunks.ndjson"
+    ndjson.write_text("\n".join(json.dumps({**r, "vector": [1.0, float(i), 0.0]}) for i, r in enumerate(_records(5))))
+
+    summary = import_embedding_files(settings, store, records_path=ndjson)
+    assert summary["chunks"] == 5 and summary["embed_dim"] == 3
+    assert store.collection_metadata()["embed_model"] == "offline-embed"
+    assert ingested_source_map(settings.sqlite_path)["doc1"] == ("bulk", "corpus/doc1.md")
+    chunk = store.query([1.0, 1.0, 0.0], top_k=1)[0]
+    assert chunk.chunk_id == "doc0::chunk::1" and chunk.metadata["source_p1"] == "corpus"
+
+    jsonl = tmp_path / "meta.jsonl"
+    jsonl.write_text("\n".join(json.dumps(r) for r in _records(4)[2:]))
+    vectors = tmp_path / "vectors.npy"
+    np.save(vectors, np.array([[0.0, 0.0, 1.0], [0.0, 1.0, 1.0]], dtype=np.float32))
+    import_embedding_files(settings, store, records_path=jsonl, vectors_path=vectors)
+    assert store.count() == 5
+    assert store.query([0.0, 0.0, 1.0], top_k=1)[0].chunk_id == "doc1::chunk::0"
+
+
+def test_bulk_import_rejects_wrong_dimension_and_model(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    init_db(settings.sqlite_path)
+    store = ChromaVectorStore(settings)
+    good = tmp_path / "good.ndjson"
+    good.write_text(json.dumps({"doc_id": "a", "text": "x", "vector": [1.0, 0.0]}))
+    import_embedding_files(settings, store, records_path=good)
+
+    bad = tmp_path / "bad.ndjson"
+    bad.write_text(json.dumps({"doc_id": "b", "text": "y", "vector": [1.0, 0.0, 0.0]}))
+    with pytest.raises(BulkImportError, match="dimension 3, expected 2"):
+        import_embedding_files(settings, store, records_path=bad)
+    with pytest.raises(BulkImportError, match="cannot be mixed"):
+        import_embedding_files(settings, store, records_path=good, embed_model="other")
+
+    jsonl = tmp_path / "meta.jsonl"
+    jsonl.write_text(json.dumps({"doc_id": "c", "text": "z"}))
+    vectors = tmp_path / "vectors.npy"
+    np.save(vectors, np.zeros((2, 2), dtype=np.float32))
+    with pytest.raises(BulkImportError, match="2 rows"):
+        import_embedding_files(settings, store, records_path=jsonl, vectors_path=vectors)
+    assert store.count() == 1
+
+
+def test_bulk_import_endpoint_runs_job(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    init_db(settings.sqlite_path)
+    store = ChromaVectorStore(settings)
+    payload = "\n".join(json.dumps({**r, "vector": [1.0, 0.5]}) for r in _records(3)).encode("utf-8")
+
+    app.dependency_overrides[get_store] = lambda: store
+    app.dependency_overrides[get_settings] = lambda: settings
+    client = TestClient(app)
+    response = client.post("/ingest/bulk", files={"records": ("chunks.ndjson", io.BytesIO(payload))})
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 202
+    job = get_ingestion_job(settings.sqlite_path, job_id=response.json()["job_id"])
+    assert job is not None and job["status"] == "success", job
+    assert store.count() == 3
+    assert not list(settings.bulk_import_dir.iterdir())
+
+
+def test_bulk_import_never_overwrites_chunks_other_documents_share(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    init_db(settings.sqlite_path)
+    store = ChromaVectorStore(settings)
+    shared = "Shared onboarding paragraph that both documents start with."
+    ingest_document_texts(settings, store, FakeOllama(), docs=[("A", "A.md", shared), ("B", "B.md", shared)])
+    ndjson = tmp_path / "chunks.ndjson"
+    ndjson.write_text(
+        "\n".join(
+            json.dumps(record)
+            for record in (
+                {"doc_id": "A", "text": "bulk replacement", "vector": [0.0, 1.0, 0.0]},
+                {"doc_id": "C", "text": shared, "vector": [0.0, 0.0, 1.0]},
+            )
+        )
+    )
+
+    summary = import_embedding_files(settings, store, records_path=ndjson)
+
+    assert summary["stale_chunks_released"] == 1 and summary["chunks_deduplicated"] == 1
+    rows = store._collection.get(include=["metadatas"])
+    by_owner = {meta["doc_id"]: (chunk_id, meta) for chunk_id, meta in zip(rows["ids"], rows["metadatas"])}
+    assert set(by_owner) == {"A", "B"}
+    b_id, b_meta = by_owner["B"]
+    assert b_meta["ref_count"] == 2 and "ref:C" in b_meta and "ref:A" not in b_meta
+    a_id, _ = by_owner["A"]
+    assert a_id != b_id
+    assert store.docstore.get_many(store.collection_name, [a_id, b_id]) == {b_id: shared, a_id: "bulk replacement"}
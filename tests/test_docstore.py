@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from app.core.config import Settings
+from app.rag.ingestion import ingest_document_texts
+from app.rag.models import Chunk
+from app.rag.pipeline import RAGPipeline
+from app.rag.vector_store import ChromaVectorStore
+
+
+class FakeOllama:
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(len(text) % 13), float(sum(map(ord, text)) % 31), 1.0] for text in texts]
+
+
+def _store(tmp_path: Path, **overrides: object) -> ChromaVectorStore:
+    settings = Settings(CHROMA_DIR=str(tmp_path / "chroma"), CHUNK_SIZE=50, CHUNK_OVERLAP=0, **overrides)
+    store = ChromaVectorStore(settings)
+    docs = [(f"doc{i}", f"doc{i}.md", " ".join(f"d{i}word{j}" for j in range(30))) for i in range(4)]
+    ingest_document_texts(settings, store, FakeOllama(), docs=docs)
+    return store
+
+
+def test_chunk_text_lives_in_docstore_and_loads_lazily(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    raw = store._sync_active().get(include=["documents"])
+    assert raw["ids"] and not any(raw["documents"])
+
+    hits = store.query([1.0, 2.0, 1.0], top_k=3, include_text=False)
+    assert [chunk.text for chunk in hits] == ["", "", ""]
+    store.load_texts(hits)
+    assert all("word" in chunk.text for chunk in hits)
+    full = store.query([1.0, 2.0, 1.0], top_k=3)
+    assert [chunk.text for chunk in full] == [chunk.text for chunk in hits]
+    assert store.docstore.stats()["hits"] >= 3
+
+
+def test_pipeline_reads_text_only_for_selected_chunks(tmp_path: Path) -> None:
+    store = _store(tmp_path, RETRIEVAL_MMR_ENABLED=True, RETRIEVAL_MMR_FETCH_K=12, DOCSTORE_CACHE_SIZE=0)
+    pipeline = RAGPipeline(settings=store.settings, store=store, ollama=FakeOllama())  # type: ignore[arg-type]
+    before = store.docstore.stats()["misses"]
+    citations, _ = pipeline.retrieve("d1word3", top_k=2)
+    assert len(citations) == 2 and all(c["chunk_text"] for c in citations)
+    assert store.docstore.stats()["misses"] - before == 2
+
+
+def test_legacy_text_is_backfilled_and_generations_stay_isolated(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    store._sync_active().upsert(ids=["legacy::chunk::0"], documents=["legacy text"], embeddings=[[9.0, 9.0, 9.0]])
+    assert store.query([9.0, 9.0, 9.0], top_k=1)[0].text == "legacy text"
+    assert store.docstore.get_many(store.collection_name, ["legacy::chunk::0"]) == {"legacy::chunk::0": "legacy text"}
+
+    old_name = store.collection_name
+    shadow = store.create_shadow("reindex")
+    shadow.upsert_chunks([Chunk(chunk_id="doc0::chunk::0", text="rewritten", metadata={"doc_id": "doc0"})], [[1.0, 1.0, 1.0]])
+    store.promote(shadow.collection_name)
+    assert store.query([1.0, 1.0, 1.0], top_k=1)[0].text == "rewritten"
+    store.rollback()
+    assert store.collection_name == old_name
+    assert next(store.iter_chunks())[0].text != "rewritten"
@@ -0,0 +1,105 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from app.rag.batching import AdaptiveBatchController, embed_chunks_adaptively
+from app.rag.models import Chunk
+
+
+def _chunks(count: int, size: int) -> list[Chunk]:
+    return [Chunk(chunk_id=f"d::chunk::{i}", text="x" * size, metadata={"doc_id": "d"}) for i in range(count)]
+
+
+def test_batches_are_sized_by_token_budget() -> None:
+    controller = AdaptiveBatchController(target_tokens=100, max_items=64)
+    pending = deque(_chunks(10, 160))  # 40 tokens each
+    assert len(controller.next_batch(pending)) == 2
+    pending = deque(_chunks(10, 4))
+    assert len(controller.next_batch(pending)) == 10
+
+
+def test_controller_grows_window_and_halves_on_timeout() -> None:
+    controller = AdaptiveBatchController(target_tokens=1024, min_tokens=128, max_in_flight=4, latency_target_ms=100)
+    for _ in range(5):
+        controller.on_success(10)
+    assert controller.in_flight_limit == 4
+    controller.on_failure()
+    assert controller.in_flight_limit == 2
+    assert controller.token_budget == 512
+    controller.on_success(500)
+    assert controller.in_flight_limit == 1
+
+
+class _FlakyEmbedder:
+    def __init__(self, error: Exception | None = None) -> None:
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.error = error or httpx.ReadTimeout("slow")
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://ollama/api/embed")
+    return httpx.HTTPStatusError("failed", request=request, response=httpx.Response(status, request=request))
+
+
+def test_embed_retries_timeouts_and_reports_throughput() -> None:
+    upserted: list[str] = []
+    summary = embed_chunks_adaptively(
+        _FlakyEmbedder(),
+        _chunks(20, 40),
+        AdaptiveBatchController(target_tokens=40, min_tokens=10, max_in_flight=3),
+        lambda batch, vectors: upserted.extend(chunk.chunk_id for chunk in batch),
+        backoff_seconds=0,
+    )
+    assert sorted(upserted) == sorted(chunk.chunk_id for chunk in _chunks(20, 40))
+    assert summary["embed_timeouts"] == 1
+    assert summary["batch_size_max"] <= 4
+    assert summary["chunks_per_sec"] > 0
+
+
+def test_transient_http_errors_back_off_and_controller_state_carries_over() -> None:
+    controller = AdaptiveBatchController(target_tokens=80, min_tokens=10, max_in_flight=1, latency_target_ms=1)
+    upserted: list[str] = []
+    first = embed_chunks_adaptively(
+        _FlakyEmbedder(_status_error(503)),
+        _chunks(2, 40),
+        controller,
+        lambda batch, vectors: upserted.extend(chunk.chunk_id for chunk in batch),
+        backoff_seconds=0,
+    )
+    assert first["embed_errors"] == 1 and first["embed_timeouts"] == 0
+    assert len(upserted) == 2 and controller.token_budget < 80
+
+    # The next page starts from the budget the first one ended with, not the configured target.
+    budget = controller.token_budget
+    sizes: list[int] = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        embed_chunks_adaptively(
+            _FlakyEmbedder(_status_error(429)),
+            _chunks(8, 40),
+            controller,
+            lambda batch, vectors: sizes.append(len(batch)),
+            backoff_seconds=0,
+            executor=executor,
+        )
+    assert sizes[0] <= max(1, budget // 10)
+
+
+def test_non_transient_errors_fail_without_retry() -> None:
+    embedder = _FlakyEmbedder(_status_error(400))
+    with pytest.raises(httpx.HTTPStatusError):
+        embed_chunks_adaptively(
+            embedder, _chunks(4, 40), AdaptiveBatchController(target_tokens=40, max_in_flight=1), lambda b, v: None, backoff_seconds=0
+        )
+    assert embedder.calls == 1
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from app.core.config import Settings
+from app.db.sqlite import create_ingestion_job, get_ingestion_job, init_db
+from app.rag.ingestion import ingest_document_texts
+from app.rag.pipeline import RAGPipeline
+from app.rag.vector_store import ChromaVectorStore
+from app.services.embed_migration import check_embedding_compatibility, enforce_embedding_policy, run_embed_migration
+
+
+class FakeOllama:
+    def __init__(self, default_model: str) -> None:
+        self.default_model = default_model
+        self.models: list[str] = []
+
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        used = model or self.default_model
+        self.models.append(used)
+        dim = 2 if used == "model-a" else 3
+        return [[1.0] * dim for _ in texts]
+
+
+def _settings(tmp_path: Path, model: str, **overrides: object) -> Settings:
+    return Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        OLLAMA_EMBED_MODEL=model,
+        REINDEX_MAX_CHUNKS_PER_SECOND=0,
+        **overrides,
+    )
+
+
+def test_model_change_keeps_serving_old_index_until_migration_swaps(tmp_path: Path) -> None:
+    old = _settings(tmp_path, "model-a")
+    init_db(old.sqlite_path)
+    ingest_document_texts(old, ChromaVectorStore(old), FakeOllama("model-a"), docs=[("a", "a.md", "alpha text")])
+
+    new = _settings(tmp_path, "model-b")
+    store = ChromaVectorStore(new)
+    report = check_embedding_compatibility(new, store)
+    assert report["status"] == "mismatch"
+    assert (report["index_embed_model"], report["index_embed_dim"]) == ("model-a", 2)
+
+    ollama = FakeOllama("model-b")
+    pipeline = RAGPipeline(settings=new, store=store, ollama=ollama)  # type: ignore[arg-type]
+    citations, _ = pipeline.retrieve("alpha?")
+    ingest_document_texts(new, store, ollama, docs=[("b", "b.md", "beta text")])
+    assert citations and ollama.models == ["model-a", "model-a"]
+
+    job_id = create_ingestion_job(new.sqlite_path, source_type="embed_migration", source=store.collection_name)
+    run_embed_migration(new, store, ollama, job_id=job_id)
+    job = get_ingestion_job(new.sqlite_path, job_id=job_id)
+    assert job is not None and job["status"] == "success", job
+
+    assert check_embedding_compatibility(new, store)["status"] == "ok"
+    assert store.collection_metadata()["embed_dim"] == 3
+    assert store.count() == 2
+    ollama.models.clear()
+    pipeline.retrieve("beta?")
+    assert ollama.models == ["model-b"]
+
+
+def test_refuse_policy_blocks_startup_on_mismatch(tmp_path: Path) -> None:
+    old = _settings(tmp_path, "model-a")
+    init_db(old.sqlite_path)
+    ingest_document_texts(old, ChromaVectorStore(old), FakeOllama("model-a"), docs=[("a", "a.md", "alpha text")])
+    new = _settings(tmp_path, "model-b", EMBED_MODEL_MISMATCH_POLICY="refuse")
+    with pytest.raises(RuntimeError):
+        enforce_embedding_policy(new, ChromaVectorStore(new))
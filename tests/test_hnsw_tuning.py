@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.config import Settings
+from app.db.sqlite import init_db
+from app.eval.harness import EvalCase
+from app.rag.ingestion import ingest_document_texts
+from app.rag.vector_store import ChromaVectorStore
+from scripts.sweep_hnsw import load_query_embeddings, sweep
+
+
+class FakeOllama:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text) % 7), float(sum(map(ord, text)) % 11), 1.0] for text in texts]
+
+
+@pytest.fixture
+def settings(tmp_path: Path) -> Settings:
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        CHUNK_SIZE=60,
+        CHUNK_OVERLAP=0,
+        HNSW_M=8,
+        HNSW_CONSTRUCTION_EF=40,
+        HNSW_SEARCH_EF=30,
+    )
+    init_db(settings.sqlite_path)
+    return settings
+
+
+def test_hnsw_settings_apply_to_new_and_existing_collections(settings: Settings) -> None:
+    store = ChromaVectorStore(settings)
+    assert store.hnsw_config() == {"M": 8, "construction_ef": 40, "search_ef": 30}
+    assert store.runtime_stats()["hnsw"]["search_ef"] == 30
+
+    reader = ChromaVectorStore(settings.model_copy(update={"HNSW_SEARCH_EF": 80}), read_only=True)
+    assert reader.hnsw_config()["search_ef"] == 30
+
+    reopened = ChromaVectorStore(settings.model_copy(update={"HNSW_SEARCH_EF": 80, "HNSW_M": 32}))
+    # The graph degree is fixed when the collection is built; only the search width changes.
+    assert reopened.hnsw_config() == {"M": 8, "construction_ef": 40, "search_ef": 80}
+    assert ChromaVectorStore(settings, read_only=True).hnsw_config()["search_ef"] == 80
+
+
+def test_sweep_reuses_cached_embeddings_and_restores_search_ef(settings: Settings, tmp_path: Path) -> None:
+    store = ChromaVectorStore(settings)
+    docs = [(f"d{i}", f"d{i}.md", " ".join(f"d{i}w{j}" for j in range(20))) for i in range(4)]
+    ingest_document_texts(settings, store, FakeOllama(), docs=docs)
+    cases = [EvalCase(f"q{i}", f"d{i}w3", [f"d{i}"], []) for i in range(3)]
+
+    cache_path = tmp_path / "reports" / "query_embeddings.json"
+    ollama = FakeOllama()
+    vectors = load_query_embeddings(settings, cases[:2], store.embed_model, cache_path, ollama)
+    vectors = load_query_embeddings(settings, cases, store.embed_model, cache_path, ollama)
+    assert ollama.calls == [["d0w3", "d1w3"], ["d2w3"]]
+    assert set(json.loads(cache_path.read_text(encoding="utf-8"))[store.embed_model]) == {"d0w3", "d1w3", "d2w3"}
+
+    rows = sweep(store, cases, vectors, [10, 50], [2, 5], repeats=1)
+    assert [(row["ef_search"], row["top_k"]) for row in rows] == [(10, 2), (10, 5), (50, 2), (50, 5)]
+    assert all(0.0 <= row["recall_at_5"] <= 1.0 and row["p95_ms"] >= row["p50_ms"] for row in rows)
+    assert store.hnsw_config()["search_ef"] == 30
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from app.core.config import Settings
+from app.db.sqlite import init_db
+from app.rag.dedup import estimate_jaccard, minhash_signature
+from app.rag.ingestion import ingest_document_texts
+from app.rag.vector_store import ChromaVectorStore
+
+
+class FakeOllama:
+    def __init__(self) -> None:
+        self.embedded: list[str] = []
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+def _settings(tmp_path: Path, **overrides: object) -> Settings:
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        CHUNK_SIZE=200,
+        CHUNK_OVERLAP=0,
+        **overrides,
+    )
+    init_db(settings.sqlite_path)
+    return settings
+
+
+def test_exact_duplicate_chunks_are_embedded_once_with_refs(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    store = ChromaVectorStore(settings)
+    ollama = FakeOllama()
+    boilerplate = "Copyright notice and cookie banner text repeated on every page."
+
+    first = ingest_document_texts(settings, store, ollama, docs=[("a", "a.md", boilerplate), ("b", "b.md", boilerplate)])
+    second = ingest_document_texts(settings, store, ollama, docs=[("c", "c.md", boilerplate)])
+    again = ingest_document_texts(settings, store, ollama, docs=[("a", "a.md", boilerplate)])
+
+    assert len(ollama.embedded) == 1
+    assert first["chunks_deduplicated"] == 1 and first["dedup_ratio"] == 0.5
+    assert second["chunks_deduplicated"] == 1 and second["chunks_embedded"] == 0
+    assert again["chunks_unchanged"] == 1
+    stored = store._collection.get(ids=["a::chunk::0"], include=["metadatas"])["metadatas"][0]
+    assert stored["ref:a"] == stored["ref:b"] == stored["ref:c"] == 0
+    assert stored["ref_count"] == 3
+    assert store.count() == 1
+
+
+def test_near_duplicate_documents_are_skipped(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, INGEST_NEAR_DUP_ENABLED=True, INGEST_NEAR_DUP_THRESHOLD=0.7)
+    store = ChromaVectorStore(settings)
+    words = " ".join(f"word{i}" for i in range(300))
+    edited = words.replace("word150", "changed")
+
+    assert estimate_jaccard(minhash_signature(words), minhash_signature(edited)) > 0.7
+    ingest_document_texts(settings, store, FakeOllama(), docs=[("orig", "orig.md", words)])
+    summary = ingest_document_texts(settings, store, FakeOllama(), docs=[("copy", "copy.md", edited)])
+
+    assert summary["docs_near_duplicate"] == 1
+    assert summary["near_duplicates"][0]["duplicate_of"] == "orig"
+    assert summary["chunks"] == 0
+
+
+def test_reingesting_the_owner_keeps_shared_chunks_for_other_documents(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    store = ChromaVectorStore(settings)
+    shared = "Shared onboarding paragraph that both documents start with."
+    ingest_document_texts(settings, store, FakeOllama(), docs=[("A", "A.md", shared), ("B", "B.md", shared)])
+
+    summary = ingest_document_texts(settings, store, FakeOllama(), docs=[("A", "A.md", "completely different")])
+
+    assert summary["stale_chunks_released"] == 1
+    rows = store._collection.get(include=["metadatas"])
+    by_owner = {meta["doc_id"]: (chunk_id, meta) for chunk_id, meta in zip(rows["ids"], rows["metadatas"])}
+    b_id, b_meta = by_owner["B"]
+    assert b_meta["ref_count"] == 1 and "ref:A" not in b_meta
+    a_id, a_meta = by_owner["A"]
+    assert a_id != b_id and a_meta["ref_count"] == 1
+    texts = store.docstore.get_many(store.collection_name, [a_id, b_id])
+    assert texts == {b_id: shared, a_id: "completely different"}
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import create_ingestion_job, get_ingestion_job, ingested_source_map, init_db, record_ingested_source
+from app.dependencies import get_store
+from app.main import app
+from app.rag.ingestion import ingest_document_texts
+from app.rag.vector_store import ChromaVectorStore
+from app.services.cleanup import run_orphan_gc
+
+TEXT_A = " ".join(f"alpha{i}" for i in range(40))
+
+
+class FakeOllama:
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def _settings(tmp_path: Path) -> Settings:
+    return Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        DOCS_DIR=str(tmp_path / "docs"),
+        CHUNK_SIZE=100,
+        CHUNK_OVERLAP=10,
+        INGEST_GC_MIN_AGE_SECONDS=0,
+    )
+
+
+def _ingest(settings: Settings, store: ChromaVectorStore, docs: list[tuple[str, str, str]]) -> None:
+    ingest_document_texts(settings, store, FakeOllama(), docs=docs, source_type="upload")
+    for doc_id, source, _ in docs:
+        record_ingested_source(settings.sqlite_path, source_type="upload", source=source, doc_id=doc_id)
+
+
+def test_delete_source_keeps_chunks_shared_with_other_documents(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    init_db(settings.sqlite_path)
+    store = ChromaVectorStore(settings)
+    # doc-b is exactly doc-a's first chunk, so that chunk is stored once with two refs.
+    _ingest(settings, store, [("doc-a", "a.md", TEXT_A), ("doc-b", "team/b.md", TEXT_A[:100])])
+    before = store.count()
+
+    app.dependency_overrides[get_store] = lambda: store
+    app.dependency_overrides[get_settings] = lambda: settings
+    client = TestClient(app)
+    response = client.delete("/ingest/sources/doc-a")
+    missing = client.delete("/ingest/sources/doc-a")
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert payload["chunks_updated"] == 1
+    assert payload["chunks_deleted"] == before - 1
+    assert store.count() == payload["vector_count"] == 1
+    assert missing.status_code == 404
+    remaining = next(store.iter_chunks())[0].metadata
+    assert remaining["doc_id"] == "doc-b" and remaining["source"] == "team/b.md"
+    assert remaining["source_p1"] == "team" and "ref:doc-a" not in remaining
+    assert "doc-a" not in ingested_source_map(settings.sqlite_path)
+
+
+def test_orphan_gc_removes_unregistered_documents_and_compacts(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    init_db(settings.sqlite_path)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "local.md").write_text("local text", encoding="utf-8")
+    store = ChromaVectorStore(settings)
+    _ingest(settings, store, [("doc-a", "a.md", TEXT_A)])
+    ingest_document_texts(settings, store, FakeOllama(), docs=[("stale", "stale.md", "gone " * 30)])
+    ingest_document_texts(settings, store, FakeOllama(), docs=[("local.md", "local.md", "local text")])
+    old_name = store.collection_name
+    expected = store.count() - 2
+
+    job_id = create_ingestion_job(settings.sqlite_path, source_type="orphan_gc", source=old_name)
+    run_orphan_gc(settings, store, job_id=job_id)
+
+    job = get_ingestion_job(settings.sqlite_path, job_id=job_id)
+    assert job is not None and job["status"] == "success", job
+    assert job["summary"]["orphan_docs"] == 1 and job["summary"]["chunks_deleted"] == 2
+    assert store.collection_name != old_name
+    assert store.count() == expected
+    doc_ids = {chunk.metadata["doc_id"] for page in store.iter_chunks() for chunk in page}
+    assert doc_ids == {"doc-a", "local.md"}
+    assert store.collection_metadata()["chunk_size"] == 100
+
+
+def test_cors_preflight_allows_delete() -> None:
+    origin = get_settings().cors_origins[0]
+    response = TestClient(app).options(
+        "/ingest/sources/doc-a",
+        headers={"Origin": origin, "Access-Control-Request-Method": "DELETE"},
+    )
+    assert response.status_code == 200
+    assert "DELETE" in response.headers["access-control-allow-methods"]
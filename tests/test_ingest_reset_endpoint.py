@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
 
 from app.core.config import Settings, get_settings
@@ -7,7 +8,8 @@ from app.dependencies import get_store
 from app.main import app
 from app.rag.models import Chunk
 from app.rag.vector_store import ChromaVectorStore
-from app.db.sqlite import init_db, record_ingested_source
+from app.db.sqlite import ingested_source_map, init_db, record_ingested_source
+from app.services.reindex import exclusive_rebuild, reset_index
 
 
 def test_ingest_reset_endpoint_clears_vectors(tmp_path: Path) -> None:
@@ -41,3 +43,25 @@ def test_ingest_reset_endpoint_clears_vectors(tmp_path: Path) -> None:
     assert payload["sources_cleared"] == 1
     assert payload["reset_count"] == 1
     assert store.count() == 0
+
+
+def test_ingest_reset_is_refused_while_a_reindex_runs(tmp_path: Path) -> None:
+    settings = Settings(SQLITE_PATH=str(tmp_path / "app.db"), CHROMA_DIR=str(tmp_path / "chroma"))
+    init_db(settings.sqlite_path)
+    store = ChromaVectorStore(settings)
+    store.upsert_chunks([Chunk(chunk_id="doc::chunk::0", text="sample", metadata={"doc_id": "doc"})], [[0.1, 0.2, 0.3]])
+    record_ingested_source(settings.sqlite_path, source_type="upload", source="doc.txt", doc_id="doc")
+
+    app.dependency_overrides[get_store] = lambda: store
+    app.dependency_overrides[get_settings] = lambda: settings
+    try:
+        with exclusive_rebuild():
+            response = TestClient(app).post("/ingest/reset", json={"confirm": True})
+            with pytest.raises(RuntimeError):
+                reset_index(settings, store)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 409
+    assert store.count() == 1
+    assert ingested_source_map(settings.sqlite_path) == {"doc": ("upload", "doc.txt")}
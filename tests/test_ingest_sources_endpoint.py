@@ -4,7 +4,9 @@ from fastapi.testclient import TestClient
 
 from app.core.config import Settings, get_settings
 from app.db.sqlite import init_db, record_ingested_source
+from app.dependencies import get_store
 from app.main import app
+from app.rag.vector_store import ChromaVectorStore
 
 
 def test_ingest_sources_endpoint_smoke(tmp_path: Path) -> None:
@@ -13,10 +15,11 @@ def test_ingest_sources_endpoint_smoke(tmp_path: Path) -> None:
     record_ingested_source(db, source_type="link", source="https://example.com/a", doc_id="a_doc")
     record_ingested_source(db, source_type="upload", source="notes.md", doc_id="notes_doc")
 
-    def override_settings() -> Settings:
-        return Settings(SQLITE_PATH=str(db))
+    settings = Settings(SQLITE_PATH=str(db), CHROMA_DIR=str(tmp_path / "chroma"))
+    store = ChromaVectorStore(settings)
 
-    app.dependency_overrides[get_settings] = override_settings
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_store] = lambda: store
     client = TestClient(app)
     response = client.get("/ingest/sources?limit=10")
     app.dependency_overrides.clear()
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from app.core.config import Settings
+from app.rag.mmr import mmr_select
+from app.rag.models import Chunk
+from app.rag.pipeline import RAGPipeline
+from app.rag.vector_store import ChromaVectorStore
+
+
+def test_mmr_prefers_diverse_candidates_and_caps_per_doc() -> None:
+    query = [1.0, 0.0, 0.0]
+    candidates = [[1.0, 0.01, 0.0], [1.0, 0.02, 0.0], [0.7, 0.7, 0.0], [0.7, 0.0, 0.7]]
+    assert mmr_select(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+    assert mmr_select(query, candidates, k=2, lambda_mult=0.5)[1] in (2, 3)
+    capped = mmr_select(query, candidates, k=3, lambda_mult=1.0, doc_ids=["a", "a", "a", "b"], max_per_doc=1)
+    assert capped == [0, 3]
+
+
+class FakeOllama:
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+
+def test_pipeline_retrieve_with_mmr_over_fetches_from_store(tmp_path: Path) -> None:
+    settings = Settings(CHROMA_DIR=str(tmp_path / "chroma"), RETRIEVAL_MMR_FETCH_K=4, RETRIEVAL_MAX_CHUNKS_PER_DOC=1)
+    store = ChromaVectorStore(settings)
+    vectors = [[1.0, 0.01, 0.0], [1.0, 0.02, 0.0], [0.8, 0.0, 0.5]]
+    chunks = [
+        Chunk(chunk_id=f"{doc}::chunk::{i}", text=f"text {i}", metadata={"doc_id": doc, "source": doc, "chunk_index": i})
+        for i, doc in enumerate(["a", "a", "b"])
+    ]
+    store.upsert_chunks(chunks, vectors)
+    pipeline = RAGPipeline(settings=settings, store=store, ollama=FakeOllama())  # type: ignore[arg-type]
+
+    plain, _ = pipeline.retrieve("q", top_k=2)
+    diverse, doc_ids = pipeline.retrieve("q", top_k=2, mmr=True)
+
+    assert [c["doc_id"] for c in plain] == ["a", "a"]
+    assert doc_ids == ["a", "b"]
+    assert [c["rank"] for c in diverse] == [1, 2]
@@ -8,9 +8,16 @@ from app.main import app
 
 
 class FakeOllama:
+    def __init__(self) -> None:
+        self.preloaded: list[str] = []
+
     def list_models(self) -> list[str]:
         return ["llama3.2:1b", "llama3.2:3b"]
 
+    def preload(self, model: str, *, embedding: bool = False) -> dict[str, str | None]:
+        self.preloaded.append(model)
+        return {}
+
 
 def test_model_select_persists_active_model(tmp_path: Path) -> None:
     db = tmp_path / "app.db"
@@ -19,7 +26,8 @@ def test_model_select_persists_active_model(tmp_path: Path) -> None:
         return Settings(SQLITE_PATH=str(db), OLLAMA_CHAT_MODEL="llama3.2:3b")
 
     app.dependency_overrides[get_settings] = override_settings
-    app.dependency_overrides[get_ollama] = lambda: FakeOllama()
+    ollama = FakeOllama()
+    app.dependency_overrides[get_ollama] = lambda: ollama
     client = TestClient(app)
 
     select = client.post("/models/select", json={"chat_model": "llama3.2:1b"})
@@ -27,6 +35,7 @@ def test_model_select_persists_active_model(tmp_path: Path) -> None:
     app.dependency_overrides.clear()
 
     assert select.status_code == 200
+    assert ollama.preloaded == ["llama3.2:1b"]
     assert models.status_code == 200
     payload = models.json()
     assert payload["active_chat_model"] == "llama3.2:1b"
@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.dependencies import get_ollama
+from app.main import app
+from app.rag.ollama_client import OllamaClient
+from app.services.warmup import warm_up_models
+
+
+def _recording_client(settings: Settings, payloads: list[tuple[str, dict]], fail_load: bool = False) -> OllamaClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "llama3.2:1b"}, {"name": "llama3.2:3b"}]})
+        body = json.loads(request.content)
+        payloads.append((request.url.path, body))
+        if fail_load:
+            return httpx.Response(500, json={"error": "out of memory"})
+        if request.url.path == "/api/embed":
+            return httpx.Response(200, json={"embeddings": [[0.1, 0.2]] if body.get("input") else []})
+        return httpx.Response(200, json={"response": "OK" if body.get("prompt") else "", "done": True})
+
+    client = OllamaClient(settings)
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_warm_up_preloads_and_runs_probe_requests() -> None:
+    payloads: list[tuple[str, dict]] = []
+    settings = Settings(OLLAMA_KEEP_ALIVE="-1")
+    summary = warm_up_models(settings, _recording_client(settings, payloads), chat_model="llama3.2:3b")
+
+    assert summary["errors"] == []
+    assert [path for path, _ in payloads] == ["/api/generate", "/api/embed", "/api/embed", "/api/generate"]
+    assert all(body["keep_alive"] == -1 for _, body in payloads)
+    assert payloads[0][1] == {"model": "llama3.2:3b", "keep_alive": -1}
+    assert payloads[3][1]["options"] == {"num_predict": 1}
+
+
+def test_model_select_preloads_before_switching(tmp_path: Path) -> None:
+    db = tmp_path / "app.db"
+    settings = Settings(SQLITE_PATH=str(db), OLLAMA_CHAT_MODEL="llama3.2:3b")
+    payloads: list[tuple[str, dict]] = []
+    failing = _recording_client(settings, [], fail_load=True)
+    working = _recording_client(settings, payloads)
+
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_ollama] = lambda: failing
+    client = TestClient(app)
+    rejected = client.post("/models/select", json={"chat_model": "llama3.2:1b"})
+    unchanged = client.get("/models")
+    app.dependency_overrides[get_ollama] = lambda: working
+    accepted = client.post("/models/select", json={"chat_model": "llama3.2:1b"})
+    app.dependency_overrides.clear()
+
+    assert rejected.status_code == 503
+    assert unchanged.json()["active_chat_model"] == "llama3.2:3b"
+    assert accepted.status_code == 200
+    assert payloads == [("/api/generate", {"model": "llama3.2:1b", "keep_alive": "30m"})]
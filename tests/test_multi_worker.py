@@ -0,0 +1,193 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+from chromadb.api import ServerAPI
+from chromadb.api.client import SharedSystemClient
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import claim_writer_job, enqueue_writer_job, get_ingestion_job, ingested_source_map, init_db
+from app.dependencies import get_ollama, get_store
+from app.main import app
+from app.rag import vector_store
+from app.rag.models import Chunk
+from app.rag.vector_store import ChromaVectorStore, ReadOnlyStoreError
+from app.services import workers
+
+
+class FakeOllama:
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+WRITER_SCRIPT = """
+import sys
+from app.core.config import Settings
+from app.rag.models import Chunk
+from app.rag.vector_store import ChromaVectorStore
+
+store = ChromaVectorStore(Settings(CHROMA_DIR=sys.argv[1], WORKER_MODE="multi"))
+store.upsert_chunks([Chunk(chunk_id="late::chunk::0", text="late text", metadata={"doc_id": "late"})], [[0.0, 1.0, 0.0]])
+"""
+
+
+@pytest.fixture
+def settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Settings:
+    monkeypatch.setattr(workers, "_role", {"role": "reader", "handle": None})
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        WRITER_QUEUE_DIR=str(tmp_path / "queue"),
+        WORKER_MODE="multi",
+        INDEX_RELOAD_MIN_INTERVAL_SECONDS=0,
+        WRITER_QUEUE_POLL_SECONDS=0.05,
+        CHUNK_SIZE=100,
+        CHUNK_OVERLAP=0,
+    )
+    init_db(settings.sqlite_path)
+    return settings
+
+
+def test_read_only_worker_reloads_after_another_process_writes(settings: Settings) -> None:
+    writer = ChromaVectorStore(settings)
+    writer.upsert_chunks([Chunk(chunk_id="a::chunk::0", text="first", metadata={"doc_id": "a"})], [[1.0, 0.0, 0.0]])
+    reader = ChromaVectorStore(settings, read_only=True)
+    assert [c.chunk_id for c in reader.query([0.0, 1.0, 0.0], top_k=5)] == ["a::chunk::0"]
+    with pytest.raises(ReadOnlyStoreError):
+        reader.upsert_chunks([Chunk(chunk_id="b::chunk::0", text="b", metadata={"doc_id": "b"})], [[0.0, 1.0, 0.0]])
+
+    subprocess.run([sys.executable, "-c", WRITER_SCRIPT, settings.CHROMA_DIR], check=True, cwd=Path(__file__).parents[1])
+
+    hits = reader.query([0.0, 1.0, 0.0], top_k=5)
+    assert [c.chunk_id for c in hits] == ["late::chunk::0", "a::chunk::0"]
+    assert hits[0].text == "late text"
+
+
+def test_reloads_stop_systems_no_store_uses(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(vector_store, "RETIRED_SYSTEM_GRACE_SECONDS", 0.0)
+    writer = ChromaVectorStore(settings)
+    reader = ChromaVectorStore(settings, read_only=True)
+    servers: list[Any] = []
+    stopped: list[Any] = []
+    for i in range(3):
+        writer.upsert_chunks([Chunk(chunk_id=f"c{i}", text=f"t{i}", metadata={"doc_id": f"d{i}"})], [[1.0, float(i), 0.0]])
+        system = SharedSystemClient._identifier_to_system[settings.CHROMA_DIR]
+        servers.append(reader._client._server)
+        monkeypatch.setattr(system, "stop", lambda server=reader._client._server: stopped.append(server))
+        assert reader.count() == i + 1
+    reader.count()
+    # The writer still uses the first system; the ones only the reader used are stopped.
+    assert servers[0] is writer._client._server
+    assert stopped == servers[1:]
+    retired = [system.instance(ServerAPI) for system, _ in vector_store._retired_systems]
+    assert [server for server in servers if any(server is other for other in retired)] == servers[:1]
+
+
+def test_reader_queues_writes_for_the_writer(settings: Settings) -> None:
+    writable = ChromaVectorStore(settings)
+    reader = ChromaVectorStore(settings, read_only=True)
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_store] = lambda: reader
+    app.dependency_overrides[get_ollama] = lambda: FakeOllama()
+    client = TestClient(app)
+    accepted = client.post("/ingest/upload", files={"file": ("notes.md", b"queued for the writer " * 5, "text/markdown")})
+    job_id = accepted.json()["job_id"]
+    assert accepted.status_code == 202
+    assert get_ingestion_job(settings.sqlite_path, job_id=job_id)["status"] == "queued"
+    assert reader.count() == 0
+
+    assert workers.process_next_writer_job(settings, writable, FakeOllama()) == job_id  # type: ignore[arg-type]
+    assert workers.process_next_writer_job(settings, writable, FakeOllama()) is None  # type: ignore[arg-type]
+    assert get_ingestion_job(settings.sqlite_path, job_id=job_id)["status"] == "success"
+    assert list(settings.writer_queue_dir.iterdir()) == []
+    assert "notes.md" in ingested_source_map(settings.sqlite_path)
+
+    stop = threading.Event()
+    loop = threading.Thread(target=workers.run_writer_loop, args=(settings, writable, FakeOllama(), stop))
+    loop.start()
+    try:
+        deleted = client.delete("/ingest/sources/notes.md")
+        rollback = client.post("/ingest/reindex/rollback")
+    finally:
+        stop.set()
+        loop.join()
+        app.dependency_overrides.clear()
+    assert deleted.status_code == 200, deleted.text
+    assert deleted.json()["vector_count"] == 0 and reader.count() == 0
+    assert rollback.status_code == 409
+
+
+def test_writer_serializes_its_own_writes_with_queued_jobs(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(workers, "_role", {"role": "writer", "handle": None})
+    store = ChromaVectorStore(settings)
+    background = BackgroundTasks()
+    job_id = workers.submit_job(
+        background,
+        settings,
+        store,
+        FakeOllama(),  # type: ignore[arg-type]
+        kind="upload",
+        source="own.md",
+        payload={"filename": "own.md", "raw": b"written by the writer " * 5},
+    )
+    assert not background.tasks and get_ingestion_job(settings.sqlite_path, job_id=job_id)["status"] == "queued"
+
+    slow = settings.model_copy(update={"WRITER_JOB_WAIT_SECONDS": 0.1})
+    with workers._writer_job_lock:
+        with pytest.raises(TimeoutError):
+            workers.run_write_op(slow, store, kind="rollback", source="rollback", payload={})
+    assert workers.process_next_writer_job(settings, store, FakeOllama()) == job_id  # type: ignore[arg-type]
+    assert get_ingestion_job(settings.sqlite_path, job_id=job_id)["status"] == "success" and store.count() > 0
+
+
+def test_only_one_process_holds_the_writer_lock(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(workers, "_role", {"role": "single", "handle": None})
+    assert workers.elect_writer(settings) == "writer"
+    handle = workers._role["handle"]
+    with (settings.sqlite_path.parent / workers.WRITER_LOCK_FILENAME).open("a+") as other:
+        assert workers._try_lock(other) is False
+    handle.close()
+
+
+def test_new_writer_reruns_a_job_its_predecessor_claimed(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = ChromaVectorStore(settings)
+    job_id = workers.submit_job(
+        None,  # type: ignore[arg-type]
+        settings,
+        store,
+        FakeOllama(),  # type: ignore[arg-type]
+        kind="upload",
+        source="crash.md",
+        payload={"filename": "crash.md", "raw": b"claimed before the writer died " * 5},
+    )
+    # The previous writer took the job and died before finishing it.
+    assert claim_writer_job(settings.sqlite_path, owner="dead-writer", lease_seconds=900)[0] == job_id
+    assert workers.process_next_writer_job(settings, store, FakeOllama()) is None  # type: ignore[arg-type]
+
+    monkeypatch.setattr(workers, "_role", {"role": "single", "handle": None})
+    assert workers.elect_writer(settings) == "writer"
+    workers._role["handle"].close()
+    assert workers.process_next_writer_job(settings, store, FakeOllama()) == job_id  # type: ignore[arg-type]
+    assert get_ingestion_job(settings.sqlite_path, job_id=job_id)["status"] == "success" and store.count() > 0
+    assert workers.process_next_writer_job(settings, store, FakeOllama()) is None  # type: ignore[arg-type]
+    assert list(settings.writer_queue_dir.iterdir()) == []
+
+
+def test_tenant_job_fails_without_a_tenant_registry(settings: Settings) -> None:
+    store = ChromaVectorStore(settings)
+    job_id = enqueue_writer_job(
+        settings.sqlite_path,
+        source_type="upload",
+        source="acme.md",
+        payload={"filename": "acme.md", "raw": "unused", "tenant": "acme"},
+        tenant="acme",
+    )
+    assert workers.process_next_writer_job(settings, store, FakeOllama()) == job_id  # type: ignore[arg-type]
+    job = get_ingestion_job(settings.sqlite_path, job_id=job_id, tenant="acme")
+    assert job["status"] == "error" and "acme" in job["error"]
+    assert store.count() == 0
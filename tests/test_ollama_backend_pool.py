@@ -0,0 +1,55 @@
+import httpx
+
+from app.core.config import Settings
+from app.rag.backend_pool import BackendPool
+from app.rag.ollama_client import OllamaClient
+
+
+def test_pool_routes_to_least_loaded_backend() -> None:
+    pool = BackendPool("generate", ["http://a", "http://b"])
+    with pool.lease() as first:
+        with pool.lease() as second:
+            assert first.url != second.url
+        with pool.lease() as third:
+            assert third.url == second.url
+
+
+def test_pool_ejects_failing_backend_and_prefers_warm_model() -> None:
+    pool = BackendPool("generate", ["http://a", "http://b", "http://c"], failure_threshold=2, eject_seconds=60)
+    a, b, _ = pool.backends
+    pool.record_failure(a)
+    pool.record_failure(a)
+    pool.record_success(b, "llama3.2:3b")
+    for _ in range(4):
+        with pool.lease("llama3.2:3b") as backend:
+            assert backend.url == "http://b"
+        with pool.lease("other-model") as backend:
+            assert backend.url != "http://a"
+    stats = pool.stats()
+    assert stats["backends"][0]["healthy"] is False
+    assert stats["backends"][1]["loaded_models"] == ["llama3.2:3b"]
+
+
+def test_client_fails_over_and_uses_separate_embed_pool() -> None:
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(f"{request.url.host}{request.url.path}")
+        if request.url.host == "down":
+            raise httpx.ConnectError("refused", request=request)
+        if request.url.path == "/api/embed":
+            return httpx.Response(200, json={"embeddings": [[0.1, 0.2]]})
+        return httpx.Response(200, json={"response": "ok", "prompt_eval_count": 1, "eval_count": 2})
+
+    settings = Settings(OLLAMA_BASE_URLS="http://down,http://gen", OLLAMA_EMBED_BASE_URLS="http://embed")
+    client = OllamaClient(settings)
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert client.embed(["hello"]) == [[0.1, 0.2]]
+    for idx in range(2):
+        assert client.generate("hi", model=f"model-{idx}") == "ok"
+    assert calls[0] == "embed/api/embed"
+    assert all(not call.startswith("embed") for call in calls[1:])
+    stats = client.runtime_stats()["pools"]
+    assert stats["embed"]["backends"][0]["url"] == "http://embed"
+    assert stats["generate"]["backends"][0]["failures"] >= 1
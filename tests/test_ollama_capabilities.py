@@ -0,0 +1,63 @@
+import threading
+
+import httpx
+
+from app.core.config import Settings
+from app.rag.ollama_client import OllamaClient
+
+
+def test_legacy_embed_api_is_probed_once_and_fans_out() -> None:
+    calls: list[str] = []
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            calls.append(request.url.path)
+        if request.url.path == "/api/embed":
+            return httpx.Response(404, text="404 page not found")
+        prompt = request.read().decode()
+        return httpx.Response(200, json={"embedding": [float(len(prompt))]})
+
+    client = OllamaClient(Settings(OLLAMA_BASE_URL="http://legacy", OLLAMA_LEGACY_EMBED_CONCURRENCY=3))
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    first = client.embed(["a", "bb", "ccc"])
+    second = client.embed(["dd"])
+
+    assert len(first) == 3 and len(second) == 1
+    assert calls.count("/api/embed") == 1
+    assert calls.count("/api/embeddings") == 4
+    assert client.runtime_stats()["pools"]["embed"]["backends"][0]["embed_api"] == "embeddings"
+
+
+def test_missing_model_404_does_not_switch_to_legacy_api() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={"error": "model 'nomic-embed-text' not found"})
+
+    client = OllamaClient(Settings(OLLAMA_BASE_URL="http://current"))
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    try:
+        client.embed(["hello"])
+    except httpx.HTTPStatusError:
+        pass
+    else:
+        raise AssertionError("expected HTTPStatusError")
+    assert client.embed_pool.backends[0].embed_api is None
+
+
+def test_model_list_is_cached_until_forced() -> None:
+    tags_calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal tags_calls
+        tags_calls += 1
+        return httpx.Response(200, json={"models": [{"name": f"model-{tags_calls}"}]})
+
+    client = OllamaClient(Settings(OLLAMA_BASE_URL="http://tags", OLLAMA_MODEL_LIST_TTL_SECONDS=60))
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert client.list_models() == ["model-1"]
+    assert client.list_models() == ["model-1"]
+    assert client.list_models(force_refresh=True) == ["model-2"]
+    assert tags_calls == 2
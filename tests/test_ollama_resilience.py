@@ -0,0 +1,148 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.rag.backend_pool import BackendPool
+from app.rag.ollama_client import OllamaClient, _GenerateCancelled
+from app.rag.resilience import BREAKER_HALF_OPEN, BREAKER_OPEN, CircuitBreaker, CircuitOpenError, LatencyTracker
+
+
+def test_circuit_breaker_opens_and_probes_after_cooldown() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10)
+    breaker.record_failure(now=0.0)
+    assert breaker.available(1.0)
+    breaker.record_failure(now=1.0)
+    assert breaker.state == BREAKER_OPEN
+    assert not breaker.available(5.0)
+    assert breaker.available(11.0)
+    breaker.on_dispatch(11.0)
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert not breaker.available(11.0)
+    breaker.record_success()
+    assert breaker.available(11.0)
+
+
+def test_pool_fails_fast_when_all_breakers_open() -> None:
+    pool = BackendPool("generate", ["http://a"], failure_threshold=1, eject_seconds=60)
+    pool.record_failure(pool.backends[0])
+    with pytest.raises(CircuitOpenError):
+        with pool.lease():
+            pass
+
+
+def test_latency_tracker_threshold_needs_min_samples() -> None:
+    tracker = LatencyTracker(window=10)
+    tracker.observe("m", 100.0)
+    assert tracker.threshold_ms("m", percentile=0.95, min_samples=2) is None
+    tracker.observe("m", 200.0)
+    assert tracker.threshold_ms("m", percentile=0.5, min_samples=2) == 150.0
+
+
+def test_generate_hedges_stalled_call_to_another_backend() -> None:
+    release = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow":
+            release.wait(timeout=5)
+        return httpx.Response(200, json={"response": f"from {request.url.host}"})
+
+    settings = Settings(
+        OLLAMA_BASE_URLS="http://slow,http://fast",
+        OLLAMA_HEDGE_ENABLED=True,
+        OLLAMA_HEDGE_MIN_SAMPLES=1,
+        OLLAMA_AFFINITY_TTL_SECONDS=0,
+    )
+    client = OllamaClient(settings)
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+    client.generate_latency.observe(settings.OLLAMA_CHAT_MODEL, 10.0)
+    client.generate_pool._rr = 1  # next lease lands on the slow backend
+
+    started = time.perf_counter()
+    answer = client.generate("hi")
+    release.set()
+
+    assert answer == "from fast"
+    assert time.perf_counter() - started < 2
+    hedging = client.runtime_stats()["hedging"]
+    assert hedging["hedged"] == 1
+    assert hedging["hedge_wins"] == 1
+    assert hedging["hedge_rate"] == 1.0
+
+
+def test_losing_hedge_stream_is_closed_and_releases_its_slot() -> None:
+    sent: list[int] = []
+
+    def slow_stream():
+        for i in range(50):
+            time.sleep(0.05)
+            sent.append(i)
+            yield (f'{{"response": "s{i}", "done": false}}\n').encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow":
+            return httpx.Response(200, content=slow_stream())
+        return httpx.Response(200, content=b'{"response": "fast", "done": false}\n{"response": "", "done": true, "eval_count": 3}\n')
+
+    settings = Settings(
+        OLLAMA_BASE_URLS="http://slow,http://fast",
+        OLLAMA_HEDGE_ENABLED=True,
+        OLLAMA_HEDGE_MIN_SAMPLES=1,
+        OLLAMA_AFFINITY_TTL_SECONDS=0,
+    )
+    client = OllamaClient(settings)
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+    client.generate_latency.observe(settings.OLLAMA_CHAT_MODEL, 10.0)
+    client.generate_pool._rr = 1
+
+    meta = client.generate_with_meta("hi")
+    assert meta["text"] == "fast" and meta["completion_tokens"] == 3
+    time.sleep(0.3)
+    assert len(sent) < 10
+    assert client.runtime_stats()["hedging"]["losers_cancelled"] == 1
+    assert client.scheduler.stats()["in_flight"] == 0
+
+
+def test_hedge_is_skipped_without_a_free_scheduler_slot() -> None:
+    hosts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        time.sleep(0.1)
+        return httpx.Response(200, json={"response": f"from {request.url.host}"})
+
+    settings = Settings(
+        OLLAMA_BASE_URLS="http://slow,http://fast",
+        OLLAMA_HEDGE_ENABLED=True,
+        OLLAMA_HEDGE_MIN_SAMPLES=1,
+        OLLAMA_MAX_CONCURRENCY=1,
+        OLLAMA_AFFINITY_TTL_SECONDS=0,
+    )
+    client = OllamaClient(settings)
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+    client.generate_latency.observe(settings.OLLAMA_CHAT_MODEL, 10.0)
+    client.generate_pool._rr = 1
+
+    assert client.generate("hi") == "from slow"
+    assert hosts == ["slow"]
+    hedging = client.runtime_stats()["hedging"]
+    assert hedging["hedged"] == 0 and hedging["hedges_skipped"] == 1
+
+
+def test_cancelled_half_open_probe_frees_the_backend() -> None:
+    settings = Settings(OLLAMA_BASE_URLS="http://only", OLLAMA_BACKEND_FAILURE_THRESHOLD=1, OLLAMA_BACKEND_EJECT_SECONDS=0)
+    client = OllamaClient(settings)
+    client._client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b'{"response": "x"}\n'))
+    )
+    backend = client.generate_pool.backends[0]
+    client.generate_pool.record_failure(backend)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(_GenerateCancelled):
+        client._post_generate_stream({"model": "m", "prompt": "hi"}, "m", cancel)
+    assert backend.breaker.state == BREAKER_HALF_OPEN
+    assert backend.breaker.available(time.monotonic())
+    assert client.generate("hi") == "x"
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.rag.scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_EVAL,
+    PRIORITY_INTERACTIVE,
+    OllamaScheduler,
+    current_priority,
+    parse_priority_weights,
+    priority_scope,
+)
+
+
+def _queue_waiter(scheduler: OllamaScheduler, priority: str, order: list[str]) -> threading.Thread:
+    def run() -> None:
+        with scheduler.slot(priority):
+            order.append(priority)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_waiting(scheduler: OllamaScheduler, total: int) -> None:
+    deadline = time.time() + 2
+    while time.time() < deadline:
+        stats = scheduler.stats()
+        if sum(item["waiting"] for item in stats["classes"].values()) >= total:
+            return
+        time.sleep(0.005)
+    raise AssertionError("waiters never queued")
+
+
+def test_interactive_preempts_queued_bulk_work() -> None:
+    scheduler = OllamaScheduler(max_concurrency=1, weights=parse_priority_weights(""))
+    order: list[str] = []
+    with scheduler.slot(PRIORITY_BULK):
+        threads = [_queue_waiter(scheduler, PRIORITY_BULK, order)]
+        _wait_for_waiting(scheduler, 1)
+        threads.append(_queue_waiter(scheduler, PRIORITY_EVAL, order))
+        _wait_for_waiting(scheduler, 2)
+        threads.append(_queue_waiter(scheduler, PRIORITY_INTERACTIVE, order))
+        _wait_for_waiting(scheduler, 3)
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == [PRIORITY_INTERACTIVE, PRIORITY_EVAL, PRIORITY_BULK]
+
+
+def test_reserved_slot_is_kept_for_interactive() -> None:
+    scheduler = OllamaScheduler(max_concurrency=2, weights=parse_priority_weights(""), interactive_reserved_slots=1)
+    order: list[str] = []
+    with scheduler.slot(PRIORITY_BULK):
+        blocked = _queue_waiter(scheduler, PRIORITY_BULK, order)
+        _wait_for_waiting(scheduler, 1)
+        with scheduler.slot(PRIORITY_INTERACTIVE):
+            order.append("interactive")
+        assert order == ["interactive"]
+    blocked.join(timeout=2)
+    assert order == ["interactive", PRIORITY_BULK]
+
+
+def test_priority_scope_sets_context() -> None:
+    assert current_priority() == PRIORITY_INTERACTIVE
+    with priority_scope(PRIORITY_BULK):
+        assert current_priority() == PRIORITY_BULK
+    assert current_priority() == PRIORITY_INTERACTIVE
+    assert parse_priority_weights("bulk:2")[PRIORITY_BULK] == 2
+
+
+def test_metrics_ollama_endpoint_reports_scheduler() -> None:
+    client = TestClient(app)
+    response = client.get("/metrics/ollama")
+    assert response.status_code == 200
+    payload = response.json()
+    assert set(payload["scheduler"]["classes"]) == {PRIORITY_INTERACTIVE, PRIORITY_EVAL, PRIORITY_BULK}
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import init_db
+from app.main import app
+from app.rag.ingestion import ingest_document_texts
+from app.rag.vector_store import ChromaVectorStore
+from app.services import readiness
+
+
+class FakeOllama:
+    def __init__(self, healthy: bool = True) -> None:
+        self.healthy = healthy
+
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(len(text) % 7), float(sum(map(ord, text)) % 11), 1.0] for text in texts]
+
+    def healthcheck(self) -> bool:
+        return self.healthy
+
+
+@pytest.fixture
+def settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Settings:
+    monkeypatch.setattr(readiness, "_state", {"index_warmup": {"status": "pending"}, "checks": {}, "checked_at": None})
+    settings = Settings(
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        CHUNK_SIZE=40,
+        CHUNK_OVERLAP=0,
+        OLLAMA_WARMUP_ON_STARTUP=False,
+        READINESS_WARMUP_QUERIES=4,
+    )
+    init_db(settings.sqlite_path)
+    app.dependency_overrides[get_settings] = lambda: settings
+    yield settings
+    app.dependency_overrides.clear()
+
+
+def test_not_ready_until_warm_up_and_checks_have_run(settings: Settings) -> None:
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 503
+    assert "index warm-up has not finished" in response.json()["reasons"]
+    assert TestClient(app).get("/health").status_code == 200
+
+
+def test_ready_after_index_warm_up(settings: Settings) -> None:
+    store = ChromaVectorStore(settings)
+    docs = [(f"doc{i}", f"doc{i}.md", " ".join(f"w{i}{j}" for j in range(40))) for i in range(3)]
+    ingest_document_texts(settings, store, FakeOllama(), docs=docs)
+
+    summary = readiness.run_index_warmup(settings, store)
+    assert summary["vector_count"] == store.count() and summary["rounds"] >= 1
+    assert store.docstore.stats()["cached_chunks"] > 0
+    readiness.refresh_readiness(settings, store, FakeOllama())  # type: ignore[arg-type]
+
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True and body["index_warmup"]["status"] == "done"
+    assert body["checks"]["vector_store"]["detail"]["count"] == store.count()
+
+
+def test_unreachable_ollama_is_not_ready(settings: Settings) -> None:
+    store = ChromaVectorStore(settings)
+    readiness.run_index_warmup(settings, store)
+    readiness.refresh_readiness(settings, store, FakeOllama(healthy=False))  # type: ignore[arg-type]
+
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["ollama: Ollama is unreachable."]
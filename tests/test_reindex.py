@@ -0,0 +1,92 @@
+import threading
+from pathlib import Path
+from typing import Any
+
+from app.core.config import Settings
+from app.db.sqlite import create_ingestion_job, get_ingestion_job, init_db
+from app.rag.ingestion import chunk_text, ingest_document_texts
+from app.rag.models import RetrievalFilters
+from app.rag.vector_store import ChromaVectorStore, build_where
+from app.services.reindex import rebuild_documents, reconstruct_text, run_blue_green_rebuild, run_reindex
+
+
+class FakeOllama:
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def _settings(tmp_path: Path, chunk_size: int) -> Settings:
+    return Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        CHUNK_SIZE=chunk_size,
+        CHUNK_OVERLAP=20,
+        REINDEX_MAX_CHUNKS_PER_SECOND=0,
+    )
+
+
+def test_reconstruct_text_inverts_chunking() -> None:
+    text = " ".join(f"token{i}" for i in range(200))
+    assert reconstruct_text(chunk_text(text, 120, 20), 20) == text
+    assert reconstruct_text(chunk_text(text, 120, 20), 0) == text
+
+
+def test_reindex_builds_shadow_swaps_and_rolls_back(tmp_path: Path) -> None:
+    old_settings = _settings(tmp_path, 200)
+    init_db(old_settings.sqlite_path)
+    text = " ".join(f"word{i}" for i in range(150))
+    store = ChromaVectorStore(old_settings)
+    ingest_document_texts(old_settings, store, FakeOllama(), docs=[("doc", "notes/doc.md", text)], source_type="upload")
+    old_count = store.count()
+    old_name = store.collection_name
+
+    new_settings = _settings(tmp_path, 100)
+    live = ChromaVectorStore(new_settings)
+    job_id = create_ingestion_job(new_settings.sqlite_path, source_type="reindex", source=old_name)
+    run_reindex(new_settings, live, FakeOllama(), job_id=job_id)
+
+    job = get_ingestion_job(new_settings.sqlite_path, job_id=job_id)
+    assert job is not None and job["status"] == "success", job
+    assert live.collection_name != old_name
+    assert live.count() == len(chunk_text(text, 100, 20)) > old_count
+    # Another handle on the same directory follows the pointer swap.
+    assert store.collection_name == live.collection_name
+    rebuilt = next(live.iter_chunks())
+    assert {chunk.metadata["source_type"] for chunk in rebuilt} == {"upload"}
+
+    live.rollback()
+    assert live.collection_name == old_name and live.count() == old_count
+
+    deleted = live.gc_retired(grace_seconds=0)
+    assert deleted and old_name not in deleted
+    assert live.collection_state()["retired"] == []
+
+
+def test_writes_during_a_rebuild_reach_the_promoted_collection(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, 100)
+    init_db(settings.sqlite_path)
+    text = " ".join(f"word{i}" for i in range(60))
+    store = ChromaVectorStore(settings)
+    ingest_document_texts(settings, store, FakeOllama(), docs=[("doc", "doc.md", text)])
+    writers: list[threading.Thread] = []
+
+    def build(shadow: ChromaVectorStore, where: dict[str, Any] | None) -> dict[str, Any]:
+        summary = rebuild_documents(settings, store, shadow, FakeOllama(), where)
+        if where is None:
+            # Every chunk of this copy dedups into the existing ones; only its refs change.
+            ingest_document_texts(settings, store, FakeOllama(), docs=[("copy", "copy.md", text)])
+        elif not writers:
+            # Lands either before the final replay or, held by the pause, after the swap.
+            late = ("late", "late.md", "late arriving text " * 5)
+            writers.append(threading.Thread(target=ingest_document_texts, args=(settings, store, FakeOllama(), [late])))
+            writers[0].start()
+        return summary
+
+    job_id = create_ingestion_job(settings.sqlite_path, source_type="reindex", source=store.collection_name)
+    run_blue_green_rebuild(settings, store, job_id=job_id, label="reindex", build=build)
+    writers[0].join(timeout=10)
+
+    job = get_ingestion_job(settings.sqlite_path, job_id=job_id)
+    assert job is not None and job["status"] == "success", job
+    for doc_id in ("doc", "copy", "late"):
+        assert next(store.iter_chunks(where=build_where(RetrievalFilters(doc_ids=[doc_id]))), []), doc_id
@@ -0,0 +1,100 @@
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from app.core.config import Settings
+from app.db.sqlite import init_db
+from app.rag.ingestion import ingest_document_texts
+from app.rag.models import RetrievalFilters
+from app.rag.sharded_store import open_vector_store
+from app.rag.vector_store import ChromaVectorStore
+from scripts.bench_remote_store import start_chroma_server
+
+
+class FakeOllama:
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(len(text) % 7), float(sum(map(ord, text)) % 11), 1.0] for text in texts]
+
+
+@pytest.fixture(scope="module")
+def chroma_url(tmp_path_factory: pytest.TempPathFactory) -> Iterator[str]:
+    try:
+        server, url = start_chroma_server(tmp_path_factory.mktemp("chroma-server"))
+    except (RuntimeError, TimeoutError) as exc:
+        pytest.skip(f"Chroma server unavailable: {exc}")
+    yield url
+    server.terminate()
+    server.wait(timeout=10)
+
+
+def _settings(tmp_path: Path, url: str, node: str, collection: str, **overrides: object) -> Settings:
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / node / "chroma"),
+        SQLITE_PATH=str(tmp_path / node / "app.db"),
+        CHROMA_COLLECTION=collection,
+        VECTOR_STORE_BACKEND="http",
+        CHROMA_HTTP_URL=url,
+        INDEX_RELOAD_MIN_INTERVAL_SECONDS=0.0,
+        CHUNK_SIZE=60,
+        CHUNK_OVERLAP=0,
+        **overrides,
+    )
+    init_db(settings.sqlite_path)
+    return settings
+
+
+def _docs(prefix: str) -> list[tuple[str, str, str]]:
+    return [(f"{prefix}{i}", f"{prefix}{i}.md", " ".join(f"{prefix}{i}w{j}" for j in range(20))) for i in range(3)]
+
+
+def test_remote_store_keeps_text_on_the_server(tmp_path: Path, chroma_url: str) -> None:
+    settings = _settings(tmp_path, chroma_url, "api", f"remote_{uuid.uuid4().hex[:8]}", VECTOR_STORE_SHARDS=2)
+    store = open_vector_store(settings)
+    assert type(store) is ChromaVectorStore
+    assert store._client is ChromaVectorStore(settings.model_copy(update={"CHROMA_COLLECTION": "other"}))._client
+
+    ingest_document_texts(settings, store, FakeOllama(), docs=_docs("a"))
+    hits = store.query(FakeOllama().embed(["a1w0"])[0], top_k=3, filters=RetrievalFilters(doc_ids=["a1"]))
+    assert hits and all("a1w" in hit.text for hit in hits)
+    assert store.docstore.stats()["cached_chunks"] == 0
+
+    pages = [chunk for page in store.iter_chunks() for chunk in page]
+    assert len(pages) == store.count() and all(chunk.text for chunk in pages)
+
+
+def test_remote_upserts_are_batched(tmp_path: Path, chroma_url: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = _settings(tmp_path, chroma_url, "api", f"remote_{uuid.uuid4().hex[:8]}", CHROMA_HTTP_UPSERT_BATCH_SIZE=2)
+    store = ChromaVectorStore(settings)
+    collection = store._sync_active()
+    calls: list[int] = []
+    original = collection.upsert
+    monkeypatch.setattr(collection, "upsert", lambda **kwargs: calls.append(len(kwargs["ids"])) or original(**kwargs))
+
+    store.upsert_raw(
+        [f"c{i}" for i in range(5)],
+        [f"text {i}" for i in range(5)],
+        [{"doc_id": "d", "chunk_index": i} for i in range(5)],
+        [[float(i), 1.0, 0.0] for i in range(5)],
+    )
+    assert calls == [2, 2, 1]
+    assert store.count() == 5
+
+
+def test_nodes_share_the_active_collection_pointer(tmp_path: Path, chroma_url: str) -> None:
+    collection = f"remote_{uuid.uuid4().hex[:8]}"
+    writer = ChromaVectorStore(_settings(tmp_path, chroma_url, "writer", collection))
+    reader = ChromaVectorStore(_settings(tmp_path, chroma_url, "reader", collection))
+    ingest_document_texts(writer.settings, writer, FakeOllama(), docs=_docs("a"))
+    assert reader.count() == writer.count()
+
+    shadow = writer.create_shadow("reindex")
+    ingest_document_texts(writer.settings, shadow, FakeOllama(), docs=_docs("b"))
+    writer.promote(shadow.collection_name)
+
+    assert reader.collection_name == shadow.collection_name
+    assert reader.collection_state()["previous"] == collection
+    assert not any(name.endswith("__pointer") for name in reader.collection_state()["collections"])
+    hits = reader.query(FakeOllama().embed(["b0w0"])[0], top_k=2)
+    assert hits and all(str(hit.metadata["doc_id"]).startswith("b") for hit in hits)
@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import init_db
+from app.main import app
+from app.rag.ingestion import ingest_document_texts
+from app.rag import write_journal
+from app.rag.vector_store import ChromaVectorStore
+from app.services import readiness, replica
+from app.services.replica import index_version, publish_snapshot, read_latest, sync_replica
+
+
+class FakeOllama:
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(len(text) % 7), float(sum(map(ord, text)) % 11), 1.0] for text in texts]
+
+
+def _settings(tmp_path: Path, name: str, role: str) -> Settings:
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / name / "chroma"),
+        SQLITE_PATH=str(tmp_path / name / "app.db"),
+        SNAPSHOT_DIR=str(tmp_path / name / "snapshots"),
+        REPLICA_SHARED_DIR=str(tmp_path / "shared"),
+        REPLICA_ROLE=role,
+        REPLICA_KEEP_VERSIONS=2,
+        CHUNK_SIZE=60,
+        CHUNK_OVERLAP=0,
+        OLLAMA_WARMUP_ON_STARTUP=False,
+    )
+    init_db(settings.sqlite_path)
+    return settings
+
+
+def _docs(prefix: str) -> list[tuple[str, str, str]]:
+    return [(f"{prefix}{i}", f"{prefix}{i}.md", " ".join(f"{prefix}{i}w{j}" for j in range(20))) for i in range(3)]
+
+
+def test_replica_swaps_to_each_published_version(tmp_path: Path) -> None:
+    writer_settings = _settings(tmp_path, "writer", "publisher")
+    replica_settings = _settings(tmp_path, "replica", "replica")
+    writer = ChromaVectorStore(writer_settings)
+    replica = ChromaVectorStore(replica_settings)
+    ingest_document_texts(writer_settings, writer, FakeOllama(), docs=_docs("a"))
+
+    first = publish_snapshot(writer_settings, writer)
+    assert first is not None and publish_snapshot(writer_settings, writer) is None
+    assert sync_replica(replica_settings, replica)["version"] == first["version"]
+    assert sync_replica(replica_settings, replica) is None
+    assert replica.count() == writer.count()
+    assert index_version(replica_settings) == str(first["version"])
+
+    ingest_document_texts(writer_settings, writer, FakeOllama(), docs=_docs("b"))
+    second = publish_snapshot(writer_settings, writer)
+    third_writer_publish = publish_snapshot(writer_settings, writer)
+    assert second is not None and third_writer_publish is None and second["version"] > first["version"]
+    old_collection = replica.collection_name
+    sync_replica(replica_settings, replica)
+    assert replica.collection_name != old_collection
+    assert replica.count() == writer.count()
+    served = {chunk.chunk_id: chunk.text for page in replica.iter_chunks() for chunk in page}
+    assert served == {chunk.chunk_id: chunk.text for page in writer.iter_chunks() for chunk in page}
+    assert "b1::chunk::0" in served
+    assert read_latest(writer_settings.replica_shared_dir)["version"] == second["version"]
+    assert not list(replica_settings.snapshot_dir.glob("*.zip"))
+
+
+def test_replica_reports_version_and_refuses_writes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = _settings(tmp_path, "replica", "replica")
+    monkeypatch.setattr(readiness, "_state", {"index_warmup": {"status": "done"}, "checks": {}, "checked_at": 1e18})
+    app.dependency_overrides[get_settings] = lambda: settings
+    client = TestClient(app)
+    before = client.get("/ready").json()
+    rejected = client.post("/ingest/gc")
+    writer_settings = _settings(tmp_path, "writer", "publisher")
+    writer = ChromaVectorStore(writer_settings)
+    ingest_document_texts(writer_settings, writer, FakeOllama(), docs=_docs("a"))
+    published = publish_snapshot(writer_settings, writer)
+    sync_replica(settings, ChromaVectorStore(settings))
+    after = client.get("/ready")
+    app.dependency_overrides.clear()
+
+    assert before["reasons"] == ["no published index version has been loaded yet"]
+    assert rejected.status_code == 409
+    assert after.status_code == 200 and after.json()["index_version"] == str(published["version"])
+
+
+def test_publisher_lets_ingestion_run_and_redoes_a_torn_export(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    writer_settings = _settings(tmp_path, "writer", "publisher")
+    replica_settings = _settings(tmp_path, "replica", "replica")
+    writer = ChromaVectorStore(writer_settings)
+    ingest_document_texts(writer_settings, writer, FakeOllama(), docs=_docs("a"))
+    paused: list[bool] = []
+    real_export = replica.export_snapshot
+
+    def export_with_concurrent_write(settings: Settings, store: ChromaVectorStore, path: Path) -> dict:
+        paused.append(bool(write_journal._paused))
+        if len(paused) == 1:
+            ingest_document_texts(writer_settings, writer, FakeOllama(), docs=_docs("b"))
+        return real_export(settings, store, path)
+
+    monkeypatch.setattr(replica, "export_snapshot", export_with_concurrent_write)
+    published = publish_snapshot(writer_settings, writer)
+    assert published is not None and paused == [False, True]
+    assert published["generation"] == writer.index_generation()
+
+    grace: list[float] = []
+    monkeypatch.setattr(replica, "schedule_collection_gc", lambda store, seconds: grace.append(seconds))
+    replica_store = ChromaVectorStore(replica_settings)
+    sync_replica(replica_settings, replica_store)
+    assert replica_store.count() == writer.count()
+    assert grace == [replica_settings.REPLICA_GC_GRACE_SECONDS] and grace[0] < replica_settings.REINDEX_GC_GRACE_SECONDS
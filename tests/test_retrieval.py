@@ -12,7 +12,7 @@ class FakeOllama:
 
 
 class FakeStore:
-    def query(self, query_embedding, top_k: int):  # type: ignore[no-untyped-def]
+    def query(self, query_embedding, top_k: int, filters=None):  # type: ignore[no-untyped-def]
         return [
             type(
                 "Chunk",
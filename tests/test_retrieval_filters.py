@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pytest
+
+from app.core.config import Settings
+from app.rag.ingestion import document_to_chunks
+from app.rag.models import RetrievalFilters
+from app.rag.vector_store import ChromaVectorStore, build_where
+
+
+def _store(tmp_path: Path) -> tuple[Settings, ChromaVectorStore]:
+    settings = Settings(CHROMA_DIR=str(tmp_path / "chroma"))
+    store = ChromaVectorStore(settings)
+    docs = [
+        ("beir__scifact__a.md", "beir/scifact/a.md", "local", 100.0),
+        ("beir__nfcorpus__b.md", "beir/nfcorpus/b.md", "local", 200.0),
+        ("example", "https://example.com/docs/page", "link", 300.0),
+    ]
+    for doc_id, source, source_type, ingested_at in docs:
+        chunks = document_to_chunks(
+            settings, doc_id=doc_id, source=source, text=f"text for {doc_id}", source_type=source_type, ingested_at=ingested_at
+        )
+        store.upsert_chunks(chunks, [[1.0, 0.0]] * len(chunks))
+    return settings, store
+
+
+def _doc_ids(store: ChromaVectorStore, filters: RetrievalFilters) -> set[str]:
+    return {chunk.metadata["doc_id"] for chunk in store.query([1.0, 0.0], top_k=10, filters=filters)}
+
+
+def test_filters_are_pushed_into_chroma_where(tmp_path: Path) -> None:
+    _, store = _store(tmp_path)
+    assert _doc_ids(store, RetrievalFilters(source_prefix="beir/scifact")) == {"beir__scifact__a.md"}
+    assert _doc_ids(store, RetrievalFilters(source_prefix="https://example.com/")) == {"example"}
+    assert _doc_ids(store, RetrievalFilters(source_type="local")) == {"beir__scifact__a.md", "beir__nfcorpus__b.md"}
+    assert _doc_ids(store, RetrievalFilters(doc_ids=["example"])) == {"example"}
+    assert _doc_ids(store, RetrievalFilters(ingested_after=150.0, ingested_before=300.0)) == {"beir__nfcorpus__b.md"}
+    assert _doc_ids(store, RetrievalFilters(source_prefix="beir", source_type="link")) == set()
+
+
+def test_build_where_rejects_unsupported_prefix() -> None:
+    assert build_where(RetrievalFilters()) is None
+    with pytest.raises(ValueError):
+        build_where(RetrievalFilters(source_prefix="a/b/c/d/e/f/g"))
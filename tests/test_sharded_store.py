@@ -0,0 +1,126 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import create_ingestion_job, get_ingestion_job, init_db
+from app.dependencies import get_store
+from app.main import app
+from app.rag.ingestion import ingest_document_texts
+from app.rag.sharded_store import ShardedVectorStore, ShardLayoutError, open_vector_store, shard_for
+from app.rag.vector_store import ChromaVectorStore, ReadOnlyStoreError
+from app.services.reindex import run_reindex
+
+DOCS = [(f"doc{i}", f"notes/doc{i}.md", " ".join(f"d{i}w{j}" for j in range(10 + 7 * i))) for i in range(8)]
+
+
+class FakeOllama:
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+def _settings(tmp_path: Path, name: str, shards: int) -> Settings:
+    return Settings(
+        CHROMA_DIR=str(tmp_path / name),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        CHUNK_SIZE=60,
+        CHUNK_OVERLAP=10,
+        VECTOR_STORE_SHARDS=shards,
+        REINDEX_MAX_CHUNKS_PER_SECOND=0,
+    )
+
+
+def test_sharded_store_routes_by_doc_and_merges_top_k(tmp_path: Path) -> None:
+    sharded_settings = _settings(tmp_path, "sharded", 3)
+    sharded = open_vector_store(sharded_settings)
+    single = open_vector_store(_settings(tmp_path, "single", 1))
+    assert isinstance(sharded, ShardedVectorStore) and type(single) is ChromaVectorStore
+    # The last document repeats the first one's opening chunk; dedup must see it across shards.
+    docs = DOCS + [("dup", "notes/dup.md", DOCS[0][2][:60])]
+    ingest_document_texts(sharded_settings, sharded, FakeOllama(), docs=docs)
+    ingest_document_texts(sharded_settings, single, FakeOllama(), docs=docs)
+
+    assert sharded.count() == single.count()
+    for index, shard in enumerate(sharded.shards):
+        owners = {chunk.metadata["doc_id"] for page in shard.iter_chunks() for chunk in page}
+        assert all(shard_for(doc_id, 3) == index for doc_id in owners)
+    assert sum(1 for shard in sharded.shards if shard.count()) > 1
+
+    query = FakeOllama().embed(["d3w1 d3w2 d3w3"])[0]
+    expected = [chunk.chunk_id for chunk in single.query(query, 5)]
+    assert [chunk.chunk_id for chunk in sharded.query(query, 5)] == expected
+
+    app.dependency_overrides[get_settings] = lambda: sharded_settings
+    app.dependency_overrides[get_store] = lambda: sharded
+    response = TestClient(app).get("/metrics/vector-store")
+    app.dependency_overrides.clear()
+    payload = response.json()
+    assert payload["shard_count"] == 3 and payload["query"]["queries"] == 1
+    assert [shard["queries"] for shard in payload["shards"]] == [1, 1, 1]
+    assert sum(shard["count"] for shard in payload["shards"]) == sharded.count()
+
+
+def test_sharded_store_reindex_swaps_every_shard(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, "sharded", 2)
+    init_db(settings.sqlite_path)
+    store = ShardedVectorStore(settings)
+    ingest_document_texts(settings, store, FakeOllama(), docs=DOCS, source_type="upload")
+    old_name, old_count = store.collection_name, store.count()
+
+    job_id = create_ingestion_job(settings.sqlite_path, source_type="reindex", source=old_name)
+    run_reindex(settings, store, FakeOllama(), job_id=job_id)
+    job = get_ingestion_job(settings.sqlite_path, job_id=job_id)
+    assert job is not None and job["status"] == "success", job
+    assert {shard.collection_name for shard in store.shards} == {store.collection_name} != {old_name}
+    assert store.count() == old_count
+
+    store.rollback()
+    assert {shard.collection_name for shard in store.shards} == {old_name}
+
+
+def test_sharded_query_loads_text_after_a_shared_chunk_changes_owner(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, "sharded", 3)
+    store = ShardedVectorStore(settings)
+    text = DOCS[0][2][:60]
+    # A second owner that lives in another shard than the chunk it shares.
+    other = next(f"copy{i}" for i in range(50) if shard_for(f"copy{i}", 3) != shard_for("doc0", 3))
+    ingest_document_texts(settings, store, FakeOllama(), docs=[("doc0", "notes/doc0.md", text), (other, f"notes/{other}.md", text)])
+    assert store.count() == 1
+
+    store.delete_by_doc_id("doc0")
+    hits = store.query(FakeOllama().embed([text])[0], 1)
+    assert hits[0].metadata["doc_id"] == other and hits[0].shard == shard_for("doc0", 3)
+    assert hits[0].text.strip() == text.strip()
+
+    lazy = store.query(FakeOllama().embed([text])[0], 1, include_text=False)
+    store.load_texts(lazy)
+    assert lazy[0].text == hits[0].text
+
+
+def test_changing_the_shard_count_refuses_an_existing_index(tmp_path: Path) -> None:
+    single = open_vector_store(_settings(tmp_path, "index", 1))
+    ingest_document_texts(_settings(tmp_path, "index", 1), single, FakeOllama(), docs=DOCS[:2])
+    single.close()
+    with pytest.raises(ShardLayoutError, match="unsharded index"):
+        open_vector_store(_settings(tmp_path, "index", 3))
+
+    sharded = open_vector_store(_settings(tmp_path, "sharded", 3))
+    sharded.close()
+    with pytest.raises(ShardLayoutError, match="3-shard index"):
+        open_vector_store(_settings(tmp_path, "sharded", 2))
+    with pytest.raises(ShardLayoutError, match="3-shard index"):
+        open_vector_store(_settings(tmp_path, "sharded", 1))
+    assert isinstance(open_vector_store(_settings(tmp_path, "sharded", 3)), ShardedVectorStore)
+
+
+def test_sharded_store_closes_when_the_last_pin_is_released(tmp_path: Path) -> None:
+    store = ShardedVectorStore(_settings(tmp_path, "sharded", 2), read_only=True)
+    closed: list[bool] = []
+    store.close = lambda: closed.append(True)  # type: ignore[method-assign]
+    with store.pinned():
+        store.close_when_released()
+        assert store.pins == 1 and not closed
+    assert closed == [True]
+    with pytest.raises(ReadOnlyStoreError):
+        store.reset_collection()
@@ -0,0 +1,124 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import ingested_source_map, init_db
+from app.dependencies import get_ollama, get_store
+from app.rag.ingestion import ingest_document_texts
+from app.rag.snapshot import SnapshotError, export_snapshot, import_snapshot, read_manifest
+from app.main import app
+from app.rag.vector_store import ChromaVectorStore
+from app.services.reindex import exclusive_rebuild
+
+
+class FakeOllama:
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+def _settings(tmp_path: Path, name: str, **overrides: object) -> Settings:
+    (tmp_path / name).mkdir(parents=True, exist_ok=True)
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / name / "chroma"),
+        SQLITE_PATH=str(tmp_path / name / "app.db"),
+        CHUNK_SIZE=120,
+        CHUNK_OVERLAP=20,
+        SNAPSHOT_SHARD_SIZE=3,
+        **overrides,
+    )
+    init_db(settings.sqlite_path)
+    return settings
+
+
+def _populated_store(settings: Settings) -> ChromaVectorStore:
+    store = ChromaVectorStore(settings)
+    docs = [(f"doc{i}", f"notes/doc{i}.md", " ".join(f"d{i}w{j}" for j in range(60))) for i in range(2)]
+    ingest_document_texts(settings, store, FakeOllama(), docs=docs, source_type="upload")
+    return store
+
+
+def test_snapshot_roundtrip_into_fresh_store(tmp_path: Path) -> None:
+    source_settings = _settings(tmp_path, "source")
+    source = _populated_store(source_settings)
+    path = tmp_path / "snap.zip"
+    manifest = export_snapshot(source_settings, source, path)
+    assert manifest["count"] == source.count()
+    assert len(manifest["shards"]) > 1
+
+    target_settings = _settings(tmp_path, "target", OLLAMA_EMBED_MODEL="other-embed")
+    target = ChromaVectorStore(target_settings)
+    summary = import_snapshot(target_settings, target, path)
+
+    assert summary["chunks"] == target.count() == source.count()
+    assert summary["embed_model_matches_config"] is False
+    assert target.embed_model == source.embed_model
+    assert ingested_source_map(target_settings.sqlite_path)["doc1"] == ("upload", "notes/doc1.md")
+    original = {c.chunk_id: c for page in source.iter_chunks(include_embeddings=True) for c in page}
+    for page in target.iter_chunks(include_embeddings=True):
+        for chunk in page:
+            assert chunk.metadata == original[chunk.chunk_id].metadata
+            assert chunk.text == original[chunk.chunk_id].text
+            assert chunk.embedding == pytest.approx(original[chunk.chunk_id].embedding, rel=1e-3)
+
+
+def test_snapshot_rejects_tampered_member(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, "source")
+    path = tmp_path / "snap.zip"
+    export_snapshot(settings, _populated_store(settings), path)
+    tampered = tmp_path / "tampered.zip"
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tampered, "w") as dst:
+        for info in src.infolist():
+            payload = src.read(info.filename)
+            if info.filename.startswith("columns-00000"):
+                payload = payload[:-1] + bytes([payload[-1] ^ 1])
+            dst.writestr(info, payload)
+    read_manifest(tampered)
+
+    target_settings = _settings(tmp_path, "target")
+    target = ChromaVectorStore(target_settings)
+    with pytest.raises(SnapshotError):
+        import_snapshot(target_settings, target, tampered)
+    assert target.count() == 0
+    assert target.collection_state()["previous"] is None
+
+
+def test_snapshot_merge_refuses_other_embed_model(tmp_path: Path) -> None:
+    source_settings = _settings(tmp_path, "source")
+    path = tmp_path / "snap.zip"
+    export_snapshot(source_settings, _populated_store(source_settings), path)
+
+    target_settings = _settings(tmp_path, "target", OLLAMA_EMBED_MODEL="other-embed")
+    target = _populated_store(target_settings)
+    with pytest.raises(SnapshotError):
+        import_snapshot(target_settings, target, path, replace=False)
+
+
+def test_snapshot_export_runs_as_a_fenced_job(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, "api", SNAPSHOT_DIR=str(tmp_path / "api" / "snapshots"))
+    store = _populated_store(settings)
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_store] = lambda: store
+    app.dependency_overrides[get_ollama] = lambda: FakeOllama()
+    client = TestClient(app)
+    try:
+        with exclusive_rebuild():
+            assert client.post("/ingest/snapshot/export").status_code == 409
+
+        accepted = client.post("/ingest/snapshot/export")
+        assert accepted.status_code == 202
+        job_id = accepted.json()["job_id"]
+        assert client.get(f"/ingest/jobs/{job_id}").json()["status"] == "success"
+
+        download = client.get(f"/ingest/snapshot/export/{job_id}")
+        assert download.status_code == 200
+        path = tmp_path / "download.zip"
+        path.write_bytes(download.content)
+        manifest = read_manifest(path)
+        assert download.headers["X-Snapshot-Checksum"] == manifest["checksum"]
+        assert manifest["count"] == store.count()
+        assert client.get("/ingest/snapshot/export/999999").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,290 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, get_settings
+from app.db.sqlite import (
+    get_index_state,
+    ingested_source_map,
+    init_db,
+    log_query_run,
+    log_retrieval_event,
+    mark_index_reset,
+)
+from app.dependencies import get_ollama, get_store, get_tenant_registry
+from app.main import app
+from app.rag.ingestion import ingest_document_texts
+from app.rag import tenants
+from app.rag.tenants import TenantRegistry
+from app.rag.vector_store import ChromaVectorStore
+from app.services import workers
+from app.services.reindex import exclusive_rebuild, reindex_running
+
+
+class FakeOllama:
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(len(text) % 7), float(sum(map(ord, text)) % 11), 1.0] for text in texts]
+
+
+@pytest.fixture
+def settings(tmp_path: Path) -> Settings:
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        WRITER_QUEUE_DIR=str(tmp_path / "queue"),
+        CHUNK_SIZE=60,
+        CHUNK_OVERLAP=0,
+        TENANT_EVICT_IDLE_SECONDS=0,
+    )
+    init_db(settings.sqlite_path)
+    return settings
+
+
+def _docs(prefix: str) -> list[tuple[str, str, str]]:
+    return [(f"{prefix}{i}", f"{prefix}{i}.md", " ".join(f"{prefix}{i}w{j}" for j in range(20))) for i in range(2)]
+
+
+def test_tenants_are_isolated_through_the_api(settings: Settings) -> None:
+    default_store = ChromaVectorStore(settings)
+    registry = TenantRegistry(settings.model_copy(update={"TENANT_NAMES": "acme"}))
+    app.dependency_overrides[get_settings] = lambda: registry.settings
+    app.dependency_overrides[get_store] = lambda: default_store
+    app.dependency_overrides[get_tenant_registry] = lambda: registry
+    app.dependency_overrides[get_ollama] = lambda: FakeOllama()
+    client = TestClient(app)
+    try:
+        acme = {"X-Tenant": "acme"}
+        assert client.post("/ingest/upload", files={"file": ("plan.md", b"acme roadmap " * 10, "text/markdown")}, headers=acme).status_code == 202
+        assert client.post("/ingest/upload", files={"file": ("notes.md", b"default notes " * 10, "text/markdown")}).status_code == 202
+
+        assert [item["doc_id"] for item in client.get("/ingest/sources", headers=acme).json()["items"]] == ["plan.md"]
+        assert [item["doc_id"] for item in client.get("/ingest/sources").json()["items"]] == ["notes.md"]
+        assert {c.metadata["doc_id"] for c in registry.store("acme").query([1.0, 1.0, 1.0], top_k=10)} == {"plan.md"}
+        assert {c.metadata["doc_id"] for c in default_store.query([1.0, 1.0, 1.0], top_k=10)} == {"notes.md"}
+        assert client.get("/ingest/collections", headers=acme).json()["active"] == "portfolio_docs__t_acme"
+
+        assert client.get("/ingest/sources", headers={"X-Tenant": "other"}).status_code == 400
+        assert client.get("/ingest/sources", headers={"X-Tenant": "../etc"}).status_code == 400
+
+        metrics = client.get("/metrics/tenants").json()
+        by_name = {tenant["tenant"]: tenant for tenant in metrics["tenants"]}
+        assert set(by_name) == {"default", "acme"}
+        assert by_name["acme"]["loaded"] and by_name["acme"]["vector_count"] == registry.store("acme").count()
+        assert by_name["acme"]["queries"] == 1
+        assert client.get("/metrics/vector-store", headers=acme).json()["tenant"] == "acme"
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_jobs_history_runs_and_reset_state_are_scoped_to_the_tenant(settings: Settings) -> None:
+    default_store = ChromaVectorStore(settings)
+    registry = TenantRegistry(settings.model_copy(update={"TENANT_NAMES": "acme"}))
+    app.dependency_overrides[get_settings] = lambda: registry.settings
+    app.dependency_overrides[get_store] = lambda: default_store
+    app.dependency_overrides[get_tenant_registry] = lambda: registry
+    app.dependency_overrides[get_ollama] = lambda: FakeOllama()
+    client = TestClient(app)
+    acme = {"X-Tenant": "acme"}
+    for tenant in ("default", "acme"):
+        log_retrieval_event(
+            settings.sqlite_path,
+            request_id=None,
+            source="live_query",
+            query_text=f"{tenant} question",
+            top_k=3,
+            hit=True,
+            recall_at_k=1.0,
+            recall_at_5=1.0,
+            citations=[],
+            retrieved_doc_ids=[],
+            tenant=tenant,
+        )
+        log_query_run(
+            settings.sqlite_path,
+            request_id=None,
+            question=f"{tenant} question",
+            answer="answer",
+            citations=[],
+            retrieved_doc_ids=[],
+            latency_ms=1.0,
+            tenant=tenant,
+        )
+    mark_index_reset(settings.sqlite_path, tenant="acme")
+    try:
+        job_id = client.post("/ingest/upload", files={"file": ("plan.md", b"acme roadmap " * 10, "text/markdown")}, headers=acme).json()["job_id"]
+
+        assert [job["job_id"] for job in client.get("/ingest/jobs", headers=acme).json()["jobs"]] == [job_id]
+        assert client.get("/ingest/jobs").json()["jobs"] == []
+        assert client.get(f"/ingest/jobs/{job_id}", headers=acme).status_code == 200
+        assert client.get(f"/ingest/jobs/{job_id}").status_code == 404
+
+        assert [item["question"] for item in client.get("/query/history", headers=acme).json()["items"]] == ["acme question"]
+        assert [item["question"] for item in client.get("/query/history").json()["items"]] == ["default question"]
+        runs = client.get("/query/runs", headers=acme).json()["items"]
+        assert [run["question"] for run in runs] == ["acme question"]
+        assert client.post(f"/query/runs/{runs[0]['id']}/feedback", json={"is_correct": True}).status_code == 404
+
+        assert client.get("/ingest/sources", headers=acme).json()["reset_count"] == 1
+        assert client.get("/ingest/sources").json()["reset_count"] == 0
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_rebuild_lock_is_per_tenant() -> None:
+    with exclusive_rebuild("acme"):
+        assert reindex_running("acme") and not reindex_running()
+        with exclusive_rebuild():
+            assert reindex_running()
+        with pytest.raises(RuntimeError):
+            with exclusive_rebuild("acme"):
+                pass
+    assert not reindex_running("acme")
+
+
+def test_unknown_tenants_need_the_write_key_without_an_allow_list(settings: Settings) -> None:
+    default_store = ChromaVectorStore(settings)
+    app.dependency_overrides[get_store] = lambda: default_store
+    app.dependency_overrides[get_ollama] = lambda: FakeOllama()
+    client = TestClient(app)
+    new = {"X-Tenant": "newco"}
+    try:
+        for key in ("", "secret"):
+            keyed = settings.model_copy(update={"WRITE_API_KEY": key})
+            registry = TenantRegistry(keyed)
+            app.dependency_overrides[get_settings] = lambda: keyed
+            app.dependency_overrides[get_tenant_registry] = lambda: registry
+            assert client.get("/ingest/sources", headers=new).status_code == 404
+            assert client.get("/ingest/sources", headers={**new, "X-API-Key": "wrong"}).status_code == 404
+            assert not (settings.chroma_dir / "tenants" / "newco").exists()
+
+        assert client.get("/ingest/sources", headers={**new, "X-API-Key": "secret"}).status_code == 200
+        # Once its index exists the tenant is known and readable without the key.
+        assert client.get("/ingest/sources", headers=new).status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_idle_tenants_are_evicted_over_budget_and_reload_lazily(settings: Settings) -> None:
+    registry = TenantRegistry(settings.model_copy(update={"TENANT_MEMORY_BUDGET_MB": 0.001}))
+    first = registry.store("alpha")
+    ingest_document_texts(first.settings, first, FakeOllama(), docs=_docs("a"))
+    count = first.count()
+    first.query([1.0, 1.0, 1.0], top_k=2)
+    assert registry.loaded() == ["alpha"]
+
+    second = registry.store("beta")
+    with second.pinned():
+        ingest_document_texts(second.settings, second, FakeOllama(), docs=_docs("b"))
+        registry.store("gamma")
+        # beta is pinned by a running job, so only the idle tenants can go.
+        assert "beta" in registry.loaded() and "alpha" not in registry.loaded()
+
+    reopened = registry.store("alpha")
+    assert reopened is not first and reopened.count() == count
+    stats = {tenant["tenant"]: tenant for tenant in registry.stats(ChromaVectorStore(settings))["tenants"]}
+    assert stats["alpha"]["loads"] == 2 and stats["alpha"]["queries"] == 1
+    assert registry.evictions >= 2
+
+
+def test_tenant_opens_do_not_block_the_registry(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    registry = TenantRegistry(settings)
+    gate = threading.Event()
+    opened: list[str] = []
+    real_open = tenants.open_vector_store
+
+    def slow_open(tenant_cfg: Settings, **kwargs: object) -> ChromaVectorStore:
+        opened.append(tenant_cfg.TENANT)
+        if tenant_cfg.TENANT == "slow":
+            gate.wait(timeout=5)
+        return real_open(tenant_cfg, **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(tenants, "open_vector_store", slow_open)
+    results: list[ChromaVectorStore] = []
+    threads = [threading.Thread(target=lambda: results.append(registry.store("slow"))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    # Another tenant opens while the slow one is still loading.
+    started = time.monotonic()
+    assert registry.store("fast").settings.TENANT == "fast"
+    assert time.monotonic() - started < 2
+    gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert results[0] is results[1]
+    assert opened.count("slow") == 1
+
+
+def test_evicted_store_closes_when_its_last_lease_ends(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    registry = TenantRegistry(settings.model_copy(update={"TENANT_MEMORY_BUDGET_MB": 0.0005}))
+    with registry.lease("alpha") as alpha:
+        ingest_document_texts(alpha.settings, alpha, FakeOllama(), docs=_docs("a"))
+        registry.store("beta")
+        assert "alpha" in registry.loaded()
+    registry.store("gamma")
+    assert "alpha" not in registry.loaded()
+
+    closed: list[str] = []
+    store = registry.store("delta")
+    monkeypatch.setattr(store, "close", lambda: closed.append("delta"))
+    with store.pinned():
+        store.close_when_released()
+        assert closed == []
+        store.query([1.0, 1.0, 1.0], top_k=1)
+    assert closed == ["delta"]
+
+
+def test_writer_runs_queued_jobs_against_the_tenant_store(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    registry = TenantRegistry(settings)
+    tenant_store = registry.store("acme")
+    monkeypatch.setattr(workers, "_role", {"role": "reader", "handle": None})
+    workers.submit_job(
+        None,  # type: ignore[arg-type]
+        tenant_store.settings,
+        tenant_store,
+        FakeOllama(),  # type: ignore[arg-type]
+        kind="upload",
+        source="queued.md",
+        payload={"filename": "queued.md", "raw": b"queued tenant text " * 5},
+    )
+    default_store = ChromaVectorStore(settings)
+    assert workers.process_next_writer_job(settings, default_store, FakeOllama(), registry) is not None  # type: ignore[arg-type]
+    assert default_store.count() == 0 and tenant_store.count() > 0
+    assert ingested_source_map(settings.sqlite_path, tenant="acme") == {"queued.md": ("upload", "queued.md")}
+    assert ingested_source_map(settings.sqlite_path) == {}
+
+
+def test_existing_sources_move_to_the_default_tenant(tmp_path: Path) -> None:
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE ingested_sources (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ingested_utc TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                source_type TEXT NOT NULL,
+                source TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                UNIQUE(source, doc_id)
+            )
+            """
+        )
+        conn.execute("INSERT INTO ingested_sources (source_type, source, doc_id) VALUES ('upload', 'a.md', 'a.md')")
+        conn.execute(
+            """
+            CREATE TABLE index_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_reset_utc TEXT,
+                reset_count INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute("INSERT INTO index_state (id, last_reset_utc, reset_count) VALUES (1, '2024-01-01T00:00:00Z', 3)")
+    init_db(db_path)
+    assert ingested_source_map(db_path) == {"a.md": ("upload", "a.md")}
+    assert ingested_source_map(db_path, tenant="acme") == {}
+    assert get_index_state(db_path) == {"last_reset_utc": "2024-01-01T00:00:00Z", "reset_count": 3}
+    assert get_index_state(db_path, tenant="acme") == {"last_reset_utc": None, "reset_count": 0}
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.db.sqlite import (
+    document_centroid_version,
+    init_db,
+    load_document_centroids,
+    log_request,
+    replace_document_centroids,
+)
+from app.rag import centroids
+from app.rag.centroids import centroid_index
+from app.rag.ingestion import ingest_document_texts
+from app.rag.models import RetrievalFilters
+from app.rag.pipeline import RAGPipeline
+from app.rag.vector_store import ChromaVectorStore
+from app.services.cleanup import delete_document
+
+TOPICS = ("alpha", "beta", "gamma")
+
+
+class FakeOllama:
+    def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        return [[float(text.count(topic)) + 0.01 for topic in TOPICS] for text in texts]
+
+
+def _pipeline(tmp_path: Path, **overrides: object) -> RAGPipeline:
+    settings = Settings(
+        CHROMA_DIR=str(tmp_path / "chroma"),
+        SQLITE_PATH=str(tmp_path / "app.db"),
+        CHUNK_SIZE=60,
+        CHUNK_OVERLAP=0,
+        RETRIEVAL_TWO_STAGE_ENABLED=True,
+        RETRIEVAL_TWO_STAGE_DOCS=1,
+        **overrides,
+    )
+    init_db(settings.sqlite_path)
+    store = ChromaVectorStore(settings)
+    docs = [
+        ("pure-alpha", "a.md", ("alpha " * 10).strip() + " " + ("alpha " * 10).strip()),
+        # Mostly beta, with one alpha-heavy chunk: direct search ranks that chunk highly.
+        ("mixed", "m.md", "alpha." * 10 + " " + ("beta " * 12).strip() + " " + ("beta " * 12).strip()),
+        ("gamma", "g.md", ("gamma " * 10).strip()),
+    ]
+    ingest_document_texts(settings, store, FakeOllama(), docs=docs)
+    return RAGPipeline(settings=settings, store=store, ollama=FakeOllama())  # type: ignore[arg-type]
+
+
+def test_two_stage_limits_chunk_search_to_top_documents(tmp_path: Path) -> None:
+    pipeline = _pipeline(tmp_path)
+    settings = pipeline.settings
+    assert document_centroid_version(settings.sqlite_path, collection=pipeline.store.collection_name)[0] == 3
+
+    _, doc_ids = pipeline.retrieve("alpha", top_k=4)
+    assert doc_ids == ["pure-alpha"]
+
+    settings.RETRIEVAL_TWO_STAGE_ENABLED = False
+    _, direct_doc_ids = pipeline.retrieve("alpha", top_k=4)
+    assert "mixed" in direct_doc_ids
+    settings.RETRIEVAL_TWO_STAGE_ENABLED = True
+
+    # Explicit doc_id filters bypass the coarse stage.
+    _, filtered = pipeline.retrieve("alpha", top_k=4, filters=RetrievalFilters(doc_ids=["mixed"]))
+    assert filtered == ["mixed"]
+
+
+def test_deleted_documents_leave_the_centroid_index(tmp_path: Path) -> None:
+    pipeline = _pipeline(tmp_path)
+    delete_document(pipeline.settings, pipeline.store, "pure-alpha")
+    assert document_centroid_version(pipeline.settings.sqlite_path, collection=pipeline.store.collection_name)[0] == 2
+    _, doc_ids = pipeline.retrieve("alpha", top_k=4)
+    assert doc_ids == ["mixed"]
+
+
+def test_centroid_matrices_stay_cached_per_collection(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pipeline = _pipeline(tmp_path)
+    db_path = pipeline.settings.sqlite_path
+    live = pipeline.store.collection_name
+    replace_document_centroids(db_path, collection="other", rows=[("x", np.ones(3, dtype=np.float32).tobytes(), 1)])
+    index = centroid_index(db_path)
+    loads: list[str] = []
+    monkeypatch.setattr(
+        centroids,
+        "load_document_centroids",
+        lambda path, *, collection: loads.append(collection) or load_document_centroids(path, collection=collection),
+    )
+
+    for _ in range(2):
+        assert index.top_documents(live, [1.0, 0.0, 0.0], 1) == ["pure-alpha"]
+        assert index.top_documents("other", [1.0, 0.0, 0.0], 1) == ["x"]
+        # Request logs do not touch the centroid version.
+        log_request(db_path, method="POST", path="/query", status_code=200, latency_ms=1.0, success=True, error=None)
+    assert loads == [live, "other"]
+
+    delete_document(pipeline.settings, pipeline.store, "pure-alpha")
+    assert index.top_documents(live, [1.0, 0.0, 0.0], 1) == ["mixed"]
+    assert index.top_documents("other", [1.0, 0.0, 0.0], 1) == ["x"]
+    assert loads == [live, "other", live]
@@ -12,6 +12,9 @@ class FakeOllama:
     def list_models(self) -> list[str]:
         return ["llama3.2:1b", "llama3.2:3b"]
 
+    def preload(self, model: str, *, embedding: bool = False) -> dict[str, str | None]:
+        return {}
+
 
 def test_write_endpoints_require_api_key_when_configured(tmp_path: Path) -> None:
     db = tmp_path / "app.db"